@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark line range reads on large log/data files.
+
+Compares read_file_with_lines (cached line offsets + mmap slicing) against
+reading the whole file with readlines() for every request, on a generated
+log file.
+
+Usage:
+    python benchmark_read_lines.py [size_mb] [ranges]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from mcp_code_editor.tools.file_operations import read_file_with_lines
+from mcp_code_editor.tools.line_index import line_index
+
+
+def generate_log_file(path, size_mb):
+    """Write a log file of roughly size_mb megabytes with lines of varying length"""
+    target = size_mb * 1024 * 1024
+    levels = ["DEBUG", "INFO", "WARNING", "ERROR"]
+    rng = random.Random(42)
+    written = 0
+    number = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < target:
+            chunk = []
+            for _ in range(10000):
+                number += 1
+                payload = "x" * rng.randint(0, 160)
+                chunk.append(f"2024-01-01T00:00:{number % 60:02d} {rng.choice(levels)} request={number} {payload}\n")
+            data = "".join(chunk)
+            f.write(data)
+            written += len(data)
+
+
+def readlines_range(path, start_line, end_line):
+    """Whole-file read of the previous implementation"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    selected = lines[start_line - 1:end_line]
+    numbered = [f"{start_line + i:4d}: {line.rstrip(chr(10) + chr(13))}" for i, line in enumerate(selected)]
+    return len(lines), '\n'.join(numbered)
+
+
+def run_benchmark(size_mb=300, ranges=20):
+    """Time random 50-line range reads with both implementations"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "service.log")
+        print(f"Generating {size_mb} MB log file...")
+        generate_log_file(path, size_mb)
+
+        started = time.perf_counter()
+        total_lines = read_file_with_lines(path, 1, 1)["total_lines"]
+        first_read = time.perf_counter() - started
+        print(f"File: {os.path.getsize(path) / 1024 / 1024:.0f} MB, {total_lines} lines")
+        print(f"First read (builds line offsets): {first_read * 1000:.1f} ms")
+
+        rng = random.Random(7)
+        requests = []
+        for _ in range(ranges):
+            start = rng.randint(1, total_lines - 50)
+            requests.append((start, start + 49))
+
+        started = time.perf_counter()
+        for start, end in requests:
+            result = read_file_with_lines(path, start, end, include_plain=False)
+        cached = (time.perf_counter() - started) / ranges
+
+        started = time.perf_counter()
+        for start, end in requests[:3]:
+            expected_total, expected = readlines_range(path, start, end)
+        baseline = (time.perf_counter() - started) / 3
+
+        # Same output as the previous implementation
+        check = read_file_with_lines(path, start, end)
+        assert check["total_lines"] == expected_total
+        assert check["content_with_numbers"] == expected
+
+        print(f"Cached offsets + mmap: {cached * 1000:.3f} ms per 50-line range")
+        print(f"readlines():           {baseline * 1000:.1f} ms per 50-line range")
+        print(f"Speedup: {baseline / cached:.0f}x")
+        print(f"Line index: {line_index.get_stats()}")
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    run_benchmark(size, count)
@@ -1,5 +1,6 @@
 # Core models and utilities for mcp-code-editor
 
 from .models import DiffBlock, DiffBuilder, FileModifier
+from .file_cache import FileCache, file_cache
 
-__all__ = ['FileModifier', 'DiffBlock', 'DiffBuilder']
+__all__ = ['FileModifier', 'DiffBlock', 'DiffBuilder', 'FileCache', 'file_cache']
@@ -0,0 +1,114 @@
+"""
+Shared cache of file contents, validated against the file's stat on every read.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Total size of the cached contents before the least recently read files are evicted
+MAX_CACHED_BYTES = 64 * 1024 * 1024
+
+# Larger files are read from disk every time
+MAX_CACHED_FILE_SIZE = 4 * 1024 * 1024
+
+
+def _signature(stat) -> Tuple[int, int, int]:
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class FileCache:
+    """
+    Size-bounded LRU cache of decoded (UTF-8) file contents.
+
+    Entries are keyed by path and validated with (mtime_ns, size, inode), so
+    a file changed or replaced outside the server is read again. Writes made
+    through ``write_text`` store the written content, so the reads of an edit
+    cycle (diff application, impact analysis, re-indexing) are served from
+    memory.
+    """
+
+    def __init__(self, max_bytes: int = MAX_CACHED_BYTES, max_file_size: int = MAX_CACHED_FILE_SIZE):
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size
+        self.entries: "OrderedDict[str, Tuple[Tuple[int, int, int], str]]" = OrderedDict()
+        self.cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def read_text(self, file_path) -> str:
+        """
+        Get the content of a file, as ``open(file_path, 'r', encoding='utf-8').read()`` would.
+
+        Raises:
+            OSError: If the file cannot be read
+            UnicodeDecodeError: If the file is not valid UTF-8
+        """
+        key = str(Path(file_path))
+        signature = _signature(Path(key).stat())
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        with open(key, 'r', encoding='utf-8') as f:
+            content = f.read()
+        self._store(key, signature, content)
+        return content
+
+    def write_text(self, file_path, content: str):
+        """Write a file and keep its new content cached."""
+        key = str(Path(file_path))
+        with open(key, 'w', encoding='utf-8') as f:
+            f.write(content)
+        if '\r' in content:
+            # Reading back translates line endings: let the next read decode the file
+            self.invalidate(key)
+        else:
+            self._store(key, _signature(Path(key).stat()), content)
+
+    def _store(self, key: str, signature: Tuple[int, int, int], content: str):
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.cached_bytes -= previous[0][1]
+            if signature[1] > self.max_file_size:
+                return
+            self.entries[key] = (signature, content)
+            self.cached_bytes += signature[1]
+            while self.cached_bytes > self.max_bytes:
+                _, (evicted, _) = self.entries.popitem(last=False)
+                self.cached_bytes -= evicted[1]
+
+    def invalidate(self, file_path):
+        """Drop the cached content of a file."""
+        with self._lock:
+            entry = self.entries.pop(str(Path(file_path)), None)
+            if entry is not None:
+                self.cached_bytes -= entry[0][1]
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self.entries.clear()
+            self.cached_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size statistics."""
+        with self._lock:
+            return {
+                "files": len(self.entries),
+                "bytes": self.cached_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+# Shared by every reader and writer of the server
+file_cache = FileCache()
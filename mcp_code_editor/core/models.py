@@ -5,6 +5,7 @@ import logging
 from pathlib import Path
 from typing import List, Optional
 from pydantic import BaseModel, Field
+from .file_cache import file_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -95,15 +96,17 @@ class FileModifier:
         self.file_path = Path(file_path)
         self.lines: List[str] = []
         self.original_content = ""
+        # (start_line, end_line, new_line_count) of every applied block, in
+        # original 1-indexed line numbers (end_line < start_line for insertions)
+        self.applied_ranges: List[tuple] = []
         
     def load_file(self) -> None:
         """Load file content into memory."""
         if not self.file_path.exists():
             raise FileNotFoundError(f"File not found: {self.file_path}")
         
-        with open(self.file_path, 'r', encoding='utf-8') as f:
-            self.original_content = f.read()
-            self.lines = self.original_content.splitlines(keepends=True)
+        self.original_content = file_cache.read_text(self.file_path)
+        self.lines = self.original_content.splitlines(keepends=True)
     
     def find_matching_lines(self, diff_block: DiffBlock) -> tuple[int, int]:
         """Find the exact lines that match the search content using fuzzy matching."""
@@ -137,11 +140,8 @@ class FileModifier:
             f"Expected content:\n{diff_block.search_content}"
         )
     
-    def apply_diff_block(self, diff_block: DiffBlock) -> None:
-        """Apply a single diff block to the file."""
-        start_idx, end_idx = self.find_matching_lines(diff_block)
-        
-        # Prepare replacement lines
+    def _replacement_lines(self, diff_block: DiffBlock, start_idx: int) -> List[str]:
+        """Get the lines that replace a matched block starting at ``start_idx``."""
         replace_lines = []
         if diff_block.replace_content:
             replace_lines = [line + '\n' for line in diff_block.replace_content.splitlines()]
@@ -149,26 +149,56 @@ class FileModifier:
             if start_idx < len(self.lines) and not self.lines[start_idx].endswith('\n'):
                 if replace_lines and replace_lines[-1].endswith('\n'):
                     replace_lines[-1] = replace_lines[-1].rstrip('\n')
+        return replace_lines
+    
+    def apply_diff_block(self, diff_block: DiffBlock) -> None:
+        """Apply a single diff block to the file."""
+        start_idx, end_idx = self.find_matching_lines(diff_block)
+        replace_lines = self._replacement_lines(diff_block, start_idx)
         
         # Replace the lines
         self.lines[start_idx:end_idx] = replace_lines
+        self.applied_ranges.append((start_idx + 1, end_idx, len(replace_lines)))
         
         logger.info(f"Applied diff block: lines {start_idx+1}-{end_idx} -> {len(replace_lines)} lines")
     
     def apply_all_diffs(self, diff_blocks: List[DiffBlock]) -> str:
-        """Apply all diff blocks and return the result."""
-        # Sort blocks by start_line in reverse order to avoid line number shifts
-        sorted_blocks = sorted(diff_blocks, key=lambda b: b.start_line, reverse=True)
+        """
+        Apply all diff blocks and return the result.
         
-        for block in sorted_blocks:
-            self.apply_diff_block(block)
+        Every block is matched against the original lines before any of them
+        is applied, so ``applied_ranges`` holds original line numbers.
+        
+        Raises:
+            ValueError: If a block does not match or two blocks match overlapping lines
+        """
+        matched = []
+        for block in diff_blocks:
+            start_idx, end_idx = self.find_matching_lines(block)
+            matched.append((start_idx, end_idx, block))
+        matched.sort(key=lambda item: (item[0], item[1]))
+        
+        for (start_a, end_a, block_a), (start_b, end_b, block_b) in zip(matched, matched[1:]):
+            if start_b < end_a:
+                raise ValueError(
+                    f"Diff blocks starting at lines {block_a.start_line} and {block_b.start_line} "
+                    f"overlap (both match lines {start_b + 1}-{min(end_a, end_b)}). "
+                    f"Merge them into a single block."
+                )
+        
+        # Apply from the bottom up so the matched positions above stay valid
+        replacements = [(start_idx, end_idx, self._replacement_lines(block, start_idx))
+                        for start_idx, end_idx, block in matched]
+        for start_idx, end_idx, replace_lines in reversed(replacements):
+            self.lines[start_idx:end_idx] = replace_lines
+            self.applied_ranges.append((start_idx + 1, end_idx, len(replace_lines)))
+            logger.info(f"Applied diff block: lines {start_idx+1}-{end_idx} -> {len(replace_lines)} lines")
         
         return ''.join(self.lines)
     
     def save_file(self, content: str) -> None:
         """Save the modified content back to the file."""
         # Save modified content directly without backup
-        with open(self.file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        file_cache.write_text(self.file_path, content)
         
         logger.info(f"File saved: {self.file_path}")
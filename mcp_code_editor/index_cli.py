@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Command line tool to build and export the AST index of a project, e.g. in CI.
+
+    mcp-code-editor-index export /path/to/project [-o index.jsonl.gz]
+    mcp-code-editor-index info index.jsonl.gz
+
+The exported file is loaded by a running server with import_index_tool.
+"""
+import argparse
+import gzip
+import json
+import sys
+from pathlib import Path
+
+
+def _build_state(path: str):
+    """Set up a project and build its AST index synchronously."""
+    from mcp_code_editor.tools.project_tools import ProjectState, GitIgnoreParser, build_file_tree
+    from mcp_code_editor.tools.ast_analyzer import build_ast_index
+    from mcp_code_editor.tools.reference_index import ReferenceIndex
+    from mcp_code_editor.tools.call_graph import CallGraph
+    from mcp_code_editor.tools.fingerprint_index import FingerprintIndex
+
+    state = ProjectState()
+    state.project_root = Path(path).resolve()
+    gitignore_parser = GitIgnoreParser(state.project_root / ".gitignore")
+    state.exclude_dirs = [
+        "node_modules", ".git", "__pycache__", ".pytest_cache",
+        ".mypy_cache", ".tox", "venv", ".venv", "env", ".env",
+        "dist", "build", ".next", ".nuxt", "target"
+    ]
+    state.file_tree = build_file_tree(state.project_root, gitignore_parser, state.exclude_dirs)
+    state.reference_index = ReferenceIndex()
+    state.call_graph = CallGraph()
+    state.fingerprint_index = FingerprintIndex()
+    state.ast_index = build_ast_index(state.project_root, state.file_tree,
+                                      reference_index=state.reference_index,
+                                      call_graph=state.call_graph,
+                                      spans=state.statement_spans,
+                                      fingerprint_index=state.fingerprint_index)
+    state.ast_enabled = True
+    state.setup_complete = True
+    return state
+
+
+def _export(args) -> int:
+    from mcp_code_editor.tools.index_export import export_index
+
+    if not Path(args.project).is_dir():
+        print(f"Not a directory: {args.project}", file=sys.stderr)
+        return 1
+    output = str(Path(args.output).resolve()) if args.output else None
+    result = export_index(_build_state(args.project), output)
+    if not result.get("success"):
+        print(result.get("message"), file=sys.stderr)
+        return 1
+    print(f"Exported {result['definitions']} definitions from {result['files']} files "
+          f"(commit {result['commit'] or 'unknown'}) to {result['path']}")
+    return 0
+
+
+def _info(args) -> int:
+    with gzip.open(args.index, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline() or "{}")
+        files = definitions = 0
+        for line in f:
+            files += 1
+            definitions += len(json.loads(line)["definitions"])
+    print(json.dumps({**header, "files": files, "definitions": definitions}, indent=2))
+    return 0
+
+
+def main():
+    """Entry point of mcp-code-editor-index."""
+    parser = argparse.ArgumentParser(prog="mcp-code-editor-index",
+                                     description="Build, export and inspect portable AST indexes.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Index a project and export the index")
+    export_parser.add_argument("project", help="Project root directory")
+    export_parser.add_argument("-o", "--output", help="Output file (default: "
+                               "<project>/.mcp-code-editor/index-<commit>.jsonl.gz)")
+    export_parser.set_defaults(func=_export)
+
+    info_parser = subparsers.add_parser("info", help="Show the header of an exported index")
+    info_parser.add_argument("index", help="Exported index file")
+    info_parser.set_defaults(func=_info)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
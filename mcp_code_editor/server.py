@@ -10,11 +10,13 @@ A FastMCP server providing powerful code editing tools including:
 This modular server is designed to be easily extensible.
 """
 
+import asyncio
+import heapq
 import logging
 import atexit
 import signal
 import sys
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from fastmcp import FastMCP
 from pathlib import Path
 
@@ -22,10 +24,13 @@ from pathlib import Path
 from mcp_code_editor.tools import (apply_diff, create_file, read_file_with_lines, delete_file,
                                        setup_code_editor, project_files, ProjectState,
                                        setup_code_editor_with_ast, search_definitions, get_file_definitions,
-                                       update_file_ast_index, has_structural_changes,
+                                       update_file_ast_index, refresh_file_index, has_structural_changes,
+                                       refresh_token_index, search_project_text,
+                                       get_definition_docstring, get_definition_lines, is_indexed_source,
                                        index_library, search_library, get_indexed_libraries, get_library_summary,
                                         start_console_process, check_console, send_to_console, list_console_processes,
                                         terminate_console_process, cleanup_terminated_processes)
+from mcp_code_editor.core.file_cache import file_cache
 
 # Configure logging
 logging.basicConfig(level=logging.WARNING)
@@ -93,6 +98,8 @@ mcp = FastMCP(
       - Essential for refactoring and dependency analysis
     • read_file_with_lines: Read files with line numbers + AST metadata for Python files
       - Shows function/class counts and suggests next actions
+    • read_files: Read several files or line ranges in one call (concurrent reads, per-item errors)
+    • read_definition: Read the exact source (or signature/docstring) of a function or class by name
     
     📚 LIBRARY INTEGRATION:
     • index_library: Index external Python libraries for code analysis
@@ -120,6 +127,39 @@ mcp = FastMCP(
 # Initialize project state
 mcp.project_state = ProjectState()
 
+# Maximum time a query waits for the files it needs during background indexing
+_INDEX_WAIT_SECONDS = 2.0
+
+async def _ensure_indexed(state, paths: List[str]) -> None:
+    """Move files to the front of the background indexing queue and wait briefly for them."""
+    paths = [p for p in paths if p]
+    if paths:
+        await _load_shards(state, "ensure_files", paths)
+    
+    indexer = getattr(state, 'indexer', None) if state else None
+    if not indexer or indexer.ready or not paths:
+        return
+    
+    if indexer.prioritize(paths):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, indexer.wait_for, paths, _INDEX_WAIT_SECONDS)
+
+async def _load_shards(state, method: str, *args) -> None:
+    """Load the index shards a query needs (sharded setups only), off the event loop."""
+    shards = getattr(state, 'shards', None) if state else None
+    if shards is None:
+        return
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, getattr(shards, method), *args)
+
+def _add_index_status(result: dict, state) -> dict:
+    """Flag results computed from a partial AST index (background indexing still running)."""
+    indexer = getattr(state, 'indexer', None) if state else None
+    if indexer and not indexer.ready:
+        result["partial"] = True
+        result["index_status"] = indexer.get_status()
+    return result
+
 # Utility function to clean responses
 def _clean_response(data):
     """Remove empty arrays, dicts, and None values from response."""
@@ -190,8 +230,7 @@ def _check_function_uses_library(func_name, lib_name, lib_data, file_path):
     """
     try:
         # Leer el archivo y buscar patrones de uso de la librería
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = file_cache.read_text(file_path)
         
         # Buscar imports de la librería
         import_patterns = [
@@ -324,16 +363,23 @@ async def apply_diff_tool(path: str, blocks: List[Dict[str, Any]], force: bool =
     skip_ast_analysis = _is_trivial_change(blocks)
     
     if state and state.ast_enabled and hasattr(state, 'ast_index') and not skip_ast_analysis:
+        # The modified file must be in the index before its changes are analyzed
+        await _ensure_indexed(state, [path])
+        # ...and so must the modules that may depend on it
+        await _load_shards(state, "ensure_importers", [path])
         try:
             from mcp_code_editor.tools.ast_integration import enhance_apply_diff_with_ast
-            pre_analysis = enhance_apply_diff_with_ast(path, blocks, state.ast_index)
-            
-            # Collect warnings for syntax errors only (breaking changes handled separately)
-            ast_warnings = pre_analysis.get("warnings", [])
-            
-            # NUEVO: Análisis de dependencias automático
             from mcp_code_editor.tools.dependency_analyzer import enhance_apply_diff_with_dependencies
-            dependency_result = enhance_apply_diff_with_dependencies(path, blocks, state.ast_index)
+            
+            # El indexador en segundo plano no escribe en los índices durante el análisis
+            with state.index_lock:
+                pre_analysis = enhance_apply_diff_with_ast(path, blocks, state.ast_index)
+                
+                # Collect warnings for syntax errors only (breaking changes handled separately)
+                ast_warnings = pre_analysis.get("warnings", [])
+                
+                # NUEVO: Análisis de dependencias automático
+                dependency_result = enhance_apply_diff_with_dependencies(path, blocks, state.ast_index, state)
             
             dependency_analysis = dependency_result.get("dependency_analysis", {})
             impact_summary = dependency_result.get("impact_summary", {})
@@ -414,14 +460,20 @@ async def apply_diff_tool(path: str, blocks: List[Dict[str, Any]], force: bool =
     
     # Apply the diff
     result = apply_diff(path, blocks)
+    changed_ranges = result.pop("applied_ranges", None)
     
     # Enhance result with AST information for LLM decision making
     if result.get("success"):
         # Update AST if needed
         if ctx:
             state = getattr(mcp, 'project_state', None)
-            if state and state.ast_enabled and has_structural_changes(blocks):
-                state.ast_index = update_file_ast_index(path, state.ast_index)
+            if state and state.setup_complete:
+                refresh_token_index(state, path)
+            if state and state.ast_enabled:
+                # Structural changes re-extract definitions; any other edit only
+                # refreshes the references of this file
+                refresh_file_index(state, path, structural=has_structural_changes(blocks),
+                                   changed_ranges=changed_ranges)
         
         # Add AST insights to successful result (ALWAYS when AST is enabled)
         if ctx and getattr(mcp, 'project_state', None) and getattr(mcp.project_state, 'ast_enabled', False):
@@ -499,21 +551,23 @@ def create_file_tool(path: str, content: str, overwrite: bool = False) -> dict:
     """Create a new file with the specified content."""
     result = create_file(path, content, overwrite)
     
-    # NUEVO: Actualizar AST automáticamente para archivos Python
-    if result.get("success") and path.endswith(".py"):
+    state = getattr(mcp, 'project_state', None)
+    if result.get("success") and state and state.setup_complete:
+        refresh_token_index(state, path)
+    
+    # NUEVO: Actualizar AST automáticamente para archivos indexados (Python, JS/TS)
+    if result.get("success") and is_indexed_source(path):
         try:
             state = getattr(mcp, 'project_state', None)
             if state and state.ast_enabled and hasattr(state, 'ast_index'):
-                from mcp_code_editor.tools.ast_analyzer import ASTAnalyzer
-                analyzer = ASTAnalyzer()
-                file_analysis = analyzer.analyze_file(Path(path))
+                # Reemplaza definiciones y referencias del archivo (overwrite incluido)
+                refresh = refresh_file_index(state, path)
+                new_definitions = refresh["new_definitions"]
                 
-                # Agregar nuevas definiciones al índice
-                if file_analysis and isinstance(file_analysis, list):
-                    state.ast_index.extend(file_analysis)
+                if new_definitions:
                     result["ast_updated"] = True
-                    result["new_definitions"] = len(file_analysis)
-                    logger.info(f"Updated AST index with {len(file_analysis)} new definitions from {path}")
+                    result["new_definitions"] = new_definitions
+                    logger.info(f"Updated AST index with {new_definitions} new definitions from {path}")
                 else:
                     result["ast_updated"] = False
                     result["new_definitions"] = 0
@@ -533,6 +587,7 @@ async def read_file_with_lines_tool(path: str, start_line: int = None, end_line:
     • Import summaries and definitions overview
     • Contextual suggestions for next actions
     • Enhanced metadata for code navigation
+    • For a line range: the definition containing its first line and the definitions it crosses
     
     Args:
         path: Absolute file path to read (relative paths not supported)
@@ -542,65 +597,184 @@ async def read_file_with_lines_tool(path: str, start_line: int = None, end_line:
     Returns:
         File content with line numbers, plus ast_info and suggested_next_action for Python files
     """
-    result = read_file_with_lines(path, start_line, end_line)
-    
-    # Remove plain_content from the result
-    if 'plain_content' in result:
-        del result['plain_content']
+    # Solo se devuelve el contenido numerado
+    result = read_file_with_lines(path, start_line, end_line, include_plain=False)
     
     # Enhance Python files with AST information if available
     if result.get("success") and path.endswith('.py') and ctx:
         state = getattr(mcp, 'project_state', None)
         # Enhanced AST integration for Python files
         if state and state.ast_enabled and hasattr(state, 'ast_index'):
-            # Find definitions in this file with multiple fallback strategies
-            from pathlib import Path
-            file_definitions = []
-            
-            # Strategy 1: Try normalized absolute paths (convert to forward slashes)
-            try:
-                normalized_path = str(Path(path).resolve()).replace('\\', '/')
-                for d in state.ast_index:
-                    try:
-                        d_file = str(Path(d.get('file', '')).resolve()).replace('\\', '/') if d.get('file') else ''
-                        if d_file == normalized_path:
-                            file_definitions.append(d)
-                    except (OSError, ValueError):
-                        pass
-            except (OSError, ValueError):
-                pass
-            
-            # Strategy 2: Direct string comparison if no matches
-            if not file_definitions:
-                file_definitions = [d for d in state.ast_index if d.get('file') == path]
-            
-            # Strategy 3: Compare by filename only if still no matches
-            if not file_definitions:
-                try:
-                    filename = Path(path).name
-                    for d in state.ast_index:
-                        try:
-                            d_filename = Path(d.get('file', '')).name if d.get('file') else ''
-                            if d_filename == filename:
-                                file_definitions.append(d)
-                        except (OSError, ValueError):
-                            pass
-                except (OSError, ValueError):
-                    pass
-            # Always add ast_info for Python files when AST is enabled, even if empty
-            result["ast_info"] = {
-                "definitions_found": len(file_definitions),
-                "functions": [d["name"] for d in file_definitions if d.get("type") == "function"],
-                "classes": [d["name"] for d in file_definitions if d.get("type") == "class"],
-                "imports": [d["name"] for d in file_definitions if d.get("type") == "import"][:10]  # Limit to first 10
-            }
-            if file_definitions:
-                result["suggested_next_action"] = f"This Python file contains {len(file_definitions)} definitions. Use get_code_definition to explore specific functions or classes."
-            else:
-                result["suggested_next_action"] = "This Python file has no definitions indexed. The file might be empty or contain only comments/docstrings."
+            await _ensure_indexed(state, [path])
+            with state.index_lock:
+                file_definitions = _definitions_by_file(state.ast_index, [path])[path]
+                _add_read_ast_info(state, path, result, file_definitions, bool(start_line or end_line))
     
     return result
 
+@mcp.tool
+async def read_files_tool(requests: List[Dict[str, Any]], ctx: Context = None) -> dict:
+    """
+    📚 Read several files or line ranges in one call (same output per item as read_file_with_lines_tool).
+    
+    Files are read concurrently and Python files are enriched with AST
+    information in a single pass over the index. A failing item (missing
+    file, invalid range, ...) does not fail the others.
+    
+    Args:
+        requests: List of reads, each {"path": str, "start_line": int (optional), "end_line": int (optional)}
+        
+    Returns:
+        Dictionary with one result per request (in request order) and success/failure counts
+        
+    Example:
+        read_files_tool(requests=[
+            {"path": "/project/src/models.py"},
+            {"path": "/project/src/server.py", "start_line": 120, "end_line": 180}
+        ])
+    """
+    try:
+        if not requests:
+            return {
+                "success": False,
+                "error": "ValidationError",
+                "message": "Give at least one read request."
+            }
+        
+        # Lecturas concurrentes en el pool de hilos del bucle de eventos
+        loop = asyncio.get_event_loop()
+        pending = {}
+        results: List[Optional[dict]] = [None] * len(requests)
+        for position, request in enumerate(requests):
+            path = request.get("path") if isinstance(request, dict) else None
+            if not path:
+                results[position] = {
+                    "success": False,
+                    "error": "ValidationError",
+                    "message": f"Request {position} has no path"
+                }
+                continue
+            pending[position] = loop.run_in_executor(
+                None, lambda r=request: read_file_with_lines(
+                    r["path"], r.get("start_line"), r.get("end_line"), include_plain=False))
+        for position, result in zip(pending, await asyncio.gather(*pending.values())):
+            results[position] = result
+        
+        # Enriquecimiento AST de todos los archivos Python en una sola pasada
+        state = getattr(mcp, 'project_state', None)
+        if state and state.ast_enabled and hasattr(state, 'ast_index'):
+            python_paths = list(dict.fromkeys(
+                requests[position]["path"] for position in pending
+                if results[position].get("success") and requests[position]["path"].endswith('.py')))
+            if python_paths:
+                await _ensure_indexed(state, python_paths)
+                with state.index_lock:
+                    definitions = _definitions_by_file(state.ast_index, python_paths)
+                    for position in pending:
+                        request = requests[position]
+                        if results[position].get("success") and request["path"] in definitions:
+                            _add_read_ast_info(state, request["path"], results[position],
+                                               definitions[request["path"]],
+                                               bool(request.get("start_line") or request.get("end_line")))
+        
+        for request, result in zip(requests, results):
+            if not result.get("success") and isinstance(request, dict) and request.get("path"):
+                result["file_path"] = request["path"]
+        
+        failed = sum(1 for result in results if not result.get("success"))
+        if ctx:
+            await ctx.info(f"Read {len(results) - failed}/{len(results)} files")
+        
+        return _add_index_status({
+            "success": True,
+            "total_requests": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "results": results
+        }, state)
+    
+    except Exception as e:
+        if ctx:
+            await ctx.error(f"Error reading files: {str(e)}")
+        return {
+            "success": False,
+            "error": type(e).__name__,
+            "message": str(e)
+        }
+
+def _definitions_by_file(ast_index: List[Dict], paths: List[str]) -> Dict[str, List[Dict]]:
+    """
+    Agrupa en una sola pasada por el índice las definiciones de varios archivos.
+    
+    Por cada ruta se usa la primera estrategia con resultados: ruta absoluta
+    normalizada, comparación directa de cadenas y, por último, solo el nombre
+    del archivo.
+    """
+    def _normalize(file_path: str) -> Optional[str]:
+        try:
+            return str(Path(file_path).resolve()).replace('\\', '/')
+        except (OSError, ValueError):
+            return None
+    
+    targets = {path: _normalize(path) for path in paths}
+    normalized_targets = set(targets.values()) - {None}
+    filenames = {Path(path).name for path in paths}
+    
+    by_normalized: Dict[str, List[Dict]] = {}
+    by_direct: Dict[str, List[Dict]] = {}
+    by_filename: Dict[str, List[Dict]] = {}
+    # Cada archivo del índice se normaliza una sola vez
+    normalized_files: Dict[str, Optional[str]] = {}
+    for d in ast_index:
+        d_file = d.get('file')
+        if not d_file:
+            continue
+        if d_file not in normalized_files:
+            normalized_files[d_file] = _normalize(d_file)
+        normalized = normalized_files[d_file]
+        if normalized in normalized_targets:
+            by_normalized.setdefault(normalized, []).append(d)
+        if d_file in targets:
+            by_direct.setdefault(d_file, []).append(d)
+        filename = Path(d_file).name
+        if filename in filenames:
+            by_filename.setdefault(filename, []).append(d)
+    
+    return {
+        path: (by_normalized.get(targets[path]) or by_direct.get(path) or by_filename.get(Path(path).name) or [])
+        for path in paths
+    }
+
+def _add_read_ast_info(state, path: str, result: dict, file_definitions: List[Dict], line_range: bool) -> None:
+    """Añade ast_info y suggested_next_action a la lectura de un archivo Python."""
+    # Always add ast_info for Python files when AST is enabled, even if empty
+    result["ast_info"] = {
+        "definitions_found": len(file_definitions),
+        "functions": [d["name"] for d in file_definitions if d.get("type") == "function"],
+        "classes": [d["name"] for d in file_definitions if d.get("type") == "class"],
+        "imports": [d["name"] for d in file_definitions if d.get("type") == "import"][:10]  # Limit to first 10
+    }
+    
+    # Definiciones que contienen o cruzan el rango leído
+    spans = None
+    if state.span_index is not None and line_range:
+        try:
+            spans = state.span_index.file_spans(str(Path(path).resolve()))
+        except (OSError, ValueError):
+            spans = None
+    if spans is not None:
+        first_line = result["line_range"]["start"]
+        last_line = result["line_range"]["end"]
+        enclosing = spans.enclosing(first_line)
+        result["ast_info"]["enclosing_definition"] = (
+            enclosing.get("qualified_name") or enclosing["name"]) if enclosing else None
+        result["ast_info"]["definitions_in_range"] = [
+            d.get("qualified_name") or d["name"] for d in spans.overlapping(first_line, last_line)]
+    if file_definitions:
+        result["suggested_next_action"] = f"This Python file contains {len(file_definitions)} definitions. Use get_code_definition to explore specific functions or classes."
+    else:
+        result["suggested_next_action"] = "This Python file has no definitions indexed. The file might be empty or contain only comments/docstrings."
+
 def _filter_library_warnings(warnings, indexed_libraries):
     """
     Filtra advertencias sobre definiciones que están disponibles en librerías indexadas.
@@ -671,34 +845,35 @@ def delete_file_tool(path: str, create_backup: bool = False) -> dict:
             if state and state.ast_enabled and hasattr(state, 'ast_index'):
                 from mcp_code_editor.tools.dependency_analyzer import DependencyAnalyzer
                 
-                # Encontrar definiciones en el archivo a eliminar
-                file_definitions = [d for d in state.ast_index if d.get('file') == path]
-                definitions_lost = [d.get('name', 'unknown') for d in file_definitions]
+                with state.index_lock:
+                    # Encontrar definiciones en el archivo a eliminar
+                    file_definitions = [d for d in state.ast_index if d.get('file') == path]
+                    definitions_lost = [d.get('name', 'unknown') for d in file_definitions]
                 
-                if file_definitions:
-                    analyzer = DependencyAnalyzer(state.ast_index)
+                    if file_definitions:
+                        analyzer = DependencyAnalyzer(state.ast_index, state)
                     
-                    # Analizar cada definición que se perderá
-                    for definition in file_definitions:
-                        def_name = definition.get('name', '')
-                        if def_name:
-                            # Buscar qué archivos usan esta definición
-                            callers = analyzer._find_affected_callers(path, [def_name])
+                        # Analizar cada definición que se perderá
+                        for definition in file_definitions:
+                            def_name = definition.get('name', '')
+                            if def_name:
+                                # Buscar qué archivos usan esta definición
+                                callers = analyzer._find_affected_callers(path, [def_name])
                             
-                            for caller in callers:
-                                caller_file = caller.get('file', '')
-                                if caller_file and caller_file not in affected_files:
-                                    affected_files.append(caller_file)
+                                for caller in callers:
+                                    caller_file = caller.get('file', '')
+                                    if caller_file and caller_file not in affected_files:
+                                        affected_files.append(caller_file)
                                 
-                                dependency_warnings.append({
-                                    "type": "lost_definition",
-                                    "severity": "high",
-                                    "definition": def_name,
-                                    "definition_type": definition.get('type', 'unknown'),
-                                    "used_in": caller_file,
-                                    "caller": caller.get('caller_name', 'unknown'),
-                                    "message": f"Definition '{def_name}' used in {caller_file} will be lost"
-                                })
+                                    dependency_warnings.append({
+                                        "type": "lost_definition",
+                                        "severity": "high",
+                                        "definition": def_name,
+                                        "definition_type": definition.get('type', 'unknown'),
+                                        "used_in": caller_file,
+                                        "caller": caller.get('caller_name', 'unknown'),
+                                        "message": f"Definition '{def_name}' used in {caller_file} will be lost"
+                                    })
         except Exception as e:
             logger.warning(f"Failed to analyze dependencies for {path}: {e}")
             dependency_warnings.append({
@@ -739,14 +914,16 @@ def delete_file_tool(path: str, create_backup: bool = False) -> dict:
                 for alt in library_alternatives
             ]
         
+        # Quitar las palabras del archivo del índice de tokens
+        if state and state.setup_complete:
+            refresh_token_index(state, path)
+        
         # Actualizar AST eliminando definiciones del archivo
-        if path.endswith(".py"):
+        if is_indexed_source(path):
             try:
                 state = getattr(mcp, 'project_state', None)
                 if state and state.ast_enabled and hasattr(state, 'ast_index'):
-                    original_count = len(state.ast_index)
-                    state.ast_index = [d for d in state.ast_index if d.get('file') != path]
-                    removed_count = original_count - len(state.ast_index)
+                    removed_count = refresh_file_index(state, path)["removed_definitions"]
                     if removed_count > 0:
                         logger.info(f"Removed {removed_count} definitions from AST index for {path}")
             except Exception as e:
@@ -755,15 +932,46 @@ def delete_file_tool(path: str, create_backup: bool = False) -> dict:
     return _clean_response(result)
 
 @mcp.tool
-async def setup_code_editor_tool(path: str, analyze_ast: bool = True, ctx: Context = None) -> dict:
-    """Setup code editor by analyzing project structure, .gitignore rules, and optionally AST."""
-    result = setup_code_editor_with_ast(path, analyze_ast)
+async def setup_code_editor_tool(path: str, analyze_ast: bool = True, background: bool = True,
+                                 sharded: bool = False, ctx: Context = None) -> dict:
+    """
+    Setup code editor by analyzing project structure, .gitignore rules, and optionally AST.
+    
+    With background=True (default) the AST index is built in the background:
+    the tool returns right after scanning the project, and queries are served
+    from the partial index (marked with "partial": true) until it is ready.
+    Use get_index_status_tool to follow the progress.
+    
+    With sharded=True (for monorepos) the index is split by top-level package
+    or directory and persisted under .mcp-code-editor/shards/. A shard is only
+    loaded when a query needs one of its files or names.
+    """
+    # Stop indexing of a previous setup
+    previous_state = getattr(mcp, 'project_state', None)
+    if previous_state and previous_state.indexer:
+        previous_state.indexer.stop()
+    if previous_state and previous_state.token_index:
+        previous_state.token_index.stop()
+    
+    # Los paquetes pueden haber cambiado desde el setup anterior
+    from mcp_code_editor.tools.ast_analyzer import clear_module_name_cache
+    clear_module_name_cache()
+    
+    result = setup_code_editor_with_ast(path, analyze_ast and not background and not sharded)
     
     # If setup was successful, store the state in the server
     if result.get("success"):
         # Store the project state in the server for later use
         from mcp_code_editor.tools.project_tools import ProjectState, GitIgnoreParser, build_file_tree
-        from mcp_code_editor.tools.ast_analyzer import build_ast_index
+        from mcp_code_editor.tools.ast_analyzer import build_ast_index, collect_source_files
+        from mcp_code_editor.tools.background_indexer import BackgroundIndexer
+        from mcp_code_editor.tools.reference_index import ReferenceIndex
+        from mcp_code_editor.tools.import_graph import ImportGraph
+        from mcp_code_editor.tools.call_graph import CallGraph
+        from mcp_code_editor.tools.fingerprint_index import FingerprintIndex
+        from mcp_code_editor.tools.shard_index import ShardManager
+        from mcp_code_editor.tools.token_index import TokenIndex, collect_text_files
+        from mcp_code_editor.tools.span_index import SpanIndex
         from pathlib import Path
         from datetime import datetime
         
@@ -786,13 +994,65 @@ async def setup_code_editor_tool(path: str, analyze_ast: bool = True, ctx: Conte
         state.file_tree = build_file_tree(state.project_root, gitignore_parser, state.exclude_dirs)
         state.total_files = result["summary"]["total_files"]
         
+        # Índice de tokens de todos los archivos de texto (prefiltro de búsquedas)
+        state.token_index = TokenIndex()
+        text_files = collect_text_files(state.project_root, state.file_tree)
+        if background or sharded:
+            state.token_index.start(text_files)
+        else:
+            state.token_index.build(text_files)
+        
         # Build AST index if requested
-        if analyze_ast and result.get("ast_analysis"):
-            state.ast_index = build_ast_index(state.project_root, state.file_tree)
+        if analyze_ast and sharded:
+            state.reference_index = ReferenceIndex()
+            state.call_graph = CallGraph()
+            state.fingerprint_index = FingerprintIndex()
+            state.import_graph = ImportGraph()
+            state.span_index = SpanIndex()
+            state.ast_index = []
+            state.shards = ShardManager(state, collect_source_files(state.project_root, state.file_tree))
+            state.ast_enabled = True
+            
+            shard_status = state.shards.get_status()
+            result["ast_analysis"] = {"status": "sharded", **shard_status}
+            result["message"] += (f" AST index split into {shard_status['total_shards']} shards, "
+                                  f"loaded on demand.")
+            await ctx.info(f"Project setup complete: {state.total_files} files, "
+                           f"{shard_status['total_shards']} index shards")
+        elif analyze_ast and background:
+            state.reference_index = ReferenceIndex()
+            state.call_graph = CallGraph()
+            state.fingerprint_index = FingerprintIndex()
+            state.import_graph = ImportGraph()
+            state.span_index = SpanIndex()
+            state.ast_index = []
+            state.indexer = BackgroundIndexer(state, collect_source_files(state.project_root, state.file_tree))
+            state.ast_enabled = True
+            state.indexer.start()
+            
+            result["ast_analysis"] = {"status": "indexing", **state.indexer.get_status()}
+            result["message"] += f" AST indexing {state.indexer.total_files} Python files in the background."
+            await ctx.info(f"Project setup complete: {state.total_files} files, AST indexing started in the background")
+        elif analyze_ast and result.get("ast_analysis"):
+            state.reference_index = ReferenceIndex()
+            state.call_graph = CallGraph()
+            state.fingerprint_index = FingerprintIndex()
+            state.ast_index = build_ast_index(state.project_root, state.file_tree,
+                                              reference_index=state.reference_index,
+                                              call_graph=state.call_graph,
+                                              spans=state.statement_spans,
+                                              fingerprint_index=state.fingerprint_index)
+            state.import_graph = ImportGraph(state.ast_index)
+            state.span_index = SpanIndex(state.ast_index)
             state.ast_enabled = True
             await ctx.info(f"Project setup complete: {state.total_files} files, {len(state.ast_index)} definitions indexed")
         else:
             state.ast_enabled = False
+            state.reference_index = None
+            state.import_graph = None
+            state.call_graph = None
+            state.fingerprint_index = None
+            state.span_index = None
             await ctx.info(f"Project setup complete: {state.total_files} files indexed (AST disabled)")
         
         # Store in server instance (persists across all tool calls)
@@ -834,16 +1094,168 @@ async def project_files_tool(
             "message": str(e)
         }
 
-def _find_identifier_usage(identifier: str, ast_index: List[Dict], definition_files: List[str]) -> List[Dict]:
+@mcp.tool
+async def search_text_tool(
+    query: str,
+    regex: bool = False,
+    whole_word: bool = False,
+    case_sensitive: bool = True,
+    file_extensions: list = None,
+    max_results: int = 100,
+    ctx: Context = None
+) -> dict:
+    """
+    Search the text of all project files (any language, docs and config included), grep style.
+
+    Literal searches only read the files that contain every whole word of the
+    query, according to the identifier token index built during setup.
+
+    Args:
+        query: Text to search for (a regular expression if regex=True)
+        regex: Interpret the query as a Python regular expression (scans every file)
+        whole_word: Only match the query between word boundaries
+        case_sensitive: Whether the search is case-sensitive
+        file_extensions: Optional list of file extensions to search (e.g., [".py", ".md"])
+        max_results: Maximum number of matching lines returned
+
+    Returns:
+        Dictionary with the matching lines (file, line, text) and the number of files scanned
+    """
+    try:
+        state = getattr(mcp, 'project_state', None)
+
+        if not state or not state.setup_complete:
+            return {
+                "success": False,
+                "error": "ProjectNotSetup",
+                "message": "Project not setup. Please run setup_code_editor_tool first."
+            }
+
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(None, lambda: search_project_text(
+            state, query, regex, whole_word, case_sensitive, file_extensions, max_results))
+        if state.token_index is not None:
+            result["token_index"] = state.token_index.get_stats()
+
+        await ctx.info(f"Found {result['total_matches']} matching lines in "
+                       f"{result['files_scanned']}/{result['files_total']} scanned files")
+
+        return result
+
+    except Exception as e:
+        await ctx.error(f"Error searching project text: {str(e)}")
+        return {
+            "success": False,
+            "error": type(e).__name__,
+            "message": str(e)
+        }
+
+# context_name, context_type y confidence para cada kind del índice de referencias
+_USAGE_KINDS = {
+    "call": ("function_call", "call", "high"),
+    "import": ("import", "import", "high"),
+    "module_import": ("import", "import", "high"),
+    "name": ("name_reference", "name", "medium"),
+    "attribute": ("attribute_reference", "attribute", "high"),
+}
+
+def _get_surrounding_context(content: str, line_number: int, context_lines: int = 1) -> str:
+    """Obtiene el contexto alrededor de una línea específica."""
+    lines = content.splitlines()
+    start = max(0, line_number - context_lines - 1)
+    end = min(len(lines), line_number + context_lines)
+    
+    context_lines_content = lines[start:end]
+    return ' | '.join(context_lines_content).strip()
+
+def _add_enclosing_definitions(usage_locations: List[Dict], span_index) -> None:
+    """Agrega a cada uso la función o clase que lo contiene (según el índice de spans)."""
+    if span_index is None:
+        return
+    for usage in usage_locations:
+        definition = span_index.enclosing(usage["file"], usage["line"])
+        if definition is not None:
+            usage["enclosing_definition"] = definition.get("qualified_name") or definition["name"]
+            usage["enclosing_type"] = definition["type"]
+
+def _find_indexed_usage(identifier: str, reference_index, normalized_def_files: set,
+                        candidate_files=None) -> List[Dict]:
+    """
+    Encuentra usos de un identificador consultando el índice de referencias.
+    
+    Solo se leen los archivos de los usos finalmente devueltos (para el contexto).
+    """
+    usage_locations = []
+    seen = set()
+    
+    for ref in reference_index.lookup(identifier):
+        file_path = ref["file"]
+        if candidate_files is not None and file_path not in candidate_files:
+            continue
+        try:
+            normalized_file = str(Path(file_path).resolve()).replace('\\', '/')
+        except (OSError, ValueError):
+            normalized_file = file_path
+        
+        # Skip archivos donde está definido el identificador
+        if normalized_file in normalized_def_files:
+            continue
+        
+        # Eliminar duplicados basados en archivo + línea
+        key = (file_path, ref["line"])
+        if key in seen:
+            continue
+        seen.add(key)
+        
+        context_name, context_type, confidence = _USAGE_KINDS[ref["kind"]]
+        usage_locations.append({
+            "file": file_path,
+            "line": ref["line"],
+            "context_name": context_name,
+            "context_type": context_type,
+            "confidence": confidence
+        })
+    
+    # Ordenar por archivo y línea, limitar resultados para evitar spam
+    usage_locations.sort(key=lambda x: (x["file"], x["line"]))
+    usage_locations = usage_locations[:50]
+    
+    # Agregar contexto leyendo cada archivo una sola vez
+    file_contents = {}
+    for usage in usage_locations:
+        if usage["context_type"] == "import":
+            usage["usage_context"] = f"Import: {identifier}"
+            continue
+        file_path = usage["file"]
+        if file_path not in file_contents:
+            try:
+                file_contents[file_path] = file_cache.read_text(file_path)
+            except (OSError, UnicodeDecodeError) as e:
+                logging.warning(f"Error reading {file_path} for usage of '{identifier}': {e}")
+                file_contents[file_path] = ""
+        usage["usage_context"] = _get_surrounding_context(file_contents[file_path], usage["line"])
+    
+    return usage_locations
+
+def _find_identifier_usage(identifier: str, ast_index: List[Dict], definition_files: List[str],
+                           reference_index=None, candidate_files=None, token_index=None,
+                           span_index=None) -> List[Dict]:
     """
     Encuentra dónde se usa un identificador en el código mediante análisis AST real.
     
     CORREGIDO: Ahora analiza el código fuente real de los archivos en lugar de solo metadatos.
+    Si hay un índice de referencias disponible, la búsqueda es una consulta al índice.
     
     Args:
         identifier: Nombre del identificador a buscar
         ast_index: Índice AST completo del proyecto
         definition_files: Archivos donde se define el identificador (para excluir)
+        reference_index: ReferenceIndex opcional construido durante la indexación
+        candidate_files: Archivos que pueden ver el identificador (importadores
+                         transitivos del módulo que lo define); None para todos
+        token_index: TokenIndex opcional; sin índice de referencias, solo se
+                     analizan los archivos que contienen el identificador
+        span_index: SpanIndex opcional para indicar la definición que contiene cada uso
         
     Returns:
         Lista de ubicaciones donde se usa el identificador
@@ -862,13 +1274,23 @@ def _find_identifier_usage(identifier: str, ast_index: List[Dict], definition_fi
         except (OSError, ValueError):
             normalized_def_files.add(def_file)
     
+    if reference_index is not None:
+        usage_locations = _find_indexed_usage(identifier, reference_index, normalized_def_files, candidate_files)
+        _add_enclosing_definitions(usage_locations, span_index)
+        return usage_locations
+    
     # Obtener lista única de archivos para analizar
     files_to_analyze = set()
     for definition in ast_index:
         file_path = definition.get("file", "")
-        if file_path:
+        if file_path and (candidate_files is None or file_path in candidate_files):
             files_to_analyze.add(file_path)
     
+    # Descartar los archivos que no contienen el identificador como token
+    token_files = token_index.candidate_files([identifier]) if token_index is not None else None
+    if token_files is not None:
+        files_to_analyze &= token_files
+    
     # Funciones auxiliares para análisis AST (copiadas de dependency_analyzer.py)
     def _is_function_call(node: ast.Call, function_name: str) -> bool:
         """Verifica si un nodo Call es una llamada a la función especificada."""
@@ -886,15 +1308,6 @@ def _find_identifier_usage(identifier: str, ast_index: List[Dict], definition_fi
                     return True
         return False
     
-    def _get_surrounding_context(content: str, line_number: int, context_lines: int = 1) -> str:
-        """Obtiene el contexto alrededor de una línea específica."""
-        lines = content.splitlines()
-        start = max(0, line_number - context_lines - 1)
-        end = min(len(lines), line_number + context_lines)
-        
-        context_lines_content = lines[start:end]
-        return ' | '.join(context_lines_content).strip()
-    
     # Analizar cada archivo con AST real
     for file_path in files_to_analyze:
         try:
@@ -915,8 +1328,7 @@ def _find_identifier_usage(identifier: str, ast_index: List[Dict], definition_fi
             processed_files.add(normalized_file)
             
             # NUEVO: Leer y analizar el código fuente real
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = file_cache.read_text(file_path)
             
             tree = ast.parse(content)
             
@@ -998,7 +1410,9 @@ def _find_identifier_usage(identifier: str, ast_index: List[Dict], definition_fi
     unique_usages.sort(key=lambda x: (x["file"], x["line"]))
     
     # Limitar resultados para evitar spam
-    return unique_usages[:50]  # Top 50 usos (aumentado desde 20)
+    unique_usages = unique_usages[:50]  # Top 50 usos (aumentado desde 20)
+    _add_enclosing_definitions(unique_usages, span_index)
+    return unique_usages
 
 
 @mcp.tool
@@ -1007,6 +1421,7 @@ async def get_code_definition(
     context_file: str = None,
     definition_type: str = "any",
     include_usage: bool = False,
+    match_mode: str = "prefix",
     ctx: Context = None
 ) -> dict:
     """
@@ -1025,10 +1440,15 @@ async def get_code_definition(
     • Code exploration and navigation
     
     Args:
-        identifier: Name of function/class/variable to find (e.g., "calculate_total")
+        identifier: Name of function/class/variable to find (e.g., "calculate_total"), or a
+                    qualified name for an exact lookup (e.g., "Order.calculate_total",
+                    "shop.orders.Order.calculate_total")
         context_file: Optional file path to prioritize results from specific file
         definition_type: Filter by type - "function", "class", "variable", "import", or "any"
         include_usage: Set to True to always include usage analysis (default: auto-enabled when definitions found)
+        match_mode: How names are matched - "prefix" (exact or starts with), "substring",
+                    or "fuzzy" (substring plus camelCase/snake_case matching, e.g. "gcd"
+                    or "getDef" for get_code_definition)
         
     Returns:
         Dictionary containing:
@@ -1064,131 +1484,156 @@ async def get_code_definition(
                 "message": "AST analysis not enabled. Run setup with analyze_ast=True."
             }
         
-        # Search for definitions in project AST
-        matches = search_definitions(
-            identifier, 
-            state.ast_index, 
-            definition_type, 
-            context_file
-        )
-        
-        # NUEVO: Also search in indexed libraries
-        library_matches = []
-        for lib_name, lib_data in state.indexed_libraries.items():
-            if "definitions" in lib_data:
-                for lib_def in lib_data["definitions"]:
-                    if definition_type != "any" and lib_def.get("type") != definition_type:
-                        continue
-                    
-                    name = lib_def.get("name", "").lower()
-                    identifier_lower = identifier.lower()
-                    
-                    if identifier_lower in name:
-                        # Calculate relevance score
-                        score = 0
-                        if name == identifier_lower:
-                            score = 100
-                        elif name.startswith(identifier_lower):
-                            score = 50
-                        else:
-                            score = 10
-                        
-                        # Add library context
-                        lib_match = lib_def.copy()
-                        lib_match["relevance_score"] = score
-                        lib_match["source"] = "external_library"
-                        lib_match["library_name"] = lib_name
-                        library_matches.append(lib_match)
-        
-        # Sort library matches by relevance
-        library_matches.sort(key=lambda x: x.get("relevance_score", 0), reverse=True)
-        
-        # Combine project and library matches (prioritize project matches)
-        all_matches = matches + library_matches[:5]  # Limit library matches to 5
-        
-        if not all_matches:
-            # No definitions found, but still search for usages if requested
-            usage_locations = []
-            if include_usage:
-                usage_locations = _find_identifier_usage(identifier, state.ast_index, [])
+        # Sharded index: load the shards that define (or use) the identifier
+        await _load_shards(state, "ensure_defining", identifier, match_mode)
+        if context_file:
+            await _load_shards(state, "ensure_files", [context_file])
+        if include_usage:
+            await _load_shards(state, "ensure_referencing", identifier)
+        
+        # During background indexing, index the files this query most likely needs first
+        if state.indexer and not state.indexer.ready:
+            state.indexer.prioritize_matching(identifier)
+            await _ensure_indexed(state, [context_file])
+        
+        with state.index_lock:
+            # Search for definitions in project AST
+            matches = search_definitions(
+                identifier, 
+                state.ast_index, 
+                definition_type, 
+                context_file,
+                match_mode=match_mode,
+                limit=10,  # Only the top 10 results are returned below
+                generation=state.index_generation
+            )
+        
+            # NUEVO: Also search in indexed libraries (trigram index per library, top 5 overall)
+            from mcp_code_editor.tools.symbol_index import get_symbol_index
+            library_mode = "fuzzy" if match_mode == "fuzzy" else "substring"
+            library_ranked = []
+            for lib_name, lib_data in state.indexed_libraries.items():
+                if "definitions" in lib_data:
+                    lib_index = get_symbol_index(lib_data["definitions"], cache_key=f"library:{lib_name}")
+                    for score, lib_def in lib_index.search(
+                            identifier, limit=5, match_mode=library_mode,
+                            predicate=lambda d: definition_type == "any" or d.get("type") == definition_type):
+                        library_ranked.append((score, lib_name, lib_def))
+        
+            library_matches = []
+            for score, lib_name, lib_def in heapq.nlargest(5, library_ranked, key=lambda item: item[0]):
+                # Add library context
+                lib_match = lib_def.copy()
+                lib_match["relevance_score"] = score
+                lib_match["source"] = "external_library"
+                lib_match["library_name"] = lib_name
+                library_matches.append(lib_match)
+        
+            # Combine project and library matches (prioritize project matches)
+            all_matches = matches + library_matches
+        
+            # Los usos se buscan por el nombre corto: "Foo.bar" se usa como "bar"
+            usage_name = identifier
+            if "." in identifier.strip("."):
+                usage_name = matches[0]["name"] if matches else identifier.split(".")[-1]
+        
+            if not all_matches:
+                # No definitions found, but still search for usages if requested
+                usage_locations = []
+                if include_usage:
+                    usage_locations = _find_identifier_usage(usage_name, state.ast_index, [],
+                                                             state.reference_index,
+                                                             token_index=state.token_index,
+                                                             span_index=state.span_index)
             
-            return {
-                "success": True,
-                "found": False,
-                "message": f"No definitions found for '{identifier}'",
-                "identifier": identifier,
-                "usage_locations": usage_locations,
-                "total_usages": len(usage_locations),
-                "suggested_next_action": f"No definitions found for '{identifier}'. Found {len(usage_locations)} potential usages." if usage_locations else f"No definitions or usages found for '{identifier}'. Check spelling or search with definition_type='any' for broader results.",
-                "search_criteria": {
-                    "type": definition_type,
-                    "context_file": context_file,
-                    "include_usage": include_usage
+                return _add_index_status({
+                    "success": True,
+                    "found": False,
+                    "message": f"No definitions found for '{identifier}'",
+                    "identifier": identifier,
+                    "usage_locations": usage_locations,
+                    "total_usages": len(usage_locations),
+                    "suggested_next_action": f"No definitions found for '{identifier}'. Found {len(usage_locations)} potential usages." if usage_locations else f"No definitions or usages found for '{identifier}'. Check spelling or search with definition_type='any' for broader results.",
+                    "search_criteria": {
+                        "type": definition_type,
+                        "context_file": context_file,
+                        "include_usage": include_usage,
+                        "match_mode": match_mode
+                    }
+                }, state)
+        
+            # Prepare results
+            definitions = []
+            for match in all_matches[:10]:  # Limit to top 10 results from both sources
+                definition = {
+                    "name": match["name"],
+                    "type": match["type"],
+                    "file": match.get("file", match.get("library_name", "")),
+                    "relevance_score": match.get("relevance_score", 0)
                 }
-            }
-        
-        # Prepare results
-        definitions = []
-        for match in all_matches[:10]:  # Limit to top 10 results from both sources
-            definition = {
-                "name": match["name"],
-                "type": match["type"],
-                "file": match.get("file", match.get("library_name", "")),
-                "relevance_score": match.get("relevance_score", 0)
-            }
             
-            # Add source information (project vs library)
-            if match.get("source") == "external_library":
-                definition["source"] = "external_library"
-                definition["library_name"] = match.get("library_name")
-                definition["module_path"] = match.get("module_path")
-            else:
-                definition["source"] = "project"
+                # Add source information (project vs library)
+                if match.get("source") == "external_library":
+                    definition["source"] = "external_library"
+                    definition["library_name"] = match.get("library_name")
+                    definition["module_path"] = match.get("module_path")
+                else:
+                    definition["source"] = "project"
+                    definition["qualified_name"] = match.get("qualified_name")
             
-            # Add type-specific information
-            if match["type"] == "function":
-                definition.update({
-                    "signature": match.get("signature", ""),
-                    "line_start": match.get("line_start"),
-                    "line_end": match.get("line_end"),
-                    "is_async": match.get("is_async", False),
-                    "args": match.get("args", []),
-                    "docstring": match.get("docstring"),
-                    "decorators": match.get("decorators", [])
-                })
+                # Add type-specific information
+                if match["type"] == "function":
+                    definition.update({
+                        "signature": match.get("signature", ""),
+                        "line_start": match.get("line_start"),
+                        "line_end": match.get("line_end"),
+                        "is_async": match.get("is_async", False),
+                        "args": match.get("args", []),
+                        "docstring": get_definition_docstring(match),
+                        "decorators": match.get("decorators", [])
+                    })
             
-            elif match["type"] == "class":
-                definition.update({
-                    "line_start": match.get("line_start"),
-                    "line_end": match.get("line_end"),
-                    "methods": match.get("methods", []),
-                    "inheritance": match.get("inheritance", []),
-                    "docstring": match.get("docstring"),
-                    "decorators": match.get("decorators", [])
-                })
+                elif match["type"] == "class":
+                    definition.update({
+                        "line_start": match.get("line_start"),
+                        "line_end": match.get("line_end"),
+                        "methods": match.get("methods", []),
+                        "inheritance": match.get("inheritance", []),
+                        "docstring": get_definition_docstring(match),
+                        "decorators": match.get("decorators", [])
+                    })
             
-            elif match["type"] == "import":
-                definition.update({
-                    "line": match.get("line"),
-                    "module": match.get("module"),
-                    "import_type": match.get("import_type"),
-                    "from_name": match.get("from_name"),
-                    "alias": match.get("alias")
-                })
+                elif match["type"] == "import":
+                    definition.update({
+                        "line": match.get("line"),
+                        "module": match.get("module"),
+                        "import_type": match.get("import_type"),
+                        "from_name": match.get("from_name"),
+                        "alias": match.get("alias")
+                    })
             
-            elif match["type"] == "variable":
-                definition.update({
-                    "line": match.get("line"),
-                    "value_type": match.get("value_type"),
-                    "is_constant": match.get("is_constant", False)
-                })
+                elif match["type"] == "variable":
+                    definition.update({
+                        "line": match.get("line"),
+                        "value_type": match.get("value_type"),
+                        "is_constant": match.get("is_constant", False)
+                    })
             
-            definitions.append(definition)
+                definitions.append(definition)
         
-        # NUEVO: Buscar usos/referencias del identificador si se solicita o hay definiciones
-        usage_locations = []
-        if include_usage or definitions:
-            usage_locations = _find_identifier_usage(identifier, state.ast_index, [d["file"] for d in definitions])
+            # NUEVO: Buscar usos/referencias del identificador si se solicita o hay definiciones
+            usage_locations = []
+            if include_usage or definitions:
+                # Limitar la búsqueda a los importadores del módulo que define el identificador
+                candidate_files = None
+                exact_matches = [m for m in matches if m["name"] == usage_name]
+                library_exact = any(m["name"] == usage_name for m in library_matches)
+                if state.import_graph is not None and exact_matches and not library_exact:
+                    candidate_files = state.import_graph.visible_files(exact_matches)
+            
+                usage_locations = _find_identifier_usage(usage_name, state.ast_index, [d["file"] for d in definitions],
+                                                         state.reference_index, candidate_files,
+                                                         state.token_index, state.span_index)
         
         result = {
             "success": True,
@@ -1203,7 +1648,8 @@ async def get_code_definition(
             "search_criteria": {
                 "type": definition_type,
                 "context_file": context_file,
-                "include_usage": include_usage
+                "include_usage": include_usage,
+                "match_mode": match_mode
             }
         }
         
@@ -1218,7 +1664,7 @@ async def get_code_definition(
         
         # All processing complete - clean empty fields
         
-        return _clean_response(result)
+        return _clean_response(_add_index_status(result, state))
         
     except Exception as e:
         await ctx.error(f"Error searching for definition '{identifier}': {str(e)}")
@@ -1230,6 +1676,757 @@ async def get_code_definition(
         }
 
 
+# Partes de una definición que puede devolver read_definition_tool
+_DEFINITION_PARTS = ("full", "signature", "docstring")
+
+@mcp.tool
+async def read_definition_tool(
+    name: str,
+    context_file: str = None,
+    definition_type: str = "any",
+    part: str = "full",
+    include_decorators: bool = False,
+    ctx: Context = None
+) -> dict:
+    """
+    📖 Read the exact source of a function or class by name, with line numbers ready for apply_diff_tool.
+    
+    Replaces the get_code_definition + read_file_with_lines_tool round-trip:
+    the definition's line span comes from the index and its lines from the
+    shared file cache.
+    
+    Args:
+        name: Function or class name (e.g., "calculate_total"), or a qualified name
+              (e.g., "Order.calculate_total", "shop.orders.Order.calculate_total")
+        context_file: Optional file path to prefer when several definitions match
+        definition_type: "function", "class" or "any"
+        part: "full" (whole definition), "signature" (def/class header only) or
+              "docstring" (cleaned docstring text only)
+        include_decorators: Start the source at the first decorator line
+        
+    Returns:
+        Dictionary with the definition (name, qualified_name, type, file), its
+        line_range and content_with_numbers (or docstring), plus the qualified
+        names of other definitions with the same name
+    """
+    try:
+        state = getattr(mcp, 'project_state', None)
+        
+        if not state or not state.setup_complete:
+            return {
+                "success": False,
+                "error": "ProjectNotSetup",
+                "message": "Project not setup. Please run setup_code_editor_tool first."
+            }
+        
+        if not state.ast_enabled:
+            return {
+                "success": False,
+                "error": "ASTNotEnabled",
+                "message": "AST analysis not enabled. Run setup with analyze_ast=True."
+            }
+        
+        if part not in _DEFINITION_PARTS:
+            return {
+                "success": False,
+                "error": "ValidationError",
+                "message": f"part must be one of {', '.join(_DEFINITION_PARTS)}, got '{part}'"
+            }
+        
+        await _load_shards(state, "ensure_defining", name, "prefix")
+        if context_file:
+            await _load_shards(state, "ensure_files", [context_file])
+        if state.indexer and not state.indexer.ready:
+            state.indexer.prioritize_matching(name)
+            await _ensure_indexed(state, [context_file])
+        
+        # Solo coincidencias exactas del nombre o, para nombres con puntos, de un
+        # sufijo del nombre calificado (ambas sin distinguir mayúsculas)
+        with state.index_lock:
+            found = search_definitions(name, state.ast_index, definition_type, context_file,
+                                       match_mode="exact", limit=20, generation=state.index_generation)
+        matches = [match for match in found if match["type"] in ("function", "class")]
+        # Con la misma relevancia, primero las que respetan mayúsculas
+        short_name = name.rsplit(".", 1)[-1]
+        matches.sort(key=lambda match: (-match["relevance_score"], match["name"] != short_name))
+        
+        if not matches:
+            return _add_index_status({
+                "success": False,
+                "error": "DefinitionNotFound",
+                "message": f"No function or class named '{name}' found. Use get_code_definition with "
+                           f"match_mode='fuzzy' to search similar names."
+            }, state)
+        
+        match = matches[0]
+        result = {
+            "success": True,
+            "name": match["name"],
+            "qualified_name": match.get("qualified_name"),
+            "type": match["type"],
+            "file": match["file"],
+            "part": part,
+            "other_matches": [other.get("qualified_name") or other["name"] for other in matches[1:]]
+        }
+        
+        if part == "docstring":
+            result["line_range"] = {"start": match.get("line_start"), "end": match.get("line_end")}
+            result["docstring"] = get_definition_docstring(match)
+            if result["docstring"] is None:
+                result["message"] = f"{match['type'].capitalize()} '{name}' has no docstring"
+            return _clean_response(_add_index_status(result, state))
+        
+        loop = asyncio.get_event_loop()
+        content = await loop.run_in_executor(None, file_cache.read_text, match["file"])
+        lines = content.splitlines(keepends=True)
+        line_range = get_definition_lines(match, lines, part, include_decorators)
+        if line_range is None:
+            return _add_index_status({
+                "success": False,
+                "error": "DefinitionNotFound",
+                "message": f"'{name}' is no longer defined in {match['file']}. Run setup_code_editor_tool "
+                           f"to refresh the index."
+            }, state)
+        
+        first_line, last_line = line_range
+        result["line_range"] = {"start": first_line, "end": last_line}
+        numbered_lines = []
+        for line_number in range(first_line, last_line + 1):
+            line_content = lines[line_number - 1].rstrip('\n\r')
+            numbered_lines.append(f"{line_number:4d}: {line_content}")
+        result["content_with_numbers"] = '\n'.join(numbered_lines)
+        
+        if ctx:
+            await ctx.info(f"Read {match['type']} '{result['qualified_name'] or name}' "
+                           f"(lines {first_line}-{last_line})")
+        
+        return _clean_response(_add_index_status(result, state))
+        
+    except Exception as e:
+        if ctx:
+            await ctx.error(f"Error reading definition '{name}': {str(e)}")
+        return {
+            "success": False,
+            "error": type(e).__name__,
+            "message": str(e),
+            "name": name
+        }
+
+
+@mcp.tool
+async def get_index_status_tool(ctx: Context = None) -> dict:
+    """
+    Get the readiness and progress of the AST index.
+    
+    Returns:
+        Dictionary with ready flag, indexed/total files, progress percentage,
+        number of definitions and elapsed indexing time
+    """
+    state = getattr(mcp, 'project_state', None)
+    
+    if not state or not state.setup_complete:
+        return {
+            "success": False,
+            "error": "ProjectNotSetup",
+            "message": "Project not setup. Please run setup_code_editor_tool first."
+        }
+    
+    if not state.ast_enabled:
+        return {
+            "success": False,
+            "error": "ASTNotEnabled",
+            "message": "AST analysis not enabled. Run setup with analyze_ast=True."
+        }
+    
+    if state.shards is not None:
+        status = state.shards.get_status()
+        loaded = len(status["loaded_shards"])
+        return {
+            "success": True,
+            "message": f"Sharded AST index: {loaded}/{status['total_shards']} shards loaded "
+                       f"({status['indexed_files']}/{status['total_files']} files)",
+            **status
+        }
+    
+    if state.indexer is None:
+        # Index built synchronously during setup
+        return {
+            "success": True,
+            "ready": True,
+            "definitions": len(state.ast_index)
+        }
+    
+    status = state.indexer.get_status()
+    if status["ready"]:
+        message = f"AST index ready: {status['definitions']} definitions from {status['total_files']} files"
+    else:
+        message = (f"AST indexing in progress: {status['indexed_files']}/{status['total_files']} files "
+                   f"({status['progress_percent']}%). Queries return partial results meanwhile.")
+    
+    return {"success": True, "message": message, **status}
+
+
+@mcp.tool
+async def export_index_tool(output_path: str = None, ctx: Context = None) -> dict:
+    """
+    Export the AST index to a compressed, versioned file keyed by commit SHA.
+
+    The file can be imported by another server instance (e.g. from CI) with
+    import_index_tool, which re-indexes only the files that differ locally.
+
+    Args:
+        output_path: Destination file (default: .mcp-code-editor/index-<commit>.jsonl.gz)
+
+    Returns:
+        Dictionary with the export path, commit, files and definitions exported
+    """
+    state = getattr(mcp, 'project_state', None)
+
+    if not state or not state.setup_complete:
+        return {
+            "success": False,
+            "error": "ProjectNotSetup",
+            "message": "Project not setup. Please run setup_code_editor_tool first."
+        }
+
+    if not state.ast_enabled:
+        return {
+            "success": False,
+            "error": "ASTNotEnabled",
+            "message": "AST analysis not enabled. Run setup with analyze_ast=True."
+        }
+
+    try:
+        from mcp_code_editor.tools.index_export import export_index
+        result = export_index(state, output_path)
+        if result.get("success"):
+            await ctx.info(f"Exported AST index: {result['files']} files, {result['definitions']} definitions")
+        return result
+    except Exception as e:
+        await ctx.error(f"Error exporting index: {str(e)}")
+        return {
+            "success": False,
+            "error": type(e).__name__,
+            "message": str(e)
+        }
+
+
+@mcp.tool
+async def import_index_tool(input_path: str = None, ctx: Context = None) -> dict:
+    """
+    Import an AST index exported by export_index_tool, possibly on another machine.
+
+    Files whose content matches the export are loaded directly; files that
+    differ locally or are not in the export are re-indexed in the background.
+
+    Args:
+        input_path: Exported index (default: the index of the checked-out commit)
+
+    Returns:
+        Dictionary with imported and re-indexed file counts
+    """
+    state = getattr(mcp, 'project_state', None)
+
+    if not state or not state.setup_complete:
+        return {
+            "success": False,
+            "error": "ProjectNotSetup",
+            "message": "Project not setup. Please run setup_code_editor_tool first."
+        }
+
+    try:
+        from mcp_code_editor.tools.index_export import import_index
+        result = import_index(state, input_path)
+        if result.get("success"):
+            if result["commit"] != result["local_commit"]:
+                result["warning"] = (f"Index built from commit {result['commit']}, "
+                                     f"local checkout is {result['local_commit']}")
+            await ctx.info(f"Imported AST index: {result['imported_files']} files loaded, "
+                           f"{result['reindexed_files']} re-indexing in the background")
+        return result
+    except Exception as e:
+        await ctx.error(f"Error importing index: {str(e)}")
+        return {
+            "success": False,
+            "error": type(e).__name__,
+            "message": str(e)
+        }
+
+
+@mcp.tool
+async def get_module_imports_tool(
+    path: str,
+    transitive: bool = False,
+    max_depth: int = None,
+    ctx: Context = None
+) -> dict:
+    """
+    Query the module import graph of the project for a Python file.
+    
+    Args:
+        path: Python file to inspect
+        transitive: Include modules reached through other modules, not only direct imports
+        max_depth: Optional depth limit for transitive queries
+        
+    Returns:
+        Dictionary with:
+        - module: Importable module name of the file
+        - importers: Project files that import this file
+        - importees: Project files imported by this file
+        - external_imports: Imported modules that are not part of the project
+    """
+    try:
+        state = getattr(mcp, 'project_state', None)
+        
+        if not state or not state.setup_complete:
+            return {
+                "success": False,
+                "error": "ProjectNotSetup",
+                "message": "Project not setup. Please run setup_code_editor_tool first."
+            }
+        
+        if not state.ast_enabled or state.import_graph is None:
+            return {
+                "success": False,
+                "error": "ASTNotEnabled",
+                "message": "AST analysis not enabled. Run setup with analyze_ast=True."
+            }
+        
+        await _ensure_indexed(state, [path])
+        await _load_shards(state, "ensure_importers", [path])
+        
+        with state.index_lock:
+            graph = state.import_graph
+            file_path = str(Path(path).resolve())
+            if graph.module_name(file_path) is None:
+                return {
+                    "success": False,
+                    "error": "FileNotIndexed",
+                    "message": f"{path} is not an indexed Python file of the project."
+                }
+        
+            if transitive:
+                importers = graph.transitive_importers(file_path, max_depth)
+                importees = graph.transitive_importees(file_path, max_depth)
+            else:
+                importers = graph.importers(file_path)
+                importees = graph.importees(file_path)
+        
+            result = {
+                "success": True,
+                "file": file_path,
+                "module": graph.module_name(file_path),
+                "transitive": transitive,
+                "importers": sorted(importers),
+                "importees": sorted(importees),
+                "external_imports": sorted(graph.external_imports(file_path)),
+                "total_importers": len(importers),
+                "total_importees": len(importees)
+            }
+        
+        await ctx.info(f"Import graph for {path}: {len(importers)} importers, {len(importees)} importees")
+        
+        return _clean_response(_add_index_status(result, state))
+        
+    except Exception as e:
+        await ctx.error(f"Error querying import graph for '{path}': {str(e)}")
+        return {
+            "success": False,
+            "error": type(e).__name__,
+            "message": str(e)
+        }
+
+
+@mcp.tool
+async def get_class_hierarchy_tool(
+    class_name: str,
+    transitive: bool = True,
+    ctx: Context = None
+) -> dict:
+    """
+    Show the inheritance hierarchy of a project class.
+    
+    Args:
+        class_name: Class name or qualified name (e.g., "Base", "shop.models.Base")
+        transitive: Include indirect subclasses and ancestors, not only direct ones
+        
+    Returns:
+        Dictionary with one entry per matching class, including its resolved
+        bases, ancestors and subclasses (with file, line and inheritance depth)
+    """
+    try:
+        from mcp_code_editor.tools.class_hierarchy import get_class_hierarchy
+        
+        state = getattr(mcp, 'project_state', None)
+        
+        if not state or not state.setup_complete:
+            return {
+                "success": False,
+                "error": "ProjectNotSetup",
+                "message": "Project not setup. Please run setup_code_editor_tool first."
+            }
+        
+        if not state.ast_enabled:
+            return {
+                "success": False,
+                "error": "ASTNotEnabled",
+                "message": "AST analysis not enabled. Run setup with analyze_ast=True."
+            }
+        
+        await _load_shards(state, "ensure_class_hierarchy", class_name)
+        with state.index_lock:
+            hierarchy = get_class_hierarchy(state.ast_index, generation=state.index_generation)
+        
+            def _describe(qualified_name: str, depth: int) -> dict:
+                definition = hierarchy.classes.get(qualified_name)
+                if definition is None:
+                    # Clase externa o no resuelta (Exception, librerías, etc.)
+                    return {"qualified_name": qualified_name, "depth": depth, "source": "external"}
+                return {
+                    "name": definition["name"],
+                    "qualified_name": qualified_name,
+                    "file": definition["file"],
+                    "line": definition.get("line_start"),
+                    "depth": depth
+                }
+        
+            classes = []
+            for qualified_name in hierarchy.find(class_name):
+                definition = hierarchy.classes[qualified_name]
+                if transitive:
+                    subclasses = hierarchy.all_subclasses(qualified_name)
+                    ancestors = hierarchy.ancestors(qualified_name)
+                else:
+                    subclasses = [(name, 1) for name in hierarchy.direct_subclasses(qualified_name)]
+                    ancestors = [(name, 1) for name in hierarchy.bases.get(qualified_name, [])]
+            
+                classes.append({
+                    "name": definition["name"],
+                    "qualified_name": qualified_name,
+                    "file": definition["file"],
+                    "line": definition.get("line_start"),
+                    "bases": hierarchy.bases.get(qualified_name, []),
+                    "ancestors": [_describe(name, depth) for name, depth in ancestors],
+                    "subclasses": [_describe(name, depth) for name, depth in subclasses],
+                    "total_subclasses": len(subclasses)
+                })
+        
+            # Clases externas (p. ej. Exception) solo tienen subclases en el proyecto
+            if not classes and hierarchy.direct_subclasses(class_name):
+                subclasses = (hierarchy.all_subclasses(class_name) if transitive else
+                              [(name, 1) for name in hierarchy.direct_subclasses(class_name)])
+                classes.append({
+                    "qualified_name": class_name,
+                    "source": "external",
+                    "subclasses": [_describe(name, depth) for name, depth in subclasses],
+                    "total_subclasses": len(subclasses)
+                })
+        
+        if not classes:
+            return _add_index_status({
+                "success": True,
+                "found": False,
+                "message": f"No classes found for '{class_name}'",
+                "class_name": class_name
+            }, state)
+        
+        await ctx.info(f"Class hierarchy for '{class_name}': {len(classes)} matching classes")
+        
+        return _clean_response(_add_index_status({
+            "success": True,
+            "found": True,
+            "class_name": class_name,
+            "transitive": transitive,
+            "classes": classes
+        }, state))
+        
+    except Exception as e:
+        await ctx.error(f"Error building class hierarchy for '{class_name}': {str(e)}")
+        return {
+            "success": False,
+            "error": type(e).__name__,
+            "message": str(e),
+            "class_name": class_name
+        }
+
+
+@mcp.tool
+async def query_definitions_tool(
+    definition_type: str = None,
+    decorator: str = None,
+    base_class: str = None,
+    is_async: bool = None,
+    argument: str = None,
+    returns: str = None,
+    has_async_method: bool = None,
+    indirect_subclasses: bool = False,
+    limit: int = 50,
+    ctx: Context = None
+) -> dict:
+    """
+    Find project definitions by structure instead of by name. All given criteria must match.
+
+    Args:
+        definition_type: "function", "class", "import" or "variable"
+        decorator: Decorator name, e.g. "mcp.tool" or "tool"
+        base_class: Base class of the classes to find, e.g. "BaseModel"
+        is_async: True for async functions only, False for sync functions only
+        argument: Name of an argument the functions take
+        returns: Return annotation of the functions, e.g. "Dict[str, Any]"
+        has_async_method: True for classes with at least one async method
+        indirect_subclasses: With base_class, also include indirect subclasses
+        limit: Maximum number of definitions returned
+
+    Returns:
+        Dictionary with the matching definitions (name, type, file, lines)
+
+    Examples:
+        query_definitions_tool(decorator="mcp.tool")
+        query_definitions_tool(base_class="BaseModel", has_async_method=True)
+        query_definitions_tool(is_async=True, argument="ctx")
+    """
+    criteria = {
+        "definition_type": definition_type,
+        "decorator": decorator,
+        "base_class": base_class,
+        "is_async": is_async,
+        "argument": argument,
+        "returns": returns,
+        "has_async_method": has_async_method
+    }
+    try:
+        from mcp_code_editor.tools.secondary_index import get_secondary_index
+
+        state = getattr(mcp, 'project_state', None)
+
+        if not state or not state.setup_complete:
+            return {
+                "success": False,
+                "error": "ProjectNotSetup",
+                "message": "Project not setup. Please run setup_code_editor_tool first."
+            }
+
+        if not state.ast_enabled:
+            return {
+                "success": False,
+                "error": "ASTNotEnabled",
+                "message": "AST analysis not enabled. Run setup with analyze_ast=True."
+            }
+
+        if all(value is None for value in criteria.values()):
+            return {
+                "success": False,
+                "error": "NoCriteria",
+                "message": "Give at least one criterion (decorator, base_class, is_async, argument, returns, ...)."
+            }
+
+        # Decorators and base classes are referenced by name in every file that
+        # can match; other criteria need the whole sharded index
+        if base_class and indirect_subclasses:
+            await _load_shards(state, "ensure_class_hierarchy", base_class)
+        elif decorator or base_class:
+            await _load_shards(state, "ensure_referencing", (decorator or base_class).lstrip("@").split("(")[0])
+        else:
+            await _load_shards(state, "ensure_all")
+
+        with state.index_lock:
+            index = get_secondary_index(state.ast_index, generation=state.index_generation)
+            matches = index.query(indirect_subclasses=indirect_subclasses, **criteria)
+
+            definitions = []
+            for match in matches[:limit]:
+                definitions.append({
+                    "name": match["name"],
+                    "qualified_name": match.get("qualified_name"),
+                    "type": match["type"],
+                    "file": match["file"],
+                    "line_start": match.get("line_start", match.get("line")),
+                    "line_end": match.get("line_end"),
+                    "signature": match.get("signature"),
+                    "decorators": match.get("decorators"),
+                    "inheritance": match.get("inheritance")
+                })
+
+        await ctx.info(f"Definition query matched {len(matches)} definitions")
+
+        return _clean_response(_add_index_status({
+            "success": True,
+            "criteria": {key: value for key, value in criteria.items() if value is not None},
+            "total_matches": len(matches),
+            "truncated": len(matches) > limit,
+            "definitions": definitions
+        }, state))
+
+    except Exception as e:
+        await ctx.error(f"Error querying definitions: {str(e)}")
+        return {
+            "success": False,
+            "error": type(e).__name__,
+            "message": str(e)
+        }
+
+
+def _fingerprint_state_error(state) -> Optional[dict]:
+    """Get the error response for tools that need the fingerprint index, or None if it is available."""
+    if not state or not state.setup_complete:
+        return {
+            "success": False,
+            "error": "ProjectNotSetup",
+            "message": "Project not setup. Please run setup_code_editor_tool first."
+        }
+    if not state.ast_enabled or getattr(state, 'fingerprint_index', None) is None:
+        return {
+            "success": False,
+            "error": "ASTNotEnabled",
+            "message": "AST analysis not enabled. Run setup with analyze_ast=True."
+        }
+    return None
+
+def _describe_functions(state, keys) -> Dict[tuple, dict]:
+    """Get the name and current line range of fingerprinted functions, by (file, qualified name)."""
+    wanted = set(keys)
+    described = {}
+    for definition in state.ast_index:
+        key = (definition.get("file"), definition.get("qualified_name"))
+        if definition.get("type") == "function" and key in wanted:
+            described[key] = {
+                "name": definition["name"],
+                "qualified_name": definition["qualified_name"],
+                "file": definition["file"],
+                "line_start": definition.get("line_start"),
+                "line_end": definition.get("line_end")
+            }
+    for file_path, qualified_name in wanted:
+        described.setdefault((file_path, qualified_name), {"qualified_name": qualified_name, "file": file_path})
+    return described
+
+@mcp.tool
+async def find_similar_code_tool(
+    identifier: str,
+    path: str = None,
+    threshold: float = 0.5,
+    limit: int = 20,
+    ctx: Context = None
+) -> dict:
+    """
+    Find functions whose body is similar to a given function (copies, renamed copies, near-duplicates).
+
+    Function bodies are fingerprinted during indexing (token k-grams with winnowing),
+    so candidates come from an inverted fingerprint index instead of pairwise comparison.
+
+    Args:
+        identifier: Function name or qualified name (e.g. "save" or "pkg.module.Class.save")
+        path: Optional file of the function, to disambiguate
+        threshold: Minimum similarity (0-1, Jaccard index of the fingerprints)
+        limit: Maximum number of similar functions per matching function
+
+    Returns:
+        Dictionary with, for every function matching the identifier, its similar functions
+    """
+    try:
+        state = getattr(mcp, 'project_state', None)
+        error = _fingerprint_state_error(state)
+        if error:
+            return error
+
+        # Similar code can be anywhere in the project
+        await _load_shards(state, "ensure_all")
+        fingerprint_index = state.fingerprint_index
+        file_path = str(Path(path).resolve()) if path else None
+
+        with state.index_lock:
+            keys = fingerprint_index.find_functions(identifier, file_path)
+            results = [(key, fingerprint_index.similar_to(key, threshold, limit)) for key in keys]
+            described = _describe_functions(state, keys + [other for _, similar in results for other, _ in similar])
+
+        if not keys:
+            return {
+                "success": False,
+                "error": "FunctionNotFound",
+                "message": f"No fingerprinted function named '{identifier}'. "
+                           f"Functions shorter than a few statements are not fingerprinted."
+            }
+
+        functions = []
+        for key, similar in results:
+            functions.append({
+                **described[key],
+                "similar": [{**described[other], "similarity": round(similarity, 3)}
+                            for other, similarity in similar]
+            })
+
+        await ctx.info(f"Found {sum(len(similar) for _, similar in results)} similar functions")
+
+        return _clean_response(_add_index_status({
+            "success": True,
+            "identifier": identifier,
+            "threshold": threshold,
+            "functions": functions
+        }, state))
+
+    except Exception as e:
+        await ctx.error(f"Error finding similar code: {str(e)}")
+        return {
+            "success": False,
+            "error": type(e).__name__,
+            "message": str(e)
+        }
+
+@mcp.tool
+async def find_duplicate_code_tool(
+    threshold: float = 0.8,
+    min_tokens: int = 30,
+    limit: int = 50,
+    ctx: Context = None
+) -> dict:
+    """
+    Report pairs of duplicate or near-duplicate functions across the project.
+
+    Args:
+        threshold: Minimum similarity (0-1, Jaccard index of the body fingerprints)
+        min_tokens: Ignore functions with fewer body tokens (AST nodes) than this
+        limit: Maximum number of pairs returned
+
+    Returns:
+        Dictionary with the duplicate pairs, most similar first
+    """
+    try:
+        state = getattr(mcp, 'project_state', None)
+        error = _fingerprint_state_error(state)
+        if error:
+            return error
+
+        await _load_shards(state, "ensure_all")
+
+        with state.index_lock:
+            pairs = state.fingerprint_index.duplicates(threshold, min_tokens)
+            shown = pairs[:limit]
+            described = _describe_functions(state, [key for pair in shown for key in pair[:2]])
+
+        duplicates = [{"first": described[first], "second": described[second],
+                       "similarity": round(similarity, 3)}
+                      for first, second, similarity in shown]
+
+        await ctx.info(f"Found {len(pairs)} duplicate function pairs")
+
+        return _clean_response(_add_index_status({
+            "success": True,
+            "threshold": threshold,
+            "total_pairs": len(pairs),
+            "truncated": len(pairs) > limit,
+            "duplicates": duplicates,
+            "fingerprint_stats": state.fingerprint_index.get_stats()
+        }, state))
+
+    except Exception as e:
+        await ctx.error(f"Error finding duplicate code: {str(e)}")
+        return {
+            "success": False,
+            "error": type(e).__name__,
+            "message": str(e)
+        }
+
+
 @mcp.tool
 async def index_library_tool(
     library_name: str,
@@ -4,8 +4,10 @@ from .diff_tools import apply_diff
 from .file_operations import create_file, read_file_with_lines, delete_file
 from .project_tools import (setup_code_editor, project_files, ProjectState, 
                            setup_code_editor_with_ast, search_definitions, 
-                           get_file_definitions, update_file_ast_index, has_structural_changes)
-from .ast_analyzer import ASTAnalyzer
+                           get_file_definitions, update_file_ast_index, refresh_file_index,
+                           refresh_token_index, has_structural_changes, search_project_text)
+from .ast_analyzer import (ASTAnalyzer, get_definition_docstring, get_definition_source,
+                           get_definition_lines, is_indexed_source)
 from .dependency_analyzer import DependencyAnalyzer, enhance_apply_diff_with_dependencies
 from .library_indexer import (index_library, search_library, get_indexed_libraries, 
                              get_library_summary)
@@ -16,7 +18,9 @@ from .console_tools import (start_console_process, check_console, send_to_consol
 __all__ = ['apply_diff', 'create_file', 'read_file_with_lines', 'delete_file', 
            'setup_code_editor', 'project_files', 'ProjectState',
            'setup_code_editor_with_ast', 'search_definitions', 'get_file_definitions',
-           'update_file_ast_index', 'has_structural_changes', 'ASTAnalyzer',
+           'update_file_ast_index', 'refresh_file_index', 'refresh_token_index', 'has_structural_changes',
+           'search_project_text', 'ASTAnalyzer',
+           'get_definition_docstring', 'get_definition_source', 'get_definition_lines', 'is_indexed_source',
            'DependencyAnalyzer', 'enhance_apply_diff_with_dependencies',
            'index_library', 'search_library', 'get_indexed_libraries', 'get_library_summary',
            'start_console_process', 'check_console', 'send_to_console', 'list_console_processes',
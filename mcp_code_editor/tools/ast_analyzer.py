@@ -2,24 +2,177 @@
 AST analyzer for code structure analysis and indexing.
 """
 import ast
+import hashlib
+import inspect
 import logging
+import mmap
+import tokenize
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set, Tuple
+from ..core.file_cache import file_cache
+from .reference_index import ReferenceIndex
+from .call_graph import CallGraph
+from .fingerprint_index import FingerprintIndex, winnow
+from .js_indexer import JSAnalyzer, JS_EXTENSIONS, clear_script_module_cache
 
 logger = logging.getLogger(__name__)
 
+# Extensions of the files indexed by build_ast_index (JavaScript/TypeScript lexically)
+INDEXED_EXTENSIONS = {".py"} | JS_EXTENSIONS
+
+
+def is_indexed_source(file_path) -> bool:
+    """Whether a file is indexed (Python, JavaScript or TypeScript, excluding minified bundles)."""
+    name = Path(file_path).name
+    return Path(name).suffix in INDEXED_EXTENSIONS and not name.endswith((".min.js", ".min.mjs", ".d.ts"))
+
+# Nodes that can contain nested statement blocks
+_BLOCK_NODES = (ast.stmt, ast.excepthandler) + ((ast.match_case,) if hasattr(ast, "match_case") else ())
+
+
+@lru_cache(maxsize=4096)
+def _package_parts(directory: str) -> Tuple[str, ...]:
+    """Get the dotted package path of a directory (empty if it is not a package)."""
+    path = Path(directory)
+    if path.parent == path or not (path / "__init__.py").exists():
+        return ()
+    return _package_parts(str(path.parent)) + (path.name,)
+
+
+def clear_module_name_cache():
+    """Forget the cached package paths (packages may have been created, removed or moved)."""
+    _package_parts.cache_clear()
+    clear_script_module_cache()
+
+
+def module_name_for_path(file_path: Path) -> str:
+    """Get the importable module name of a Python file, e.g. 'pkg.sub.module'."""
+    file_path = Path(file_path)
+    parts = list(_package_parts(str(file_path.parent)))
+    if file_path.stem != "__init__" or not parts:
+        parts.append(file_path.stem)
+    return ".".join(parts)
+
+
+def line_byte_offsets(data: bytes) -> List[int]:
+    """Get the byte offset at which every line of a source file starts."""
+    offsets = [0]
+    pos = data.find(b"\n")
+    while pos != -1:
+        offsets.append(pos + 1)
+        pos = data.find(b"\n", pos + 1)
+    return offsets
+
+
+_DEFINITION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+def _decorator_line(node: ast.AST) -> Optional[int]:
+    """First line of the decorators of a definition, or None if it has none."""
+    return min((dec.lineno for dec in node.decorator_list), default=None)
+
+
+def _has_docstring(node: ast.AST) -> bool:
+    body = getattr(node, "body", None)
+    return bool(body) and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+        and isinstance(body[0].value.value, str)
+
+
+def structure_hashes(tree: ast.AST) -> Dict[ast.AST, str]:
+    """
+    Compute the structural hash of every function and class definition of a tree.
+
+    The hash covers node types and field values, not positions, comments or
+    docstrings, so it only changes when the code of a definition does. A
+    function hash covers its nested definitions; a class hash covers its
+    bases, decorators and class-level statements, but its methods and
+    nested classes only by name (they are hashed on their own).
+    """
+    hashes: Dict[ast.AST, str] = {}
+
+    def _serialize(node: ast.AST) -> str:
+        is_definition = isinstance(node, _DEFINITION_NODES)
+        parts = [type(node).__name__]
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, list):
+                if is_definition and field == "body":
+                    items = value[1:] if _has_docstring(node) else value
+                    if isinstance(node, ast.ClassDef):
+                        members = []
+                        for item in items:
+                            if isinstance(item, _DEFINITION_NODES):
+                                _serialize(item)  # hashed on its own
+                                members.append(f"{type(item).__name__}:{item.name}")
+                            else:
+                                members.append(_serialize(item))
+                        parts.append("[" + ",".join(members) + "]")
+                        continue
+                else:
+                    items = value
+                parts.append("[" + ",".join(_serialize(item) if isinstance(item, ast.AST) else repr(item)
+                                            for item in items) + "]")
+            elif isinstance(value, ast.AST):
+                if not isinstance(value, ast.expr_context):
+                    parts.append(_serialize(value))
+            else:
+                parts.append(repr(value))
+        text = "(" + " ".join(parts) + ")"
+        if is_definition:
+            hashes[node] = hashlib.sha1(text.encode("utf-8", errors="surrogatepass")).hexdigest()[:16]
+            return hashes[node]
+        return text
+
+    try:
+        _serialize(tree)
+    except RecursionError:
+        logger.warning("Source too deeply nested to compute structure hashes")
+        return {}
+    return hashes
+
 
 class ASTAnalyzer:
     """Analyzes Python files using AST to extract code structure."""
     
     def __init__(self):
         self.definitions = []
+        # (name, line, kind) references found by the last analyze_file call
+        self.references: List[Tuple[str, int, str]] = []
+        # {caller qualified name: (caller name, called names)} of the last analyze_file call
+        self.calls: Dict[str, Tuple[str, Set[str]]] = {}
+        # {function qualified name: (name, token count, fingerprints)} of the last analyze_file call
+        self.fingerprints: Dict[str, Tuple[str, int, Set[int]]] = {}
+        # (first line, last line) of every top-level statement of the last analyze_file call
+        self.statement_spans: List[Tuple[int, int]] = []
+        # Byte offset of every line of the file being analyzed, used for source spans
+        self.line_offsets: List[int] = []
+        # Structure hashes of the definitions of the last tree they were computed for
+        self._hashed_tree: Optional[ast.AST] = None
+        self._structure_hashes: Dict[ast.AST, str] = {}
     
     def analyze_file(self, file_path: Path) -> List[Dict[str, Any]]:
-        """Analyze a single Python file and extract all definitions."""
+        """
+        Analyze a single Python file and extract all definitions.
+        
+        The references, call edges and function fingerprints of the file are
+        collected in the same pass and left in ``self.references``,
+        ``self.calls`` and ``self.fingerprints``. JavaScript and TypeScript
+        files are indexed lexically (definitions and references only).
+        """
+        self.references = []
+        self.calls = {}
+        self.fingerprints = {}
+        self.statement_spans = []
+        if file_path.suffix in JS_EXTENSIONS:
+            script_analyzer = JSAnalyzer()
+            definitions = script_analyzer.analyze_file(file_path)
+            self.references = script_analyzer.references
+            return definitions
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            content = data.decode('utf-8')
+            self.line_offsets = line_byte_offsets(data)
             
             tree = ast.parse(content, filename=str(file_path))
             
@@ -29,6 +182,12 @@ class ASTAnalyzer:
             definitions.extend(self._extract_classes(tree, file_path))
             definitions.extend(self._extract_variables(tree, file_path))
             
+            self.references = self._extract_references(tree)
+            module_name = module_name_for_path(file_path)
+            self.calls = self._extract_calls(tree, module_name)
+            self.fingerprints = self._extract_fingerprints(tree, module_name)
+            self.statement_spans = statement_spans(tree)
+            
             return definitions
             
         except SyntaxError as e:
@@ -67,42 +226,80 @@ class ASTAnalyzer:
                         "line": node.lineno,
                         "import_type": "from",
                         "module": module,
+                        "level": node.level,
                         "from_name": alias.name,
                         "alias": alias.asname
                     })
         
         return imports
     
+    def _walk_definitions(self, tree: ast.AST, module_name: str):
+        """
+        Walk function and class definitions at any depth.
+        
+        Yields (node, qualified_name, parent_qualified_name, scope) tuples, where
+        scope is the kind of the enclosing block ("module", "class" or "function").
+        """
+        stack = [(child, module_name, "module") for child in reversed(tree.body)]
+        
+        while stack:
+            node, parent, scope = stack.pop()
+            
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                qualified_name = f"{parent}.{node.name}"
+                yield node, qualified_name, parent, scope
+                
+                child_scope = "class" if isinstance(node, ast.ClassDef) else "function"
+                stack.extend((child, qualified_name, child_scope) for child in reversed(node.body))
+            else:
+                # Definitions inside if/try/with/for blocks keep the enclosing scope
+                for child in reversed(list(ast.iter_child_nodes(node))):
+                    if isinstance(child, _BLOCK_NODES):
+                        stack.append((child, parent, scope))
+    
+    def _structure_hash(self, tree: ast.AST, node: ast.AST) -> Optional[str]:
+        """Get the structure hash of a definition node of ``tree``."""
+        if self._hashed_tree is not tree:
+            self._structure_hashes = structure_hashes(tree)
+            self._hashed_tree = tree
+        return self._structure_hashes.get(node)
+    
     def _extract_functions(self, tree: ast.AST, file_path: Path) -> List[Dict[str, Any]]:
-        """Extract function definitions."""
+        """Extract function definitions, including methods and nested functions."""
         functions = []
+        module_name = module_name_for_path(file_path)
         
-        for node in ast.walk(tree):
+        for node, qualified_name, parent, scope in self._walk_definitions(tree, module_name):
             if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                # Skip nested functions for now (could be added later)
-                if self._is_top_level_or_class_method(node, tree):
-                    functions.append({
-                        "name": node.name,
-                        "type": "function",
-                        "file": str(file_path),
-                        "line_start": node.lineno,
-                        "line_end": getattr(node, 'end_lineno', node.lineno),
-                        "is_async": isinstance(node, ast.AsyncFunctionDef),
-                        "args": [arg.arg for arg in node.args.args],
-                        "defaults": len(node.args.defaults),
-                        "docstring": ast.get_docstring(node),
-                        "decorators": [self._get_decorator_name(dec) for dec in node.decorator_list],
-                        "returns": self._get_return_annotation(node),
-                        "signature": self._build_function_signature(node)
-                    })
+                functions.append({
+                    "name": node.name,
+                    "qualified_name": qualified_name,
+                    "parent": parent,
+                    "scope": scope,
+                    "type": "function",
+                    "file": str(file_path),
+                    "line_start": node.lineno,
+                    "line_end": getattr(node, 'end_lineno', node.lineno),
+                    "is_async": isinstance(node, ast.AsyncFunctionDef),
+                    "args": [arg.arg for arg in node.args.args],
+                    "defaults": len(node.args.defaults),
+                    "span": self._source_span(node, node.lineno),
+                    "docstring_span": self._docstring_span(node),
+                    "decorators": [self._get_decorator_name(dec) for dec in node.decorator_list],
+                    "decorator_line": _decorator_line(node),
+                    "returns": self._get_return_annotation(node),
+                    "signature": self._build_function_signature(node),
+                    "structure_hash": self._structure_hash(tree, node)
+                })
         
         return functions
     
     def _extract_classes(self, tree: ast.AST, file_path: Path) -> List[Dict[str, Any]]:
-        """Extract class definitions."""
+        """Extract class definitions, including nested classes."""
         classes = []
+        module_name = module_name_for_path(file_path)
         
-        for node in ast.walk(tree):
+        for node, qualified_name, parent, scope in self._walk_definitions(tree, module_name):
             if isinstance(node, ast.ClassDef):
                 # Get methods
                 methods = []
@@ -118,22 +315,55 @@ class ASTAnalyzer:
                 
                 classes.append({
                     "name": node.name,
+                    "qualified_name": qualified_name,
+                    "parent": parent,
+                    "scope": scope,
                     "type": "class",
                     "file": str(file_path),
                     "line_start": node.lineno,
                     "line_end": getattr(node, 'end_lineno', node.lineno),
-                    "docstring": ast.get_docstring(node),
+                    "span": self._source_span(node, node.lineno),
+                    "docstring_span": self._docstring_span(node),
                     "inheritance": [self._get_base_name(base) for base in node.bases],
                     "methods": methods,
-                    "decorators": [self._get_decorator_name(dec) for dec in node.decorator_list]
+                    "decorators": [self._get_decorator_name(dec) for dec in node.decorator_list],
+                    "decorator_line": _decorator_line(node),
+                    "structure_hash": self._structure_hash(tree, node)
                 })
         
         return classes
     
+    def _source_span(self, node: ast.AST, base_line: int) -> Optional[Tuple[int, int]]:
+        """
+        Get the (start, end) byte offsets of a node's source, relative to the
+        start of ``base_line``.
+        
+        Offsets are relative to the definition's first line so that they stay
+        valid when edits elsewhere in the file only shift line numbers.
+        """
+        end_lineno = getattr(node, "end_lineno", None)
+        if end_lineno is None or end_lineno > len(self.line_offsets):
+            return None
+        base = self.line_offsets[base_line - 1]
+        return (self.line_offsets[node.lineno - 1] + node.col_offset - base,
+                self.line_offsets[end_lineno - 1] + node.end_col_offset - base)
+    
+    def _docstring_span(self, node: ast.AST) -> Optional[Tuple[int, int]]:
+        """Get the byte span of a definition's docstring literal, or None if it has none."""
+        if not node.body:
+            return None
+        first = node.body[0]
+        if (isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant)
+                and isinstance(first.value.value, str)):
+            return self._source_span(first.value, node.lineno)
+        return None
+    
     def _extract_variables(self, tree: ast.AST, file_path: Path) -> List[Dict[str, Any]]:
         """Extract global variable assignments."""
         variables = []
         
+        module_name = module_name_for_path(file_path)
+        
         # Only get top-level assignments
         for node in tree.body:
             if isinstance(node, ast.Assign):
@@ -142,6 +372,7 @@ class ASTAnalyzer:
                         # Simple variable assignment
                         variables.append({
                             "name": target.id,
+                            "qualified_name": f"{module_name}.{target.id}",
                             "type": "variable",
                             "file": str(file_path),
                             "line": node.lineno,
@@ -151,13 +382,99 @@ class ASTAnalyzer:
         
         return variables
     
-    def _is_top_level_or_class_method(self, func_node: ast.FunctionDef, tree: ast.AST) -> bool:
-        """Check if function is top-level or a class method (not nested)."""
+    def _extract_references(self, tree: ast.AST) -> List[Tuple[str, int, str]]:
+        """Extract (name, line, kind) for every call, name, attribute and import reference."""
+        references = []
+        
         for node in ast.walk(tree):
-            if isinstance(node, (ast.ClassDef, ast.Module)):
-                if func_node in node.body:
-                    return True
-        return False
+            if isinstance(node, ast.Call):
+                if isinstance(node.func, ast.Name):
+                    references.append((node.func.id, node.lineno, "call"))
+                elif isinstance(node.func, ast.Attribute):
+                    references.append((node.func.attr, node.lineno, "call"))
+            
+            elif isinstance(node, ast.ImportFrom):
+                for alias in node.names:
+                    references.append((alias.name, node.lineno, "import"))
+                    if alias.asname and alias.asname != alias.name:
+                        references.append((alias.asname, node.lineno, "import"))
+            
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    references.append((alias.name, node.lineno, "module_import"))
+                    if alias.asname and alias.asname != alias.name:
+                        references.append((alias.asname, node.lineno, "module_import"))
+            
+            elif isinstance(node, ast.Name):
+                references.append((node.id, node.lineno, "name"))
+            
+            elif isinstance(node, ast.Attribute):
+                references.append((node.attr, node.lineno, "attribute"))
+        
+        return references
+    
+    def _extract_calls(self, tree: ast.AST, module_name: str) -> Dict[str, Tuple[str, Set[str]]]:
+        """
+        Extract the names called by every function, keyed by qualified name.
+        
+        Calls inside nested functions and classes belong to the nested definition.
+        """
+        calls = {}
+        
+        for node, qualified_name, parent, scope in self._walk_definitions(tree, module_name):
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            
+            callees = set()
+            stack = list(node.body)
+            while stack:
+                child = stack.pop()
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    continue
+                if isinstance(child, ast.Call):
+                    if isinstance(child.func, ast.Name):
+                        callees.add(child.func.id)
+                    elif isinstance(child.func, ast.Attribute):
+                        callees.add(child.func.attr)
+                stack.extend(ast.iter_child_nodes(child))
+            
+            calls[qualified_name] = (node.name, callees)
+        
+        return calls
+    
+    def _extract_fingerprints(self, tree: ast.AST, module_name: str) -> Dict[str, Tuple[str, int, Set[int]]]:
+        """
+        Extract the winnowing fingerprints of every function body, keyed by qualified name.
+        
+        Bodies are tokenized as a pre-order walk of their AST with variable
+        names and literal values normalized away (attribute names are kept),
+        so renamed copies of a function still share their fingerprints.
+        """
+        fingerprints = {}
+        
+        for node, qualified_name, parent, scope in self._walk_definitions(tree, module_name):
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            
+            tokens = []
+            stack = list(reversed(node.body))
+            while stack:
+                child = stack.pop()
+                if isinstance(child, ast.expr_context):
+                    continue
+                if isinstance(child, ast.Constant):
+                    tokens.append("Constant:" + type(child.value).__name__)
+                elif isinstance(child, ast.Attribute):
+                    tokens.append("Attribute:" + child.attr)
+                else:
+                    tokens.append(type(child).__name__)
+                stack.extend(reversed(list(ast.iter_child_nodes(child))))
+            
+            hashes = winnow(tokens)
+            if hashes:
+                fingerprints[qualified_name] = (node.name, len(tokens), hashes)
+        
+        return fingerprints
     
     def _get_decorator_name(self, decorator: ast.expr) -> str:
         """Get decorator name as string."""
@@ -257,16 +574,355 @@ class ASTAnalyzer:
         return "unknown"
 
 
-def build_ast_index(project_root: Path, file_tree: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Build AST index for all Python files in the project."""
+def definition_structure(tree: ast.AST, module_name: str) -> Dict[str, Tuple[str, str, Optional[str]]]:
+    """Get {qualified name: (type, name, structure hash)} of the function and class definitions of a tree."""
     analyzer = ASTAnalyzer()
-    all_definitions = []
+    return {qualified_name: ("class" if isinstance(node, ast.ClassDef) else "function", node.name,
+                             analyzer._structure_hash(tree, node))
+            for node, qualified_name, _, _ in analyzer._walk_definitions(tree, module_name)}
+
+
+def indexed_structure(definitions: List[Dict[str, Any]]) -> Dict[str, Tuple[str, str, Optional[str]]]:
+    """Get the same mapping as definition_structure from AST index entries."""
+    return {d["qualified_name"]: (d["type"], d["name"], d.get("structure_hash"))
+            for d in definitions if d.get("type") in ("function", "class") and d.get("qualified_name")}
+
+
+def file_structure(tree: ast.AST, module_name: str,
+                   indexed_definitions: List[Dict[str, Any]]) -> Dict[str, Tuple[str, str, Optional[str]]]:
+    """
+    Get the structure mapping of a file's current tree.
+    
+    The hashes stored in the AST index are used when the indexed definitions
+    of the file match the tree; otherwise they are computed from the tree.
+    """
+    structure = indexed_structure(indexed_definitions)
+    if structure:
+        current_names = {qualified_name for _, qualified_name, _, _
+                         in ASTAnalyzer()._walk_definitions(tree, module_name)}
+        if set(structure) == current_names:
+            return structure
+    return definition_structure(tree, module_name)
+
+
+def compare_structure(old: Dict[str, Tuple[str, str, Optional[str]]],
+                      new: Dict[str, Tuple[str, str, Optional[str]]]) -> Dict[str, List[Tuple[str, str, str]]]:
+    """
+    Classify definitions as added, removed or modified between two structure mappings.
+    
+    A definition present on both sides is modified when its structure hash
+    differs, or when either side has no hash.
+    
+    Returns:
+        {"added" | "removed" | "modified": [(qualified name, type, name)]}, in source order
+    """
+    result = {"added": [], "removed": [], "modified": []}
+    for qualified_name, (definition_type, name, old_hash) in old.items():
+        if qualified_name not in new:
+            result["removed"].append((qualified_name, definition_type, name))
+        elif old_hash is None or old_hash != new[qualified_name][2]:
+            result["modified"].append((qualified_name, definition_type, name))
+    for qualified_name, (definition_type, name, _) in new.items():
+        if qualified_name not in old:
+            result["added"].append((qualified_name, definition_type, name))
+    return result
+
+
+def statement_spans(tree: ast.Module) -> List[Tuple[int, int]]:
+    """Get (first line, last line) of every top-level statement, decorators included."""
+    spans = []
+    for node in tree.body:
+        start = min([node.lineno] + [dec.lineno for dec in getattr(node, "decorator_list", [])])
+        spans.append((start, getattr(node, "end_lineno", None) or node.lineno))
+    return spans
+
+
+def shift_definition_lines(definition: Dict[str, Any], delta: int):
+    """Shift every line number stored in a definition by ``delta``."""
+    for key in ("line", "line_start", "line_end", "decorator_line"):
+        if definition.get(key) is not None:
+            definition[key] += delta
+    for method in definition.get("methods", ()):
+        method["line"] += delta
+
+
+class LineDeltaMap:
+    """
+    Map old line numbers of a file to new ones after non-structural edits.
+    
+    Built from the (old start line, old end line, new line count) of every
+    applied diff block. Lines after a block move by its line delta; a line
+    inside a block stays put, except its last line, which moves with the
+    block end (so an enclosing definition grows or shrinks).
+    
+    End lines (of definitions and statements) that were the last line of a
+    block are mapped to the last code line of the new block text, given the
+    new ``lines`` of the file, so trailing comments and blank lines added by
+    the block do not extend them.
+    """
+    
+    def __init__(self, changed_ranges: List[Tuple[int, int, int]], lines: Optional[List[str]] = None):
+        self.ranges = sorted((start, end, new_count - (end - start + 1))
+                             for start, end, new_count in changed_ranges)
+        self.lines = lines
+    
+    def map(self, line: int) -> int:
+        """Get the new number of an old line."""
+        shift = 0
+        for start, end, delta in self.ranges:
+            if line > end:
+                shift += delta
+            elif line == end and line >= start:
+                shift += delta
+            else:
+                break
+        return line + shift
+    
+    def map_end(self, line: int) -> int:
+        """Get the new number of an old end line (last line of a statement or definition)."""
+        new_line = self.map(line)
+        if self.lines is None or not any(start <= line == end for start, end, _ in self.ranges):
+            return new_line
+        while new_line > 1 and _is_blank_or_comment(self.lines[new_line - 1]):
+            new_line -= 1
+        return new_line
+
+
+def _is_blank_or_comment(line: str) -> bool:
+    stripped = line.strip()
+    return not stripped or stripped.startswith("#")
+
+
+def shift_lines_for_ranges(file_path: Path, ast_index: List[Dict[str, Any]],
+                           changed_ranges: List[Tuple[int, int, int]],
+                           spans: Optional[Dict[str, List[Tuple[int, int]]]] = None) -> int:
+    """
+    Fix the line numbers of a file's definitions after edits that added or
+    removed lines without changing any definition (comments, docstrings,
+    statements inside a body).
+    
+    Nothing is parsed: every entry of the file is remapped with a LineDeltaMap.
+    
+    Returns:
+        Number of definitions whose location changed
+    """
+    file_str = str(file_path)
+    line_map = LineDeltaMap(changed_ranges)
+    if not any(delta for _, _, delta in line_map.ranges):
+        return 0
+    try:
+        line_map.lines = file_cache.read_text(file_path).splitlines()
+    except (OSError, UnicodeDecodeError) as e:
+        logger.warning(f"Could not read {file_path} to map end lines: {e}")
+    
+    moved = 0
+    for definition in ast_index:
+        if definition.get("file") != file_str:
+            continue
+        changed = False
+        shifts = set()
+        for key in ("line", "line_start", "line_end", "decorator_line"):
+            line = definition.get(key)
+            if line is not None:
+                if key == "line_end":
+                    new_line = max(line_map.map_end(line), definition.get("line_start", 1))
+                else:
+                    new_line = line_map.map(line)
+                shifts.add(new_line - line)
+                if new_line != line:
+                    definition[key] = new_line
+                    changed = True
+        if len(shifts) > 1:
+            # The edit is inside the definition: its byte spans are recomputed on demand
+            definition.pop("span", None)
+            definition.pop("docstring_span", None)
+        for method in definition.get("methods", ()):
+            method["line"] = line_map.map(method["line"])
+        moved += changed
+    
+    if spans is not None and file_str in spans:
+        spans[file_str] = [(line_map.map(start), max(line_map.map_end(end), line_map.map(start)))
+                           for start, end in spans[file_str]]
+    
+    return moved
+
+
+def _read_relative_span(file_path: str, line: int, span: Tuple[int, int]) -> Optional[bytes]:
+    """Read the bytes of a span relative to the start of ``line`` through a memory-mapped view."""
+    with open(file_path, 'rb') as f:
+        try:
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return None
+        with view:
+            base = 0
+            for _ in range(line - 1):
+                pos = view.find(b"\n", base)
+                if pos == -1:
+                    return None
+                base = pos + 1
+            return view[base + span[0]:base + span[1]]
+
+
+def _refresh_source_spans(definition: Dict[str, Any]) -> bool:
+    """
+    Recompute the byte spans of a definition by parsing its file.
+    
+    Returns:
+        True if the definition was found at its indexed line
+    """
+    file_path = definition.get("file")
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        tree = ast.parse(data, filename=file_path)
+    except (OSError, SyntaxError, ValueError) as e:
+        logger.warning(f"Could not read source spans from {file_path}: {e}")
+        return False
+    
+    analyzer = ASTAnalyzer()
+    analyzer.line_offsets = line_byte_offsets(data)
+    node_types = (ast.ClassDef,) if definition["type"] == "class" else (ast.FunctionDef, ast.AsyncFunctionDef)
+    for node in ast.walk(tree):
+        if (isinstance(node, node_types) and node.name == definition["name"]
+                and node.lineno == definition.get("line_start")):
+            definition["span"] = analyzer._source_span(node, node.lineno)
+            definition["docstring_span"] = analyzer._docstring_span(node)
+            return True
+    return False
+
+
+def get_definition_source(definition: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the source text of an indexed function or class, read on demand from its file.
+    
+    Spans that no longer match the file are recomputed once.
+    """
+    for attempt in range(2):
+        if "span" not in definition or attempt:
+            if not _refresh_source_spans(definition):
+                return None
+        span = definition.get("span")
+        if span is None:
+            return None
+        try:
+            raw = _read_relative_span(definition["file"], definition["line_start"], span)
+            text = raw.decode('utf-8') if raw is not None else None
+        except (OSError, UnicodeDecodeError):
+            text = None
+        keyword = "class" if definition["type"] == "class" else ("async", "def")
+        if text and text.startswith(keyword):
+            return text
+    return None
+
+
+def _header_end(lines: List[str], line_start: int) -> int:
+    """Get the last line of the ``def``/``class`` header starting at ``line_start`` (up to its colon)."""
+    depth = 0
+    try:
+        for token in tokenize.generate_tokens(iter(lines[line_start - 1:]).__next__):
+            if token.type != tokenize.OP:
+                continue
+            if token.string in "([{":
+                depth += 1
+            elif token.string in ")]}":
+                depth -= 1
+            elif token.string == ":" and depth == 0:
+                return line_start + token.start[0] - 1
+    except (tokenize.TokenError, IndentationError):
+        pass
+    return line_start
+
+
+def get_definition_lines(definition: Dict[str, Any], lines: List[str], part: str = "full",
+                         include_decorators: bool = False) -> Optional[Tuple[int, int]]:
+    """
+    Get the (first, last) line numbers of the source of an indexed function or class.
+    
+    The indexed line span is used when the file still has the definition's
+    header at its first line; otherwise (file edited outside the server) the
+    definition is located again by parsing ``lines``.
+    
+    Args:
+        definition: Function or class definition of the index
+        lines: Current lines of its file (with line endings)
+        part: "full" for the whole definition, "signature" for its header only
+        include_decorators: Start at the first decorator line
+    """
+    line_start = definition.get("line_start")
+    line_end = definition.get("line_end", line_start)
+    decorator_line = definition.get("decorator_line")
+    if not line_start:
+        return None
+    
+    is_python = definition.get("file", "").endswith(".py")
+    if is_python:
+        keyword = "class" if definition["type"] == "class" else ("async", "def")
+        header = lines[line_start - 1].lstrip() if line_start <= len(lines) else ""
+        if not (header.startswith(keyword) and definition["name"] in header):
+            try:
+                tree = ast.parse("".join(lines))
+            except (SyntaxError, ValueError):
+                return None
+            node_types = (ast.ClassDef,) if definition["type"] == "class" else (ast.FunctionDef, ast.AsyncFunctionDef)
+            candidates = [node for node in ast.walk(tree)
+                          if isinstance(node, node_types) and node.name == definition["name"]]
+            if not candidates:
+                return None
+            node = min(candidates, key=lambda n: abs(n.lineno - line_start))
+            line_start, line_end, decorator_line = node.lineno, node.end_lineno, _decorator_line(node)
+    if part == "signature":
+        # Script headers are not parsed: their first line is returned
+        line_end = _header_end(lines, line_start) if is_python else line_start
+    
+    first_line = decorator_line if include_decorators and decorator_line else line_start
+    return first_line, min(line_end, len(lines))
+
+
+def get_definition_docstring(definition: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the docstring of a definition.
+    
+    Project definitions only store the byte span of their docstring; the text
+    is read from the file and cleaned like ``ast.get_docstring``. Definitions
+    that carry the text (e.g. external library entries) return it directly.
+    """
+    if "docstring" in definition:
+        return definition["docstring"]
+    if definition.get("type") not in ("function", "class"):
+        return None
+    
+    for attempt in range(2):
+        if "span" not in definition or attempt:
+            if not _refresh_source_spans(definition):
+                return None
+        span = definition.get("docstring_span")
+        if span is None:
+            return None
+        try:
+            raw = _read_relative_span(definition["file"], definition["line_start"], span)
+            value = ast.literal_eval(raw.decode('utf-8')) if raw is not None else None
+        except (OSError, UnicodeDecodeError, SyntaxError, ValueError):
+            value = None
+        if isinstance(value, str):
+            return inspect.cleandoc(value)
+    return None
+
+
+def collect_python_files(project_root: Path, file_tree: Dict[str, Any]) -> List[Path]:
+    """Get the paths of all Python files in a project file tree, in tree order."""
+    return [path for path in collect_source_files(project_root, file_tree) if path.suffix == ".py"]
+
+
+def collect_source_files(project_root: Path, file_tree: Dict[str, Any]) -> List[Path]:
+    """Get the paths of all indexed source files (see is_indexed_source) in a project file tree, in tree order."""
+    files = []
     
     def _process_tree_node(node: Dict[str, Any], current_path: Path):
         if node.get("type") == "file":
-            if current_path.suffix == ".py":
-                definitions = analyzer.analyze_file(current_path)
-                all_definitions.extend(definitions)
+            if is_indexed_source(current_path):
+                files.append(current_path)
         
         elif node.get("type") == "directory":
             for name, child in node.get("children", {}).items():
@@ -274,24 +930,278 @@ def build_ast_index(project_root: Path, file_tree: Dict[str, Any]) -> List[Dict[
                 _process_tree_node(child, child_path)
     
     _process_tree_node(file_tree, project_root)
+    return files
+
+
+def build_ast_index(project_root: Path, file_tree: Dict[str, Any],
+                    reference_index: Optional[ReferenceIndex] = None,
+                    call_graph: Optional[CallGraph] = None,
+                    spans: Optional[Dict[str, List[Tuple[int, int]]]] = None,
+                    fingerprint_index: Optional[FingerprintIndex] = None) -> List[Dict[str, Any]]:
+    """
+    Build AST index for all Python, JavaScript and TypeScript files in the project.
+    
+    If a ReferenceIndex, CallGraph or FingerprintIndex is given, it is filled
+    with the references, call edges or function fingerprints of every file
+    during the same pass. If a
+    ``spans`` dict is given, it receives the top-level statement spans of
+    every file (used for incremental re-parsing after edits).
+    """
+    analyzer = ASTAnalyzer()
+    all_definitions = []
+    
+    for file_path in collect_source_files(project_root, file_tree):
+        definitions = analyzer.analyze_file(file_path)
+        all_definitions.extend(definitions)
+        if reference_index is not None:
+            reference_index.add_file(str(file_path), analyzer.references)
+        if call_graph is not None:
+            call_graph.add_file(str(file_path), analyzer.calls)
+        if fingerprint_index is not None:
+            fingerprint_index.add_file(str(file_path), analyzer.fingerprints)
+        if spans is not None:
+            spans[str(file_path)] = analyzer.statement_spans
     
     logger.info(f"AST analysis complete: {len(all_definitions)} definitions found")
     return all_definitions
 
 
-def update_ast_for_file(file_path: Path, ast_index: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Update AST index for a single modified file."""
+def update_ast_for_file(file_path: Path, ast_index: List[Dict[str, Any]],
+                        reference_index: Optional[ReferenceIndex] = None,
+                        call_graph: Optional[CallGraph] = None,
+                        spans: Optional[Dict[str, List[Tuple[int, int]]]] = None,
+                        fingerprint_index: Optional[FingerprintIndex] = None) -> List[Dict[str, Any]]:
+    """
+    Update AST index for a single modified file.
+    
+    If a ReferenceIndex, CallGraph or FingerprintIndex is given, only the
+    postings, edges or fingerprints of this file are replaced (or dropped
+    when the file no longer exists).
+    """
     file_str = str(file_path)
     
     # Remove old definitions for this file
     updated_index = [d for d in ast_index if d.get("file") != file_str]
+    if reference_index is not None:
+        reference_index.remove_file(file_str)
+    if call_graph is not None:
+        call_graph.remove_file(file_str)
+    if fingerprint_index is not None:
+        fingerprint_index.remove_file(file_str)
+    if spans is not None:
+        spans.pop(file_str, None)
     
     # Add new definitions
-    if file_path.suffix == ".py" and file_path.exists():
+    if is_indexed_source(file_path) and file_path.exists():
         analyzer = ASTAnalyzer()
         new_definitions = analyzer.analyze_file(file_path)
         updated_index.extend(new_definitions)
+        if reference_index is not None:
+            reference_index.add_file(file_str, analyzer.references)
+        if call_graph is not None:
+            call_graph.add_file(file_str, analyzer.calls)
+        if fingerprint_index is not None:
+            fingerprint_index.add_file(file_str, analyzer.fingerprints)
+        if spans is not None and analyzer.statement_spans:
+            spans[file_str] = analyzer.statement_spans
         
         logger.info(f"Updated AST for {file_path}: {len(new_definitions)} definitions")
     
     return updated_index
+
+
+def update_ast_for_ranges(file_path: Path, ast_index: List[Dict[str, Any]],
+                          changed_ranges: List[Tuple[int, int, int]],
+                          spans: Dict[str, List[Tuple[int, int]]],
+                          reference_index: Optional[ReferenceIndex] = None,
+                          call_graph: Optional[CallGraph] = None,
+                          fingerprint_index: Optional[FingerprintIndex] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Update AST index for a modified file by re-parsing only the edited statements.
+    
+    Each changed range (old first line, old last line, new line count) is
+    widened to the top-level statements it overlaps. Only those slices of the
+    new file are parsed; definitions, references, call edges and fingerprints
+    outside them are kept and their line numbers shifted.
+    
+    Returns:
+        Updated AST index, or None if the file must be re-parsed in full
+        (no statement spans known, or a slice does not parse on its own)
+    """
+    file_str = str(file_path)
+    old_spans = spans.get(file_str)
+    if old_spans is None or not changed_ranges:
+        return None
+    
+    # Widen changed ranges to whole top-level statements, merging overlaps.
+    # Regions are (old start, old end, line delta) in old line numbers.
+    regions: List[List[int]] = []
+    for start, end, new_count in sorted(changed_ranges):
+        delta = new_count - (end - start + 1)
+        region_start, region_end = start, max(end, start - 1)
+        for span_start, span_end in old_spans:
+            if span_start <= end and span_end >= start:
+                region_start = min(region_start, span_start)
+                region_end = max(region_end, span_end)
+        if regions and region_start <= regions[-1][1] + 1:
+            regions[-1][1] = max(regions[-1][1], region_end)
+            regions[-1][2] += delta
+        else:
+            regions.append([region_start, region_end, delta])
+    
+    def _locate(line: int) -> Optional[int]:
+        """Get the line shift for an old line, or None if it is inside a region."""
+        shift = 0
+        for region_start, region_end, delta in regions:
+            if line < region_start:
+                break
+            if line <= region_end:
+                return None
+            shift += delta
+        return shift
+    
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        lines = data.decode('utf-8').splitlines(keepends=True)
+    except (OSError, UnicodeDecodeError) as e:
+        logger.warning(f"Could not read {file_path} for incremental update: {e}")
+        return None
+    
+    # Parse the new text of every region as a standalone module
+    analyzer = ASTAnalyzer()
+    analyzer.line_offsets = line_byte_offsets(data)
+    module_name = module_name_for_path(file_path)
+    new_definitions = []
+    new_references = []
+    new_calls = {}
+    new_fingerprints = {}
+    new_spans = []
+    shift = 0
+    for region_start, region_end, delta in regions:
+        new_start = region_start + shift
+        new_end = region_end + shift + delta
+        shift += delta
+        try:
+            tree = ast.parse("".join(lines[new_start - 1:new_end]), filename=file_str)
+        except SyntaxError:
+            return None
+        ast.increment_lineno(tree, new_start - 1)
+        
+        new_definitions.extend(analyzer._extract_imports(tree, file_path))
+        new_definitions.extend(analyzer._extract_functions(tree, file_path))
+        new_definitions.extend(analyzer._extract_classes(tree, file_path))
+        new_definitions.extend(analyzer._extract_variables(tree, file_path))
+        new_references.extend(analyzer._extract_references(tree))
+        new_calls.update(analyzer._extract_calls(tree, module_name))
+        if fingerprint_index is not None:
+            new_fingerprints.update(analyzer._extract_fingerprints(tree, module_name))
+        new_spans.extend(statement_spans(tree))
+    
+    # Keep (and shift) the definitions outside the regions
+    updated_index = []
+    kept_definitions = []
+    removed_functions = set()
+    for definition in ast_index:
+        if definition.get("file") != file_str:
+            updated_index.append(definition)
+            continue
+        line_shift = _locate(definition.get("line_start", definition.get("line", 0)))
+        if line_shift is None:
+            if definition.get("type") == "function":
+                removed_functions.add(definition.get("qualified_name"))
+            continue
+        if line_shift:
+            shift_definition_lines(definition, line_shift)
+        kept_definitions.append(definition)
+    
+    type_order = {"import": 0, "function": 1, "class": 2, "variable": 3}
+    file_definitions = kept_definitions + new_definitions
+    file_definitions.sort(key=lambda d: (type_order.get(d["type"], 4), d.get("line_start", d.get("line", 0))))
+    updated_index.extend(file_definitions)
+    
+    # Statement spans
+    kept_spans = []
+    for span_start, span_end in old_spans:
+        line_shift = _locate(span_start)
+        if line_shift is not None:
+            kept_spans.append((span_start + line_shift, span_end + line_shift))
+    spans[file_str] = sorted(kept_spans + new_spans)
+    
+    if reference_index is not None:
+        references = list(new_references)
+        for name, line, kind in reference_index.file_references(file_str):
+            line_shift = _locate(line)
+            if line_shift is not None:
+                references.append((name, line + line_shift, kind))
+        reference_index.update_file(file_str, references)
+    
+    if call_graph is not None:
+        calls = {caller: entry for caller, entry in call_graph.file_calls(file_str).items()
+                 if caller not in removed_functions}
+        calls.update(new_calls)
+        call_graph.update_file(file_str, calls)
+    
+    if fingerprint_index is not None:
+        fingerprints = {qualified_name: entry
+                        for qualified_name, entry in fingerprint_index.file_fingerprints(file_str).items()
+                        if qualified_name not in removed_functions}
+        fingerprints.update(new_fingerprints)
+        fingerprint_index.update_file(file_str, fingerprints)
+    
+    logger.info(f"Incrementally updated AST for {file_path}: {len(regions)} regions re-parsed, "
+                f"{len(new_definitions)} definitions")
+    return updated_index
+
+
+def update_references_for_file(file_path: Path, reference_index: Optional[ReferenceIndex],
+                               call_graph: Optional[CallGraph] = None,
+                               fingerprint_index: Optional[FingerprintIndex] = None,
+                               definitions: Optional[List[Dict[str, Any]]] = None):
+    """
+    Re-index only the references, call edges and fingerprints of a modified file.
+    
+    Used for edits that do not change definitions (e.g. a new call inside a
+    function body), so the definition list does not need to be rebuilt. If
+    the file's indexed definitions are given, their structure hashes are
+    refreshed in place.
+    """
+    file_str = str(file_path)
+    
+    if file_path.suffix in JS_EXTENSIONS and file_path.exists():
+        analyzer = ASTAnalyzer()
+        analyzer.analyze_file(file_path)
+        if reference_index is not None:
+            reference_index.update_file(file_str, analyzer.references)
+        return
+    
+    if file_path.suffix != ".py" or not file_path.exists():
+        if reference_index is not None:
+            reference_index.remove_file(file_str)
+        if call_graph is not None:
+            call_graph.remove_file(file_str)
+        if fingerprint_index is not None:
+            fingerprint_index.remove_file(file_str)
+        return
+    
+    try:
+        tree = ast.parse(file_cache.read_text(file_path), filename=file_str)
+    except (OSError, UnicodeDecodeError, SyntaxError) as e:
+        # Keep the previous postings until the file parses again
+        logger.warning(f"Could not re-index references of {file_path}: {e}")
+        return
+    
+    analyzer = ASTAnalyzer()
+    if reference_index is not None:
+        reference_index.update_file(file_str, analyzer._extract_references(tree))
+    module_name = module_name_for_path(file_path)
+    if call_graph is not None:
+        call_graph.update_file(file_str, analyzer._extract_calls(tree, module_name))
+    if fingerprint_index is not None:
+        fingerprint_index.update_file(file_str, analyzer._extract_fingerprints(tree, module_name))
+    if definitions:
+        structure = definition_structure(tree, module_name)
+        for definition in definitions:
+            entry = structure.get(definition.get("qualified_name"))
+            if entry is not None and definition.get("type") == entry[0]:
+                definition["structure_hash"] = entry[2]
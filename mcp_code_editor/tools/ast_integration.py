@@ -8,7 +8,9 @@ import ast
 import logging
 from typing import Dict, List, Any, Optional, Set, Tuple
 from pathlib import Path
+from ..core.file_cache import file_cache
 from .diff_simulator import simulate_diff_changes
+from .ast_analyzer import module_name_for_path, definition_structure, file_structure, compare_structure
 
 logger = logging.getLogger(__name__)
 
@@ -32,8 +34,7 @@ class ASTDiffAnalyzer:
         """
         try:
             # Parse current file
-            with open(file_path, 'r', encoding='utf-8') as f:
-                current_content = f.read()
+            current_content = file_cache.read_text(file_path)
             
             current_tree = ast.parse(current_content)
             
@@ -60,7 +61,7 @@ class ASTDiffAnalyzer:
             }
             
             # Detect what changed
-            changes = self._detect_ast_changes(current_tree, new_tree)
+            changes = self._detect_ast_changes(current_tree, new_tree, file_path)
             analysis["changes_detected"] = changes
             
             # Find affected definitions in the project
@@ -86,8 +87,16 @@ class ASTDiffAnalyzer:
             }
     
     
-    def _detect_ast_changes(self, old_tree: ast.AST, new_tree: ast.AST) -> Dict[str, List[str]]:
-        """Detect what changed between two AST trees."""
+    def _detect_ast_changes(self, old_tree: ast.AST, new_tree: ast.AST,
+                            file_path: Optional[str] = None) -> Dict[str, List[str]]:
+        """
+        Detect what changed between two AST trees.
+        
+        Functions and classes present in both trees are only reported as
+        modified when their structure hash changed. The old hashes come from
+        the AST index when it matches the current file, otherwise they are
+        computed from ``old_tree``.
+        """
         changes = {
             "functions_added": [],
             "functions_removed": [],
@@ -99,24 +108,28 @@ class ASTDiffAnalyzer:
             "imports_removed": []
         }
         
-        # Extract function and class names from both trees
-        old_functions = {node.name for node in ast.walk(old_tree) if isinstance(node, ast.FunctionDef)}
-        new_functions = {node.name for node in ast.walk(new_tree) if isinstance(node, ast.FunctionDef)}
-        
-        old_classes = {node.name for node in ast.walk(old_tree) if isinstance(node, ast.ClassDef)}
-        new_classes = {node.name for node in ast.walk(new_tree) if isinstance(node, ast.ClassDef)}
+        module_name = module_name_for_path(Path(file_path)) if file_path else "__main__"
+        old_structure = file_structure(old_tree, module_name, self._file_definitions(file_path))
+        new_structure = definition_structure(new_tree, module_name)
         
-        # Detect changes
-        changes["functions_added"] = list(new_functions - old_functions)
-        changes["functions_removed"] = list(old_functions - new_functions)
-        changes["functions_modified"] = list(old_functions & new_functions)  # Conservative: assume all existing are modified
-        
-        changes["classes_added"] = list(new_classes - old_classes)
-        changes["classes_removed"] = list(old_classes - new_classes)
-        changes["classes_modified"] = list(old_classes & new_classes)
+        for change, entries in compare_structure(old_structure, new_structure).items():
+            for _, definition_type, name in entries:
+                key = f"{'functions' if definition_type == 'function' else 'classes'}_{change}"
+                if name not in changes[key]:
+                    changes[key].append(name)
         
         return changes
     
+    def _file_definitions(self, file_path: Optional[str]) -> List[Dict[str, Any]]:
+        """Get the indexed definitions of a file."""
+        if not file_path or not self.ast_index:
+            return []
+        try:
+            normalized_file_path = str(Path(file_path).resolve())
+        except (OSError, ValueError):
+            normalized_file_path = file_path
+        return [d for d in self.ast_index if d.get("file") == normalized_file_path]
+    
     def _find_affected_definitions(self, file_path: str, changes: Dict[str, List[str]]) -> List[Dict[str, Any]]:
         """Find definitions in other files that might be affected by changes."""
         affected = []
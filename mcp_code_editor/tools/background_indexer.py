@@ -0,0 +1,200 @@
+"""
+Background AST indexing with progress reporting and file prioritization.
+"""
+import heapq
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from .ast_analyzer import ASTAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# Queue priorities: files requested by a query are indexed before the rest
+PRIORITY_REQUESTED = 0
+PRIORITY_DEFAULT = 1
+
+
+class BackgroundIndexer:
+    """
+    Builds the AST index of a project in a daemon thread.
+
+    Definitions, references, call edges and import edges are added to the
+    project state file by file (under ``project_state.index_lock``), so
+    queries can be served from the partial index while indexing runs.
+    Files needed by a query can be moved to the front of the queue with
+    ``prioritize`` and awaited with ``wait_for``.
+    """
+
+    def __init__(self, project_state: Any, files: List[Path]):
+        self.project_state = project_state
+        self.total_files = len(files)
+        self._queue: List[Tuple[int, int, str]] = [
+            (PRIORITY_DEFAULT, order, str(path)) for order, path in enumerate(files)
+        ]
+        self._files = {str(path) for path in files}
+        self._pending = set(self._files)
+        self._order = len(files)
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self.indexed_files = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether every file has been indexed."""
+        return self.finished_at is not None
+
+    def start(self):
+        """Start indexing in a background thread."""
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="ast-indexer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop indexing after the file being processed."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def join(self, timeout: Optional[float] = None):
+        """Wait for the indexing thread to exit (must not be called holding the index lock)."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def prioritize(self, paths: Iterable[str]) -> int:
+        """
+        Move files to the front of the queue.
+
+        Returns:
+            Number of pending files that were moved
+        """
+        moved = 0
+        with self._condition:
+            for path in paths:
+                file_str = self._normalize(path)
+                if file_str in self._pending:
+                    # The old queue entry is skipped once the file is indexed
+                    heapq.heappush(self._queue, (PRIORITY_REQUESTED, self._order, file_str))
+                    self._order += 1
+                    moved += 1
+        return moved
+
+    def prioritize_matching(self, text: str, limit: int = 20) -> int:
+        """Move pending files whose name contains ``text`` to the front of the queue."""
+        text = text.lower().split(".")[-1]
+        if not text:
+            return 0
+        with self._condition:
+            matching = [path for path in self._pending if text in Path(path).stem.lower()]
+        return self.prioritize(sorted(matching)[:limit])
+
+    def wait_for(self, paths: Iterable[str], timeout: float) -> bool:
+        """
+        Wait until the given files are indexed.
+
+        Returns:
+            True if none of the files is still pending
+        """
+        files = {self._normalize(path) for path in paths}
+        deadline = time.time() + timeout
+        with self._condition:
+            while not self._stopped and files & self._pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return not files & self._pending
+
+    def is_pending(self, path: str) -> bool:
+        """Whether a file has not been indexed yet."""
+        with self._condition:
+            return self._normalize(path) in self._pending
+
+    def mark_indexed(self, path: str):
+        """Record that a file was indexed elsewhere (e.g. refreshed after an edit)."""
+        with self._condition:
+            file_str = self._normalize(path)
+            if file_str in self._pending:
+                self._pending.discard(file_str)
+                self.indexed_files += 1
+                self._condition.notify_all()
+
+    def _normalize(self, path: str) -> str:
+        """Get the queue key of a path (as collected, or resolved if given differently)."""
+        file_str = str(path)
+        if file_str in self._files:
+            return file_str
+        return str(Path(file_str).resolve())
+
+    def _next_file(self) -> Optional[str]:
+        """Pop the next pending file, skipping stale queue entries."""
+        while self._queue:
+            _, _, file_str = heapq.heappop(self._queue)
+            if file_str in self._pending:
+                return file_str
+        return None
+
+    def _run(self):
+        """Index queued files until the queue is empty or indexing is stopped."""
+        analyzer = ASTAnalyzer()
+        state = self.project_state
+
+        while True:
+            with self._condition:
+                file_str = None if self._stopped else self._next_file()
+                if file_str is None:
+                    break
+
+            definitions = analyzer.analyze_file(Path(file_str))
+
+            with state.index_lock:
+                # A stopped indexer may have been replaced (e.g. by an imported
+                # index): its results must not reach the indexes
+                if self._stopped:
+                    break
+                # The file may have been refreshed by an edit in the meantime
+                if self.is_pending(file_str):
+                    state.index_generation += 1
+                    state.ast_index.extend(definitions)
+                    if state.reference_index is not None:
+                        state.reference_index.add_file(file_str, analyzer.references)
+                    if state.call_graph is not None:
+                        state.call_graph.add_file(file_str, analyzer.calls)
+                    if state.fingerprint_index is not None:
+                        state.fingerprint_index.add_file(file_str, analyzer.fingerprints)
+                    if analyzer.statement_spans:
+                        state.statement_spans[file_str] = analyzer.statement_spans
+                    if state.span_index is not None:
+                        state.span_index.add_file(file_str, definitions)
+                    if state.import_graph is not None:
+                        state.import_graph.add_file(file_str, [d for d in definitions if d["type"] == "import"])
+                    self.mark_indexed(file_str)
+
+        with self._condition:
+            if not self._stopped:
+                self.finished_at = time.time()
+                logger.info(f"Background AST indexing complete: {self.indexed_files} files, "
+                            f"{len(state.ast_index)} definitions in "
+                            f"{self.finished_at - self.started_at:.2f}s")
+            self._condition.notify_all()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get readiness and progress information."""
+        with self._condition:
+            pending = len(self._pending)
+            indexed = self.indexed_files
+        end = self.finished_at or time.time()
+        return {
+            "ready": self.ready,
+            "indexed_files": indexed,
+            "total_files": self.total_files,
+            "pending_files": pending,
+            "progress_percent": round(100.0 * indexed / self.total_files, 1) if self.total_files else 100.0,
+            "definitions": len(self.project_state.ast_index),
+            "elapsed_seconds": round(end - self.started_at, 2) if self.started_at else 0.0
+        }
@@ -0,0 +1,155 @@
+"""
+Call graph of the project: caller definition -> called names.
+"""
+import logging
+from collections import deque
+from typing import Dict, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CallGraph:
+    """
+    Edges from each function (by qualified name) to the names it calls.
+
+    Callees are plain names ("save", "Order") as written at the call site,
+    the same granularity used by the rest of the dependency analysis.
+    Callers are owned by their file, so modules with the same name in
+    different directories (e.g. two ``conftest.py``) do not share entries.
+    Reverse reachability ("who depends on X, up to N levels") is memoized;
+    when a file is re-indexed only the cached results that traversed one of
+    the names called from that file are dropped.
+    """
+
+    def __init__(self):
+        # file -> caller qualified name -> called names
+        self.file_edges: Dict[str, Dict[str, Set[str]]] = {}
+        # (file, caller qualified name) -> short name
+        self.caller_names: Dict[Tuple[str, str], str] = {}
+        # callee name -> (file, caller qualified name)
+        self.callers_by_callee: Dict[str, Set[Tuple[str, str]]] = {}
+        # (name, max_depth) -> {dependent name: (depth, parent name)}
+        self._reachability: Dict[Tuple[str, int], Dict[str, Tuple[int, str]]] = {}
+        # callee name -> cache keys whose traversal looked up its callers
+        self._cache_deps: Dict[str, Set[Tuple[str, int]]] = {}
+
+    def add_file(self, file_path: str, calls: Dict[str, Tuple[str, Set[str]]]):
+        """
+        Add (or replace) the call edges of a file.
+
+        Args:
+            file_path: Path of the Python file
+            calls: {caller qualified name: (caller name, called names)}
+        """
+        touched = self._drop_file(file_path)
+
+        edges = {}
+        for caller, (caller_name, callees) in calls.items():
+            edges[caller] = set(callees)
+            self.caller_names[(file_path, caller)] = caller_name
+            for callee in callees:
+                self.callers_by_callee.setdefault(callee, set()).add((file_path, caller))
+            touched.update(callees)
+        self.file_edges[file_path] = edges
+
+        self._invalidate(touched)
+
+    def update_file(self, file_path: str, calls: Dict[str, Tuple[str, Set[str]]]):
+        """Replace the call edges of a modified file."""
+        self.add_file(file_path, calls)
+
+    def remove_file(self, file_path: str):
+        """Remove all call edges of a file."""
+        self._invalidate(self._drop_file(file_path))
+
+    def _drop_file(self, file_path: str) -> Set[str]:
+        """Remove the edges of a file and return the callee names they used."""
+        touched = set()
+        for caller, callees in self.file_edges.pop(file_path, {}).items():
+            self.caller_names.pop((file_path, caller), None)
+            for callee in callees:
+                callers = self.callers_by_callee.get(callee)
+                if callers is not None:
+                    callers.discard((file_path, caller))
+                    if not callers:
+                        del self.callers_by_callee[callee]
+            touched.update(callees)
+        return touched
+
+    def file_calls(self, file_path: str) -> Dict[str, Tuple[str, Set[str]]]:
+        """Get the call edges of a file, in the format taken by ``add_file``."""
+        return {caller: (self.caller_names[(file_path, caller)], callees)
+                for caller, callees in self.file_edges.get(file_path, {}).items()}
+
+    def _invalidate(self, names: Set[str]):
+        """Drop cached reachability results that depend on the callers of ``names``."""
+        for name in names:
+            for key in self._cache_deps.pop(name, ()):
+                self._reachability.pop(key, None)
+
+    def direct_dependents(self, name: str) -> Set[str]:
+        """Get the names of the functions that call ``name`` (excluding recursion)."""
+        dependents = {self.caller_names[caller] for caller in self.callers_by_callee.get(name, ())}
+        dependents.discard(name)
+        return dependents
+
+    def reverse_reachable(self, name: str, max_depth: int) -> Dict[str, Tuple[int, str]]:
+        """
+        Get every name that depends on ``name`` within ``max_depth`` call levels.
+
+        Returns:
+            {dependent name: (depth, parent name)} where parent is the name the
+            dependent calls on a shortest path back to ``name``
+        """
+        key = (name, max_depth)
+        cached = self._reachability.get(key)
+        if cached is not None:
+            return cached
+
+        reached: Dict[str, Tuple[int, str]] = {}
+        visited = {name}
+        queue = deque([(name, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            if depth >= max_depth:
+                continue
+            self._cache_deps.setdefault(current, set()).add(key)
+            for dependent in self.direct_dependents(current):
+                if dependent not in visited:
+                    visited.add(dependent)
+                    reached[dependent] = (depth + 1, current)
+                    queue.append((dependent, depth + 1))
+
+        self._reachability[key] = reached
+        return reached
+
+    def dependency_chains(self, name: str, max_length: int) -> List[List[str]]:
+        """
+        Get the dependency chains starting at ``name``, up to ``max_length`` names.
+
+        One chain is returned for every dependent that does not lead any
+        further within the depth limit, following shortest paths, so the cost
+        is proportional to the edges visited instead of the number of paths.
+        """
+        reached = self.reverse_reachable(name, max_length - 1)
+        parents = {parent for _, parent in reached.values()}
+
+        chains = []
+        for dependent in sorted(reached):
+            if dependent in parents:
+                continue
+            chain = [dependent]
+            while chain[-1] != name:
+                chain.append(reached[chain[-1]][1])
+            chain.reverse()
+            chains.append(chain)
+        return chains
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get graph size statistics."""
+        return {
+            "files": len(self.file_edges),
+            "callers": len(self.caller_names),
+            "edges": sum(len(callees) for edges in self.file_edges.values()
+                         for callees in edges.values())
+        }
@@ -0,0 +1,199 @@
+"""
+Class hierarchy index: classes, their resolved bases and their subclasses.
+"""
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from .ast_analyzer import module_name_for_path
+from .import_graph import resolve_import_module
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of package re-exports followed when resolving a base class
+_MAX_REEXPORT_HOPS = 5
+
+
+class ClassHierarchy:
+    """
+    Bases and direct subclasses of every class in the AST index.
+
+    Base class expressions are resolved to qualified names using the classes
+    of the same file and the import records of the file (relative imports and
+    package ``__init__`` re-exports included). Bases that cannot be resolved
+    to a project class (``Exception``, third-party classes) keep their textual
+    name, so "subclasses of Exception" still works.
+
+    Transitive subclass queries are memoized, so repeated impact checks cost
+    O(subtree size).
+    """
+
+    def __init__(self, ast_index: List[Dict[str, Any]]):
+        self.classes: Dict[str, Dict[str, Any]] = {}
+        self.bases: Dict[str, List[str]] = {}
+        self.subclasses: Dict[str, List[str]] = {}
+        self._by_name: Dict[str, List[str]] = {}
+        self._module_files: Dict[str, str] = {}
+        # file -> {bound name: import record}
+        self._file_imports: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._subtree_cache: Dict[str, List[Tuple[str, int]]] = {}
+        self._build(ast_index)
+
+    def _build(self, ast_index: List[Dict[str, Any]]):
+        """Index classes and imports, then resolve every base."""
+        for definition in ast_index:
+            file_path = definition.get("file", "")
+            if file_path not in self._file_imports:
+                self._file_imports[file_path] = {}
+                self._module_files[module_name_for_path(Path(file_path))] = file_path
+
+            if definition.get("type") == "import":
+                self._file_imports[file_path][definition["name"]] = definition
+            elif definition.get("type") == "class":
+                qualified_name = definition.get("qualified_name") or definition["name"]
+                self.classes[qualified_name] = definition
+                self._by_name.setdefault(definition["name"], []).append(qualified_name)
+
+        for qualified_name, definition in self.classes.items():
+            bases = [self.resolve(definition["file"], base, definition.get("parent"))
+                     for base in definition.get("inheritance", []) if base != "unknown"]
+            self.bases[qualified_name] = bases
+            for base in bases:
+                self.subclasses.setdefault(base, []).append(qualified_name)
+
+        logger.debug(f"Class hierarchy built: {len(self.classes)} classes")
+
+    def resolve(self, file_path: str, base: str, scope: Optional[str] = None) -> str:
+        """
+        Resolve a base class expression written in a file to a qualified name.
+
+        Args:
+            file_path: File containing the class definition
+            base: Base expression as written ("Base", "models.Base")
+            scope: Qualified name of the block enclosing the class definition
+        """
+        module_name = module_name_for_path(Path(file_path))
+        head, _, rest = base.partition(".")
+
+        # Classes of the same module (or of the enclosing block)
+        for prefix in filter(None, (scope, module_name)):
+            candidate = f"{prefix}.{base}"
+            if candidate in self.classes:
+                return candidate
+
+        target = None
+        imports = self._file_imports.get(file_path, {})
+        if head in imports:
+            target = self._import_target(imports[head], file_path)
+            if target and rest:
+                target = f"{target}.{rest}"
+        else:
+            # "import pkg.models" binds the dotted name itself
+            parts = base.split(".")
+            for end in range(len(parts) - 1, 0, -1):
+                record = imports.get(".".join(parts[:end]))
+                if record is not None:
+                    target = ".".join([record.get("module") or ""] + parts[end:])
+                    break
+
+        return self._follow_reexports(target) if target else base
+
+    def _import_target(self, record: Dict[str, Any], file_path: str) -> Optional[str]:
+        """Get the qualified name bound by an import record."""
+        if record.get("import_type") != "from":
+            return record.get("module")
+        module = resolve_import_module(record, module_name_for_path(Path(file_path)),
+                                       Path(file_path).stem == "__init__")
+        if module is None:
+            return None
+        return f"{module}.{record['from_name']}" if module else record["from_name"]
+
+    def _follow_reexports(self, qualified_name: str) -> str:
+        """Follow "from .impl import Foo" re-exports until a known class is found."""
+        for _ in range(_MAX_REEXPORT_HOPS):
+            if qualified_name in self.classes:
+                return qualified_name
+            module, _, name = qualified_name.rpartition(".")
+            file_path = self._module_files.get(module)
+            record = self._file_imports.get(file_path, {}).get(name) if file_path else None
+            if record is None:
+                break
+            target = self._import_target(record, file_path)
+            if not target or target == qualified_name:
+                break
+            qualified_name = target
+        return qualified_name
+
+    def find(self, name: str) -> List[str]:
+        """Get the qualified names of the classes matching a name or qualified name."""
+        if name in self.classes:
+            return [name]
+        if "." in name:
+            return [q for q in self.classes if q.endswith(f".{name}")]
+        return list(self._by_name.get(name, []))
+
+    def direct_subclasses(self, qualified_name: str) -> List[str]:
+        """Get the classes that directly inherit from a class."""
+        return list(self.subclasses.get(qualified_name, []))
+
+    def all_subclasses(self, qualified_name: str) -> List[Tuple[str, int]]:
+        """
+        Get every class inheriting from a class, directly or indirectly.
+
+        Returns:
+            List of (qualified name, depth) pairs in breadth-first order
+        """
+        cached = self._subtree_cache.get(qualified_name)
+        if cached is not None:
+            return cached
+
+        result = []
+        seen = {qualified_name}
+        queue = deque([(qualified_name, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            for subclass in self.subclasses.get(current, ()):
+                if subclass not in seen:
+                    seen.add(subclass)
+                    result.append((subclass, depth + 1))
+                    queue.append((subclass, depth + 1))
+
+        self._subtree_cache[qualified_name] = result
+        return result
+
+    def ancestors(self, qualified_name: str) -> List[Tuple[str, int]]:
+        """Get every base of a class, directly or indirectly, as (name, depth) pairs."""
+        result = []
+        seen = {qualified_name}
+        queue = deque([(qualified_name, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            for base in self.bases.get(current, ()):
+                if base not in seen:
+                    seen.add(base)
+                    result.append((base, depth + 1))
+                    queue.append((base, depth + 1))
+        return result
+
+
+# Cached hierarchy, the index list it was built from and its index generation
+_hierarchy_cache: Dict[str, Tuple[List[Dict[str, Any]], Tuple[Optional[int], int], ClassHierarchy]] = {}
+
+
+def get_class_hierarchy(ast_index: List[Dict[str, Any]], cache_key: str = "project",
+                        generation: Optional[int] = None) -> ClassHierarchy:
+    """
+    Get the class hierarchy for an AST index, rebuilding it if the index changed.
+
+    ``generation`` is the index generation of the project state owning the
+    index; without it, only a change of the list length is detected.
+    """
+    version = (generation, len(ast_index))
+    cached = _hierarchy_cache.get(cache_key)
+    if cached and cached[0] is ast_index and cached[1] == version:
+        return cached[2]
+
+    hierarchy = ClassHierarchy(ast_index)
+    _hierarchy_cache[cache_key] = (ast_index, version, hierarchy)
+    return hierarchy
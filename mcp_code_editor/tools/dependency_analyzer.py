@@ -14,18 +14,40 @@ from pathlib import Path
 import subprocess
 import tempfile
 import json
+from ..core.file_cache import file_cache
 from .diff_simulator import simulate_diff_changes
+from .ast_analyzer import module_name_for_path, definition_structure, file_structure, compare_structure
+from .name_resolver import NameResolver, MIN_REFERENCE_CONFIDENCE
 
 logger = logging.getLogger(__name__)
 
+# Tipo de referencia y confianza para cada kind del índice de referencias
+# (equivalente a lo que detecta _find_detailed_references)
+_INDEXED_REFERENCE_TYPES = {
+    "call": ("function_call", 0.9),
+    "import": ("import", 1.0),
+    "name": ("name_reference", 0.7),
+    "attribute": ("attribute_reference", 0.8),
+}
+
+# Kind del índice de referencias equivalente a cada tipo de _find_detailed_references
+_DETAILED_REFERENCE_KINDS = {ref_type: kind for kind, (ref_type, _) in _INDEXED_REFERENCE_TYPES.items()}
+
 
 class DependencyAnalyzer:
     """
     Analiza dependencias y detecta el impacto de cambios en funciones/clases.
     """
     
-    def __init__(self, ast_index: List[Dict]):
+    def __init__(self, ast_index: List[Dict], project_state: Any = None):
         self.ast_index = ast_index
+        # Índices auxiliares del proyecto (opcionales)
+        self.reference_index = getattr(project_state, "reference_index", None)
+        self.import_graph = getattr(project_state, "import_graph", None)
+        self.call_graph = getattr(project_state, "call_graph", None)
+        self.token_index = getattr(project_state, "token_index", None)
+        self.span_index = getattr(project_state, "span_index", None)
+        self.index_generation = getattr(project_state, "index_generation", None)
         self._build_dependency_graph()
     
     def _build_dependency_graph(self):
@@ -76,11 +98,11 @@ class DependencyAnalyzer:
         
         try:
             # Leer contenido actual del archivo
-            with open(file_path, 'r', encoding='utf-8') as f:
-                current_content = f.read()
+            current_content = file_cache.read_text(file_path)
             
             # Detectar qué funciones/clases se están modificando
-            modified_items = self._detect_modified_items(current_content, diff_blocks)
+            modified_items = self._detect_modified_items(current_content, diff_blocks, file_path)
+            modified_items = self._drop_unchanged_items(file_path, current_content, diff_blocks, modified_items)
             analysis["modified_functions"] = modified_items["functions"]
             analysis["modified_classes"] = modified_items["classes"]
             
@@ -132,10 +154,45 @@ class DependencyAnalyzer:
         
         return filtered_analysis
     
-    def _detect_modified_items(self, current_content: str, diff_blocks: List[Dict]) -> Dict[str, List[str]]:
-        """Detecta qué funciones y clases se están modificando."""
+    @staticmethod
+    def _block_line_range(block: Dict) -> Tuple[int, int]:
+        """
+        Primera y última línea originales que reemplaza un bloque de diff.
+        
+        Sin end_line (o con end_line None) el bloque abarca tantas líneas como
+        su search_content.
+        """
+        start_line = block.get("start_line") or 1
+        end_line = block.get("end_line")
+        if end_line is None:
+            end_line = start_line + max(len(block.get("search_content", "").splitlines()), 1) - 1
+        return start_line, end_line
+    
+    def _detect_modified_items(self, current_content: str, diff_blocks: List[Dict],
+                               file_path: Optional[str] = None) -> Dict[str, List[str]]:
+        """
+        Detecta qué funciones y clases se están modificando.
+        
+        Con índice de spans, cada bloque es una búsqueda binaria en los spans
+        del archivo; sin él se re-parsea el contenido actual.
+        """
         modified_items = {"functions": [], "classes": []}
         
+        spans = None
+        if self.span_index is not None and file_path:
+            try:
+                spans = self.span_index.file_spans(str(Path(file_path).resolve()))
+            except (OSError, ValueError):
+                spans = None
+        if spans is not None:
+            for block in diff_blocks:
+                start_line, end_line = self._block_line_range(block)
+                for definition in spans.overlapping(start_line, end_line):
+                    key = "functions" if definition["type"] == "function" else "classes"
+                    if definition["name"] not in modified_items[key]:
+                        modified_items[key].append(definition["name"])
+            return modified_items
+        
         try:
             current_tree = ast.parse(current_content)
             
@@ -144,8 +201,7 @@ class DependencyAnalyzer:
             
             # Para cada bloque de diff, verificar qué definiciones afecta
             for block in diff_blocks:
-                start_line = block.get("start_line", 1)
-                end_line = block.get("end_line", start_line)
+                start_line, end_line = self._block_line_range(block)
                 
                 for name, info in current_definitions.items():
                     def_start = info["line_start"]
@@ -165,6 +221,38 @@ class DependencyAnalyzer:
         
         return modified_items
     
+    def _drop_unchanged_items(self, file_path: str, current_content: str, diff_blocks: List[Dict],
+                              modified_items: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """
+        Quita los items cuyo hash estructural no cambia al aplicar los bloques.
+        
+        Los bloques tocan todas las definiciones que los contienen, pero
+        editar comentarios, docstrings o formato, o el cuerpo de un método,
+        no cambia la clase que lo contiene. Si el contenido simulado no
+        parsea se mantienen todos los items.
+        """
+        try:
+            current_tree = ast.parse(current_content)
+            modified_tree = ast.parse(simulate_diff_changes(current_content, diff_blocks))
+        except (SyntaxError, ValueError):
+            return modified_items
+        
+        try:
+            normalized_file_path = str(Path(file_path).resolve())
+        except (OSError, ValueError):
+            normalized_file_path = file_path
+        module_name = module_name_for_path(Path(normalized_file_path))
+        indexed = [d for d in self.ast_index if d.get("file") == normalized_file_path]
+        comparison = compare_structure(file_structure(current_tree, module_name, indexed),
+                                       definition_structure(modified_tree, module_name))
+        
+        changed = {(definition_type, name)
+                   for _, definition_type, name in comparison["modified"] + comparison["removed"]}
+        return {
+            "functions": [name for name in modified_items["functions"] if ("function", name) in changed],
+            "classes": [name for name in modified_items["classes"] if ("class", name) in changed]
+        }
+    
     def _extract_definitions_with_lines(self, tree: ast.AST) -> Dict[str, Dict]:
         """Extrae definiciones con sus números de línea."""
         definitions = {}
@@ -323,6 +411,16 @@ class DependencyAnalyzer:
         except (OSError, ValueError):
             normalized_file_path = file_path
         
+        # Archivos que pueden ver cada item (importadores transitivos del módulo)
+        candidate_files = self._find_candidate_files(normalized_file_path, modified_items)
+        
+        # Con índice de referencias: búsqueda directa en el diccionario
+        if self.reference_index is not None:
+            return self._find_indexed_callers(normalized_file_path, modified_items, candidate_files)
+        
+        resolver = NameResolver(self.ast_index, self.import_graph, modified_items, self.index_generation)
+        targets = self._find_target_definitions(normalized_file_path, modified_items)
+        
         # Obtener archivos únicos para análisis
         files_to_analyze = set()
         for definition in self.ast_index:
@@ -330,30 +428,167 @@ class DependencyAnalyzer:
             if def_file and def_file != normalized_file_path:
                 files_to_analyze.add(def_file)
         
+        # Archivos que contienen cada item como token (None: índice no disponible)
+        token_files = {}
+        if self.token_index is not None:
+            token_files = {item_name: self.token_index.candidate_files([item_name])
+                           for item_name in modified_items}
+        
         # Analizar cada archivo usando AST
         for file_to_analyze in files_to_analyze:
             for item_name in modified_items:
+                allowed_files = candidate_files.get(item_name)
+                if allowed_files is not None and file_to_analyze not in allowed_files:
+                    continue
+                containing_files = token_files.get(item_name)
+                if containing_files is not None and file_to_analyze not in containing_files:
+                    continue
                 references = self._find_detailed_references(file_to_analyze, item_name)
                 for ref in references:
+                    resolution = self._resolve_reference(
+                        resolver, targets.get(item_name, []), file_to_analyze, ref.get("line", 0),
+                        _DETAILED_REFERENCE_KINDS.get(ref.get("type")), ref.get("confidence", 0.5))
+                    if resolution is None:
+                        continue
                     affected_callers.append({
                         "caller_name": ref.get("context", f"Reference in {Path(file_to_analyze).name}"),
                         "caller_type": ref.get("type", "unknown"),
                         "file": file_to_analyze,
                         "line": ref.get("line", 0),
+                        "enclosing_definition": self._enclosing_definition(file_to_analyze, ref.get("line", 0)),
                         "calls": item_name,
-                        "confidence": ref.get("confidence", 0.5),
+                        "confidence": resolution[0],
+                        "resolution": resolution[1],
                         "reference_type": ref.get("type", "unknown")
                     })
         
         return affected_callers
     
+    def _enclosing_definition(self, file_path: str, line: int) -> Optional[str]:
+        """Nombre calificado de la función o clase que contiene una línea (None a nivel de módulo)."""
+        if self.span_index is None:
+            return None
+        definition = self.span_index.enclosing(file_path, line)
+        if definition is None:
+            return None
+        return definition.get("qualified_name") or definition["name"]
+    
+    def _find_candidate_files(self, normalized_file_path: str, modified_items: List[str]) -> Dict[str, Optional[Set[str]]]:
+        """
+        Determina qué archivos pueden referenciar cada item modificado.
+        
+        Sin grafo de imports, o para métodos y funciones anidadas (alcanzables a
+        través de objetos), el valor es None y se consideran todos los archivos.
+        """
+        if self.import_graph is None:
+            return {}
+        
+        definitions_by_name: Dict[str, List[Dict]] = {name: [] for name in modified_items}
+        for definition in self.ast_index:
+            if definition.get("file") == normalized_file_path and definition.get("name") in definitions_by_name:
+                definitions_by_name[definition["name"]].append(definition)
+        
+        return {name: self.import_graph.visible_files(definitions)
+                for name, definitions in definitions_by_name.items()}
+    
+    def _find_target_definitions(self, normalized_file_path: str, modified_items: List[str]) -> Dict[str, List[Dict]]:
+        """Obtiene las definiciones (funciones y clases) del archivo modificado para cada item."""
+        targets: Dict[str, List[Dict]] = {name: [] for name in modified_items}
+        for definition in self.ast_index:
+            if (definition.get("file") == normalized_file_path and definition.get("name") in targets
+                    and definition.get("type") in ("function", "class")):
+                targets[definition["name"]].append(definition)
+        return targets
+    
+    def _resolve_reference(self, resolver: NameResolver, targets: List[Dict], ref_file: str, line: int,
+                           kind: Optional[str], default_confidence: float,
+                           name: Optional[str] = None) -> Optional[Tuple[float, str]]:
+        """
+        Calcula la confianza de que una referencia apunte a alguna de las definiciones modificadas.
+        
+        Devuelve None si la referencia no supera MIN_REFERENCE_CONFIDENCE. Si no
+        puede resolverse (variables, archivo ilegible, tipo desconocido) se
+        mantiene la confianza por defecto del tipo de referencia.
+        """
+        best = None
+        for target in targets:
+            result = resolver.resolve(target, ref_file, line, kind, name)
+            if result is not None and (best is None or result[0] > best[0]):
+                best = result
+        if best is None:
+            return default_confidence, "unresolved"
+        if best[0] < MIN_REFERENCE_CONFIDENCE:
+            return None
+        return best
+    
+    def _find_indexed_callers(self, normalized_file_path: str, modified_items: List[str],
+                              candidate_files: Optional[Dict[str, Optional[Set[str]]]] = None) -> List[Dict]:
+        """Encuentra callers usando el índice de referencias (sin re-parsear archivos)."""
+        affected_callers = []
+        file_contents = {}
+        candidate_files = candidate_files or {}
+        resolver = NameResolver(self.ast_index, self.import_graph, modified_items, self.index_generation)
+        targets = self._find_target_definitions(normalized_file_path, modified_items)
+        
+        # Referencias a través de alias ("from m import item as alias")
+        aliases: Dict[str, List[Tuple[str, str]]] = {}
+        for item_name in modified_items:
+            for target in targets[item_name]:
+                for alias_file, alias in resolver.alias_references(target):
+                    if (alias_file, alias) not in aliases.setdefault(item_name, []):
+                        aliases[item_name].append((alias_file, alias))
+        resolver.add_names(alias for pairs in aliases.values() for _, alias in pairs)
+        
+        for item_name in modified_items:
+            allowed_files = candidate_files.get(item_name)
+            references = [(ref, None) for ref in self.reference_index.lookup(item_name, kinds=set(_INDEXED_REFERENCE_TYPES))]
+            for alias_file, alias in aliases.get(item_name, []):
+                references += [(ref, alias) for ref in self.reference_index.lookup(alias, kinds={"call", "name"})
+                               if ref["file"] == alias_file]
+            
+            for ref, alias in references:
+                ref_file = ref["file"]
+                if ref_file == normalized_file_path:
+                    continue
+                if allowed_files is not None and ref_file not in allowed_files:
+                    continue
+                
+                ref_type, confidence = _INDEXED_REFERENCE_TYPES[ref["kind"]]
+                resolution = self._resolve_reference(resolver, targets[item_name], ref_file, ref["line"],
+                                                     ref["kind"], confidence, alias)
+                if resolution is None:
+                    continue
+                if ref_type == "import":
+                    context = f"Import: {item_name}"
+                else:
+                    if ref_file not in file_contents:
+                        try:
+                            file_contents[ref_file] = file_cache.read_text(ref_file)
+                        except (OSError, UnicodeDecodeError) as e:
+                            logger.error(f"Error reading {ref_file}: {e}")
+                            file_contents[ref_file] = ""
+                    context = self._get_surrounding_context(file_contents[ref_file], ref["line"])
+                
+                affected_callers.append({
+                    "caller_name": context or f"Reference in {Path(ref_file).name}",
+                    "caller_type": ref_type,
+                    "file": ref_file,
+                    "line": ref["line"],
+                    "enclosing_definition": self._enclosing_definition(ref_file, ref["line"]),
+                    "calls": item_name,
+                    "confidence": resolution[0],
+                    "resolution": resolution[1],
+                    "reference_type": ref_type
+                })
+        
+        return affected_callers
+    
     def _find_detailed_references(self, file_path: str, function_name: str) -> List[Dict]:
         """Análisis AST real del código fuente para encontrar referencias."""
         references = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = file_cache.read_text(file_path)
             
             tree = ast.parse(content)
             
@@ -426,36 +661,38 @@ class DependencyAnalyzer:
         return ' | '.join(context_lines_content).strip()
     
     def _analyze_inheritance_impact(self, class_name: str, changes: Dict) -> List[Dict]:
-        """Analiza impacto en herencia de clases."""
-        inheritance_issues = []
+        """Analiza impacto en herencia de clases usando el índice de jerarquía."""
+        from .class_hierarchy import get_class_hierarchy
         
-        # Buscar clases que heredan de esta
-        for definition in self.ast_index:
-            if definition.get("type") == "class":
-                inheritance = definition.get("inheritance", [])
-                if class_name in inheritance:
-                    inheritance_issues.append({
-                        "derived_class": definition.get("name"),
-                        "file": definition.get("file"),
-                        "impact": "may_break_inheritance",
-                        "severity": "high",
-                        "line": definition.get("line_start", definition.get("line", 0))
-                    })
+        inheritance_issues = []
+        hierarchy = get_class_hierarchy(self.ast_index, generation=self.index_generation)
         
-        # Buscar clases de las que esta hereda (cambios en clases padre)
-        for definition in self.ast_index:
-            if definition.get("type") == "class" and definition.get("name") == class_name:
-                inheritance = definition.get("inheritance", [])
-                for parent_class in inheritance:
-                    # Verificar si alguna clase padre fue modificada
-                    inheritance_issues.append({
-                        "derived_class": class_name,
-                        "parent_class": parent_class,
-                        "file": definition.get("file"),
-                        "impact": "parent_class_changed",
-                        "severity": "medium",
-                        "line": definition.get("line_start", definition.get("line", 0))
-                    })
+        for qualified_name in hierarchy.find(class_name):
+            definition = hierarchy.classes[qualified_name]
+            
+            # Clases que heredan de esta (directa o indirectamente)
+            for subclass, depth in hierarchy.all_subclasses(qualified_name):
+                derived = hierarchy.classes.get(subclass, {})
+                inheritance_issues.append({
+                    "derived_class": derived.get("name", subclass),
+                    "qualified_name": subclass,
+                    "file": derived.get("file"),
+                    "impact": "may_break_inheritance",
+                    "severity": "high" if depth == 1 else "medium",
+                    "depth": depth,
+                    "line": derived.get("line_start", derived.get("line", 0))
+                })
+            
+            # Clases de las que esta hereda (cambios en clases padre)
+            for parent_class in hierarchy.bases.get(qualified_name, []):
+                inheritance_issues.append({
+                    "derived_class": class_name,
+                    "parent_class": parent_class,
+                    "file": definition.get("file"),
+                    "impact": "parent_class_changed",
+                    "severity": "medium",
+                    "line": definition.get("line_start", definition.get("line", 0))
+                })
         
         return inheritance_issues
     
@@ -482,6 +719,12 @@ class DependencyAnalyzer:
         """Traza cadenas de dependencia hasta N niveles."""
         chains = []
         
+        # Con grafo de llamadas: alcanzabilidad inversa memoizada
+        if self.call_graph is not None:
+            for item in modified_items:
+                chains.extend(self.call_graph.dependency_chains(item, max_depth))
+            return chains
+        
         for item in modified_items:
             chain = [item]
             self._build_chain_recursive(item, chain, chains, max_depth, set())
@@ -511,6 +754,9 @@ class DependencyAnalyzer:
     
     def _find_direct_dependents(self, item_name: str) -> List[str]:
         """Encuentra elementos que dependen directamente del item especificado."""
+        if self.call_graph is not None:
+            return sorted(self.call_graph.direct_dependents(item_name))
+        
         dependents = []
         
         for definition in self.ast_index:
@@ -881,7 +1127,7 @@ class DependencyAnalyzer:
 
 
 def enhance_apply_diff_with_dependencies(file_path: str, diff_blocks: List[Dict], 
-                                       ast_index: List[Dict]) -> Dict[str, Any]:
+                                       ast_index: List[Dict], project_state: Any = None) -> Dict[str, Any]:
     """
     Función principal para integrar análisis de dependencias en apply_diff_tool.
     
@@ -889,12 +1135,13 @@ def enhance_apply_diff_with_dependencies(file_path: str, diff_blocks: List[Dict]
         file_path: Archivo siendo modificado
         diff_blocks: Bloques de cambios
         ast_index: Índice AST del proyecto
+        project_state: ProjectState opcional con índices auxiliares (referencias, etc.)
         
     Returns:
         Análisis de dependencias e impacto
     """
     try:
-        analyzer = DependencyAnalyzer(ast_index)
+        analyzer = DependencyAnalyzer(ast_index, project_state)
         dependency_analysis = analyzer.analyze_diff_dependencies(file_path, diff_blocks)
         
         return {
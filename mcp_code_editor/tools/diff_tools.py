@@ -4,6 +4,7 @@ Apply diff tool for precise file modifications.
 import logging
 from typing import Dict, List, Any
 from ..core.models import DiffBlock, DiffBuilder, FileModifier
+from .line_index import line_index
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +61,7 @@ def apply_diff(file_path: str, diff_blocks: List[Dict[str, Any]], force: bool =
         
         # Save the file
         modifier.save_file(new_content)
+        line_index.invalidate(file_path)
         
         # Build the diff string for logging/debugging purposes
         diff_string = DiffBuilder.build_diff_string(validated_blocks)
@@ -81,7 +83,9 @@ def apply_diff(file_path: str, diff_blocks: List[Dict[str, Any]], force: bool =
             "original_lines": original_lines,
             "new_lines": new_lines,
             "lines_changed": lines_modified,
-            "net_line_change": new_lines - original_lines
+            "net_line_change": new_lines - original_lines,
+            # Exact replaced ranges, used for incremental re-indexing
+            "applied_ranges": sorted(modifier.applied_ranges)
         }
         
     except FileNotFoundError as e:
@@ -5,6 +5,8 @@ import logging
 import shutil
 from pathlib import Path
 from typing import Dict, Any, Optional
+from ..core.file_cache import file_cache
+from .line_index import line_index, read_line_range
 
 logger = logging.getLogger(__name__)
 
@@ -34,8 +36,8 @@ def create_file(path: str, content: str, overwrite: bool = False) -> Dict[str, A
         # No backup creation - backup functionality disabled
         
         # Write content to file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        file_cache.write_text(file_path, content)
+        line_index.invalidate(file_path)
         
         # Get file stats
         lines_count = len(content.splitlines())
@@ -87,14 +89,19 @@ def create_file(path: str, content: str, overwrite: bool = False) -> Dict[str, A
         }
 
 
-def read_file_with_lines(path: str, start_line: Optional[int] = None, end_line: Optional[int] = None) -> Dict[str, Any]:
+def read_file_with_lines(path: str, start_line: Optional[int] = None, end_line: Optional[int] = None,
+                         include_plain: bool = True) -> Dict[str, Any]:
     """
     Read a text file and return its content with line numbers.
     
+    Line offsets are cached per file (and revalidated with its mtime and
+    size), so reading a line range only decodes the bytes of that range.
+    
     Args:
         path: The file path to read
         start_line: Optional starting line number (1-indexed, inclusive)
         end_line: Optional ending line number (1-indexed, inclusive)
+        include_plain: Whether to include the content without line numbers
         
     Returns:
         Dictionary with file content, line numbers, and metadata
@@ -112,11 +119,8 @@ def read_file_with_lines(path: str, start_line: Optional[int] = None, end_line:
         if not file_path.is_file():
             raise ValueError(f"Path is not a file: {path}")
         
-        # Read file content
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        total_lines = len(lines)
+        offsets = line_index.offsets(file_path)
+        total_lines = len(offsets) - 1
         
         # Apply line range filtering if specified
         if start_line is not None:
@@ -140,34 +144,26 @@ def read_file_with_lines(path: str, start_line: Optional[int] = None, end_line:
             raise ValueError(f"start_line ({start_line}) cannot be greater than end_line ({end_line})")
         
         # Get the requested lines
-        selected_lines = lines[start_idx:end_idx]
+        content_lines = read_line_range(file_path, offsets, start_idx + 1, end_idx) if end_idx > start_idx else []
         
         # Format content with line numbers
-        numbered_lines = []
-        content_lines = []
-        
-        for i, line in enumerate(selected_lines):
-            line_number = start_idx + i + 1
-            line_content = line.rstrip('\n\r')  # Remove line endings for display
-            numbered_lines.append(f"{line_number:4d}: {line_content}")
-            content_lines.append(line_content)
-        
-        numbered_content = '\n'.join(numbered_lines)
-        plain_content = '\n'.join(content_lines)
+        numbered_lines = [f"{start_idx + i + 1:4d}: {line_content}" for i, line_content in enumerate(content_lines)]
         
-        return {
+        result = {
             "success": True,
             "file_path": str(file_path),
             "total_lines": total_lines,
-            "displayed_lines": len(selected_lines),
+            "displayed_lines": len(content_lines),
             "line_range": {
                 "start": start_idx + 1,
-                "end": start_idx + len(selected_lines)
+                "end": start_idx + len(content_lines)
             },
-            "content_with_numbers": numbered_content,
-            "plain_content": plain_content,
+            "content_with_numbers": '\n'.join(numbered_lines),
             "encoding": "utf-8"
         }
+        if include_plain:
+            result["plain_content"] = '\n'.join(content_lines)
+        return result
         
     except FileNotFoundError as e:
         logger.error(f"File not found: {e}")
@@ -231,6 +227,8 @@ def delete_file(path: str, create_backup: bool = False) -> Dict[str, Any]:
         
         # Eliminar el archivo (sin backup)
         file_path.unlink()
+        file_cache.invalidate(file_path)
+        line_index.invalidate(file_path)
         
         logger.info(f"Deleted file: {file_path} ({file_size} bytes)")
         if dependency_warnings:
@@ -0,0 +1,201 @@
+"""
+Winnowing fingerprints of function bodies, for duplicate and similar code detection.
+"""
+import logging
+import zlib
+from typing import Dict, List, Any, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tokens per hashed k-gram and k-grams per winnowing window: any shared run of
+# at least KGRAM_SIZE + WINNOW_WINDOW - 1 tokens yields a shared fingerprint
+KGRAM_SIZE = 8
+WINNOW_WINDOW = 6
+
+# Functions shorter than this many tokens are left out of duplicate reports by default
+MIN_TOKENS = 30
+
+# Fingerprints shared by more functions than this are boilerplate and ignored by queries
+MAX_POSTING_SIZE = 50
+
+_HASH_BASE = 1000003
+_HASH_MASK = (1 << 61) - 1
+
+_token_hashes: Dict[str, int] = {}
+
+
+def _token_hash(token: str) -> int:
+    value = _token_hashes.get(token)
+    if value is None:
+        value = _token_hashes[token] = zlib.crc32(token.encode("utf-8"))
+    return value
+
+
+def winnow(tokens: List[str], k: int = KGRAM_SIZE, window: int = WINNOW_WINDOW) -> Set[int]:
+    """
+    Select the winnowing fingerprints of a token sequence.
+
+    Every k-gram is hashed with a rolling hash; in each window of ``window``
+    consecutive hashes the minimum (the rightmost one on ties) is kept.
+    """
+    if len(tokens) < k:
+        return set()
+
+    values = [_token_hash(token) for token in tokens]
+    high = pow(_HASH_BASE, k - 1, 1 << 61)
+    hashes = []
+    current = 0
+    for position, value in enumerate(values):
+        if position >= k:
+            current = (current - values[position - k] * high) & _HASH_MASK
+        current = (current * _HASH_BASE + value) & _HASH_MASK
+        if position >= k - 1:
+            hashes.append(current)
+
+    if len(hashes) <= window:
+        return {min(hashes)}
+
+    fingerprints = set()
+    selected = -1
+    for start in range(len(hashes) - window + 1):
+        if selected < start:
+            # The previous minimum left the window: rescan it
+            selected = start
+            for position in range(start + 1, start + window):
+                if hashes[position] <= hashes[selected]:
+                    selected = position
+        elif hashes[start + window - 1] <= hashes[selected]:
+            selected = start + window - 1
+        fingerprints.add(hashes[selected])
+    return fingerprints
+
+
+class FingerprintIndex:
+    """
+    Inverted index from winnowing fingerprints to the functions containing them.
+
+    Functions are keyed by (file, qualified name). Similarity between two
+    functions is the Jaccard index of their fingerprint sets; candidates
+    are found through the postings of a function's fingerprints, so queries
+    and project-wide duplicate reports never compare every pair.
+    """
+
+    def __init__(self):
+        # file -> function qualified name -> (name, token count, fingerprints)
+        self.file_functions: Dict[str, Dict[str, Tuple[str, int, Set[int]]]] = {}
+        # fingerprint -> (file, qualified name) keys
+        self.postings: Dict[int, Set[Tuple[str, str]]] = {}
+
+    def add_file(self, file_path: str, fingerprints: Dict[str, Tuple[str, int, Set[int]]]):
+        """
+        Add (or replace) the function fingerprints of a file.
+
+        Args:
+            file_path: Path of the Python file
+            fingerprints: {qualified name: (name, token count, fingerprints)}
+        """
+        self.remove_file(file_path)
+        functions = {}
+        for qualified_name, (name, token_count, hashes) in fingerprints.items():
+            hashes = set(hashes)
+            functions[qualified_name] = (name, token_count, hashes)
+            key = (file_path, qualified_name)
+            for fingerprint in hashes:
+                self.postings.setdefault(fingerprint, set()).add(key)
+        if functions:
+            self.file_functions[file_path] = functions
+
+    def update_file(self, file_path: str, fingerprints: Dict[str, Tuple[str, int, Set[int]]]):
+        """Replace the function fingerprints of a modified file."""
+        self.add_file(file_path, fingerprints)
+
+    def remove_file(self, file_path: str):
+        """Remove all function fingerprints of a file."""
+        for qualified_name, (_, _, hashes) in self.file_functions.pop(file_path, {}).items():
+            key = (file_path, qualified_name)
+            for fingerprint in hashes:
+                keys = self.postings.get(fingerprint)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.postings[fingerprint]
+
+    def file_fingerprints(self, file_path: str) -> Dict[str, Tuple[str, int, Set[int]]]:
+        """Get the function fingerprints of a file."""
+        return self.file_functions.get(file_path, {})
+
+    def find_functions(self, name: str, file_path: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Get the (file, qualified name) keys of the fingerprinted functions matching a name."""
+        keys = []
+        for function_file, functions in self.file_functions.items():
+            if file_path is not None and function_file != file_path:
+                continue
+            for qualified_name, (function_name, _, _) in functions.items():
+                if name in (function_name, qualified_name) or qualified_name.endswith("." + name):
+                    keys.append((function_file, qualified_name))
+        return keys
+
+    def _shared_counts(self, hashes: Iterable[int]) -> Dict[Tuple[str, str], int]:
+        """Count the fingerprints shared with every other function, skipping boilerplate postings."""
+        counts: Dict[Tuple[str, str], int] = {}
+        for fingerprint in hashes:
+            keys = self.postings.get(fingerprint, ())
+            if len(keys) > MAX_POSTING_SIZE:
+                continue
+            for key in keys:
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def _fingerprints(self, key: Tuple[str, str]) -> Set[int]:
+        return self.file_functions[key[0]][key[1]][2]
+
+    def similar_to(self, key: Tuple[str, str], threshold: float = 0.5,
+                   limit: Optional[int] = None) -> List[Tuple[Tuple[str, str], float]]:
+        """
+        Get the functions similar to one function.
+
+        Returns:
+            [((file, qualified name), similarity)] with similarity >= threshold,
+            most similar first
+        """
+        hashes = self._fingerprints(key)
+        results = []
+        for other, shared in self._shared_counts(hashes).items():
+            if other == key:
+                continue
+            similarity = shared / (len(hashes) + len(self._fingerprints(other)) - shared)
+            if similarity >= threshold:
+                results.append((other, similarity))
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results[:limit] if limit else results
+
+    def duplicates(self, threshold: float = 0.8,
+                   min_tokens: int = MIN_TOKENS) -> List[Tuple[Tuple[str, str], Tuple[str, str], float]]:
+        """
+        Get every pair of functions with similarity >= threshold.
+
+        Returns:
+            [(first key, second key, similarity)], most similar first
+        """
+        pairs = []
+        for file_path, functions in self.file_functions.items():
+            for qualified_name, (_, token_count, hashes) in functions.items():
+                if token_count < min_tokens:
+                    continue
+                key = (file_path, qualified_name)
+                for other, shared in self._shared_counts(hashes).items():
+                    if other <= key or self.file_functions[other[0]][other[1]][1] < min_tokens:
+                        continue
+                    similarity = shared / (len(hashes) + len(self._fingerprints(other)) - shared)
+                    if similarity >= threshold:
+                        pairs.append((key, other, similarity))
+        pairs.sort(key=lambda item: (-item[2], item[0], item[1]))
+        return pairs
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size statistics."""
+        return {
+            "files": len(self.file_functions),
+            "functions": sum(len(functions) for functions in self.file_functions.values()),
+            "fingerprints": len(self.postings)
+        }
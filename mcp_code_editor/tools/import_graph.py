@@ -0,0 +1,226 @@
+"""
+Module import graph built from the import records of the AST index.
+"""
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set, Iterable, Tuple
+
+from .ast_analyzer import module_name_for_path
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_import_module(record: Dict[str, Any], module_name: str, is_package: bool) -> Optional[str]:
+    """
+    Get the absolute module name of an import record.
+
+    Relative imports ("from ..x import y") are resolved against the package
+    of the importing module. Returns None if the import goes above the top
+    package.
+    """
+    module = record.get("module") or ""
+    level = record.get("level", 0) or 0
+    if record.get("import_type") != "from" or not level:
+        return module
+
+    # Relative import: start from the package of the importing module
+    base_parts = module_name.split(".") if is_package else module_name.split(".")[:-1]
+    if level - 1 > len(base_parts):
+        return None
+    base_parts = base_parts[:len(base_parts) - (level - 1)]
+    if module:
+        base_parts.extend(module.split("."))
+    return ".".join(base_parts)
+
+
+def is_module_level(definition: Dict[str, Any]) -> bool:
+    """Check if a definition can only be reached by importing its module."""
+    return definition.get("type") != "import" and definition.get("scope", "module") == "module"
+
+
+class ImportGraph:
+    """
+    File-level import graph of the project.
+
+    Every import record is kept as the module names it may refer to
+    (``from .x import y`` refers to the resolved ``pkg.x`` and maybe the
+    submodule ``pkg.x.y``). Names are resolved to files at query time, so
+    adding or removing a module never requires re-processing the files that
+    import it. Parent packages that Python runs as a side effect of an import
+    are not edges: every submodule would otherwise import its package
+    ``__init__`` and every file would reach every other one.
+
+    Package ``__init__`` re-exports need no special handling: a file doing
+    ``from pkg import foo`` imports ``pkg/__init__.py``, which imports the
+    module that defines ``foo``, so the defining module reaches the file
+    through transitive importers.
+    """
+
+    def __init__(self, ast_index: Optional[List[Dict[str, Any]]] = None):
+        self.file_modules: Dict[str, str] = {}
+        self.module_files: Dict[str, Set[str]] = {}
+        # file -> module names its imports may load
+        self.file_imports: Dict[str, Set[str]] = {}
+        # module name -> files importing it
+        self.importers_by_module: Dict[str, Set[str]] = {}
+        # file -> (imported module as written, candidate module names)
+        self.file_records: Dict[str, List[Tuple[str, List[str]]]] = {}
+
+        if ast_index:
+            imports_by_file: Dict[str, List[Dict[str, Any]]] = {}
+            for definition in ast_index:
+                records = imports_by_file.setdefault(definition["file"], [])
+                if definition.get("type") == "import":
+                    records.append(definition)
+            for file_path, records in imports_by_file.items():
+                self.add_file(file_path, records)
+
+    def add_file(self, file_path: str, import_records: Iterable[Dict[str, Any]]):
+        """
+        Add (or replace) a file and its import records.
+
+        Args:
+            file_path: Path of the Python file
+            import_records: Definitions of type "import" extracted from the file
+        """
+        self.remove_file(file_path)
+        # Only Python modules take part in the graph (scripts are indexed lexically)
+        if Path(file_path).suffix != ".py":
+            return
+
+        module_name = module_name_for_path(Path(file_path))
+        is_package = Path(file_path).stem == "__init__"
+        self.file_modules[file_path] = module_name
+        self.module_files.setdefault(module_name, set()).add(file_path)
+
+        imported = set()
+        records = []
+        for record in import_records:
+            candidates = self._import_candidates(record, module_name, is_package)
+            imported.update(candidates)
+            written = "." * (record.get("level", 0) or 0) + (record.get("module") or "")
+            records.append((written, candidates))
+
+        self.file_imports[file_path] = imported
+        self.file_records[file_path] = records
+        for name in imported:
+            self.importers_by_module.setdefault(name, set()).add(file_path)
+
+    def update_file(self, file_path: str, import_records: Iterable[Dict[str, Any]]):
+        """Replace the import records of a modified file."""
+        self.add_file(file_path, import_records)
+
+    def remove_file(self, file_path: str):
+        """Remove a file from the graph."""
+        module_name = self.file_modules.pop(file_path, None)
+        if module_name is None:
+            return
+
+        files = self.module_files.get(module_name)
+        if files is not None:
+            files.discard(file_path)
+            if not files:
+                del self.module_files[module_name]
+
+        for name in self.file_imports.pop(file_path, ()):
+            importers = self.importers_by_module.get(name)
+            if importers is not None:
+                importers.discard(file_path)
+                if not importers:
+                    del self.importers_by_module[name]
+        self.file_records.pop(file_path, None)
+
+    def _import_candidates(self, record: Dict[str, Any], module_name: str, is_package: bool) -> List[str]:
+        """Get the module names an import record may refer to."""
+        if record.get("import_type") != "from":
+            module = record.get("module") or ""
+            return [module] if module else []
+
+        base = resolve_import_module(record, module_name, is_package)
+        if base is None:
+            return []
+
+        candidates = [base] if base else []
+        from_name = record.get("from_name")
+        if from_name and from_name != "*":
+            # "from pkg import sub" may import the submodule pkg.sub
+            candidates.append(f"{base}.{from_name}" if base else from_name)
+        return candidates
+
+    def module_name(self, file_path: str) -> Optional[str]:
+        """Get the module name of an indexed file."""
+        return self.file_modules.get(file_path)
+
+    def importees(self, file_path: str) -> Set[str]:
+        """Get the project files directly imported by a file."""
+        files = set()
+        for name in self.file_imports.get(file_path, ()):
+            files.update(self.module_files.get(name, ()))
+        files.discard(file_path)
+        return files
+
+    def external_imports(self, file_path: str) -> Set[str]:
+        """Get the imported modules of a file that are not part of the project."""
+        return {written for written, candidates in self.file_records.get(file_path, ())
+                if candidates and not any(name in self.module_files for name in candidates)}
+
+    def importers(self, file_path: str) -> Set[str]:
+        """Get the project files that directly import a file."""
+        module_name = self.file_modules.get(file_path)
+        if module_name is None:
+            return set()
+        files = set(self.importers_by_module.get(module_name, ()))
+        files.discard(file_path)
+        return files
+
+    def transitive_importers(self, file_path: str, max_depth: Optional[int] = None) -> Set[str]:
+        """Get every file that imports a file directly or through other modules."""
+        return self._reachable(file_path, self.importers, max_depth)
+
+    def transitive_importees(self, file_path: str, max_depth: Optional[int] = None) -> Set[str]:
+        """Get every project file a file imports directly or through other modules."""
+        return self._reachable(file_path, self.importees, max_depth)
+
+    def _reachable(self, file_path: str, neighbours, max_depth: Optional[int]) -> Set[str]:
+        """Breadth-first traversal of the graph from a file."""
+        seen = {file_path}
+        queue = deque([(file_path, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for neighbour in neighbours(current):
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    queue.append((neighbour, depth + 1))
+        seen.discard(file_path)
+        return seen
+
+    def visible_files(self, definitions: List[Dict[str, Any]]) -> Optional[Set[str]]:
+        """
+        Get the files that can reference the given definitions.
+
+        Returns None when some definition is not module-level (methods,
+        nested functions, plain imports), since those can be reached through
+        objects without importing the defining module.
+        """
+        if not definitions or not all(is_module_level(d) for d in definitions):
+            return None
+
+        files = set()
+        for definition in definitions:
+            file_path = definition.get("file")
+            if file_path not in self.file_modules:
+                return None
+            files.add(file_path)
+            files.update(self.transitive_importers(file_path))
+        return files
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get graph size statistics."""
+        return {
+            "files": len(self.file_modules),
+            "modules": len(self.module_files),
+            "edges": sum(len(self.importees(file_path)) for file_path in self.file_modules)
+        }
@@ -0,0 +1,270 @@
+"""
+Portable export and import of the project index.
+
+The index is written as gzip-compressed JSON lines: a header line with the
+format version and the commit SHA the index was built from, followed by one
+line per indexed file with its content hash, definitions, references, call
+edges, function fingerprints and statement spans. Paths are stored relative
+to the project root, so an index built on a CI runner can be imported on any
+checkout of the same repository; only files whose content differs locally
+are re-indexed.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from .ast_analyzer import collect_source_files
+from .background_indexer import BackgroundIndexer
+from .call_graph import CallGraph
+from .fingerprint_index import FingerprintIndex
+from .import_graph import ImportGraph
+from .reference_index import ReferenceIndex
+from .span_index import SpanIndex
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT = "mcp-code-editor-index"
+INDEX_FORMAT_VERSION = 4
+
+# Directory (inside the project) where exported indexes are stored by default
+INDEX_EXPORT_DIR = ".mcp-code-editor"
+
+
+def get_commit_sha(project_root: Path) -> Optional[str]:
+    """Get the commit SHA checked out in a project, or None if it is not a git repository."""
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=str(project_root),
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    sha = result.stdout.strip()
+    return sha if result.returncode == 0 and sha else None
+
+
+def default_index_path(project_root: Path, commit: Optional[str]) -> Path:
+    """Get the default export path of the index of a commit."""
+    return project_root / INDEX_EXPORT_DIR / f"index-{commit or 'worktree'}.jsonl.gz"
+
+
+def _content_hash(file_path: Path) -> Optional[str]:
+    """Get the SHA-1 of a file's content, or None if it cannot be read."""
+    try:
+        with open(file_path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def file_record(project_state: Any, file_path: Path, definitions: List[Dict[str, Any]],
+                content_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Serialize the indexed definitions, references, call edges, fingerprints and spans of one file."""
+    file_str = str(file_path)
+    reference_index = project_state.reference_index
+    call_graph = project_state.call_graph
+    fingerprint_index = project_state.fingerprint_index
+    return {
+        "path": file_path.relative_to(project_state.project_root).as_posix(),
+        "sha1": content_hash,
+        "definitions": [{key: value for key, value in d.items() if key != "file"} for d in definitions],
+        "references": reference_index.file_references(file_str) if reference_index else [],
+        "calls": {caller: [caller_name, sorted(callees)]
+                  for caller, (caller_name, callees) in call_graph.file_calls(file_str).items()}
+                 if call_graph else {},
+        "fingerprints": {qualified_name: [name, token_count, sorted(hashes)]
+                         for qualified_name, (name, token_count, hashes)
+                         in fingerprint_index.file_fingerprints(file_str).items()}
+                        if fingerprint_index else {},
+        "spans": project_state.statement_spans.get(file_str, [])
+    }
+
+
+def load_file_record(record: Dict[str, Any], file_str: str, ast_index: List[Dict[str, Any]],
+                     reference_index: ReferenceIndex, call_graph: CallGraph,
+                     statement_spans: Dict[str, List[Tuple[int, int]]],
+                     fingerprint_index: Optional[FingerprintIndex] = None) -> List[Dict[str, Any]]:
+    """
+    Add a serialized file record to the given indexes.
+
+    Returns:
+        The definitions of the file
+    """
+    definitions = record["definitions"]
+    for definition in definitions:
+        definition["file"] = file_str
+    ast_index.extend(definitions)
+    reference_index.add_file(file_str, [tuple(reference) for reference in record["references"]])
+    call_graph.add_file(file_str, {caller: (name, set(callees))
+                                   for caller, (name, callees) in record["calls"].items()})
+    if fingerprint_index is not None:
+        fingerprint_index.add_file(file_str, {qualified_name: (name, token_count, set(hashes))
+                                              for qualified_name, (name, token_count, hashes)
+                                              in record["fingerprints"].items()})
+    if record["spans"]:
+        statement_spans[file_str] = [tuple(span) for span in record["spans"]]
+    return definitions
+
+
+def export_index(project_state: Any, output_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Export the AST index of a project to a compressed, versioned file.
+
+    Args:
+        project_state: Project state holding a complete AST index
+        output_path: Destination file (default: .mcp-code-editor/index-<commit>.jsonl.gz)
+
+    Returns:
+        Dictionary with the export path, commit and number of files and definitions
+    """
+    indexer = project_state.indexer
+    if indexer is not None and not indexer.ready:
+        return {
+            "success": False,
+            "error": "IndexNotReady",
+            "message": "The AST index is still being built. Wait until get_index_status_tool reports ready."
+        }
+
+    # A sharded index is exported in full
+    if project_state.shards is not None:
+        project_state.shards.ensure_all()
+
+    project_root = project_state.project_root
+    commit = get_commit_sha(project_root)
+    path = Path(output_path) if output_path else default_index_path(project_root, commit)
+    if not path.is_absolute():
+        path = project_root / path
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with project_state.index_lock:
+        definitions_by_file: Dict[str, List[Dict[str, Any]]] = {}
+        for definition in project_state.ast_index:
+            definitions_by_file.setdefault(definition.get("file"), []).append(definition)
+
+        files = 0
+        definitions = 0
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            header = {
+                "format": INDEX_FORMAT,
+                "version": INDEX_FORMAT_VERSION,
+                "commit": commit,
+                "created": time.time()
+            }
+            f.write(json.dumps(header) + "\n")
+
+            for file_path in collect_source_files(project_root, project_state.file_tree):
+                file_str = str(file_path)
+                content_hash = _content_hash(file_path)
+                if content_hash is None:
+                    continue
+
+                record = file_record(project_state, file_path,
+                                     definitions_by_file.get(file_str, []), content_hash)
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                files += 1
+                definitions += len(record["definitions"])
+
+    logger.info(f"Exported AST index of {files} files to {path}")
+    return {
+        "success": True,
+        "path": str(path),
+        "commit": commit,
+        "files": files,
+        "definitions": definitions,
+        "size_bytes": path.stat().st_size
+    }
+
+
+def import_index(project_state: Any, input_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load an exported index into a project, re-indexing only files that differ.
+
+    Files whose content hash matches the export are loaded as they are. Files
+    that changed locally, or are missing from the export, are re-indexed in
+    the background (see get_index_status_tool).
+
+    Args:
+        project_state: Project state of a project already set up
+        input_path: Exported index (default: the index of the checked-out commit)
+
+    Returns:
+        Dictionary with the number of imported and re-indexed files
+    """
+    project_root = project_state.project_root
+    commit = get_commit_sha(project_root)
+    path = Path(input_path) if input_path else default_index_path(project_root, commit)
+    if not path.is_absolute():
+        path = project_root / path
+    if not path.exists():
+        return {
+            "success": False,
+            "error": "FileNotFoundError",
+            "message": f"Index file not found: {path}"
+        }
+
+    records: Dict[str, Dict[str, Any]] = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != INDEX_FORMAT or header.get("version") != INDEX_FORMAT_VERSION:
+            return {
+                "success": False,
+                "error": "UnsupportedIndexFormat",
+                "message": f"{path} is not a version {INDEX_FORMAT_VERSION} index export "
+                           f"(format={header.get('format')}, version={header.get('version')})"
+            }
+        for line in f:
+            record = json.loads(line)
+            records[record["path"]] = record
+
+    if project_state.indexer is not None:
+        # The previous indexer must be gone before its indexes are replaced
+        project_state.indexer.stop()
+        project_state.indexer.join()
+
+    ast_index = []
+    reference_index = ReferenceIndex()
+    call_graph = CallGraph()
+    fingerprint_index = FingerprintIndex()
+    statement_spans = {}
+    stale_files = []
+    imported_files = 0
+
+    for file_path in collect_source_files(project_root, project_state.file_tree):
+        file_str = str(file_path)
+        record = records.get(file_path.relative_to(project_root).as_posix())
+        if record is None or _content_hash(file_path) != record["sha1"]:
+            stale_files.append(file_path)
+            continue
+
+        load_file_record(record, file_str, ast_index, reference_index, call_graph, statement_spans,
+                         fingerprint_index)
+        imported_files += 1
+
+    with project_state.index_lock:
+        project_state.index_generation += 1
+        project_state.ast_index = ast_index
+        project_state.reference_index = reference_index
+        project_state.call_graph = call_graph
+        project_state.fingerprint_index = fingerprint_index
+        project_state.import_graph = ImportGraph(ast_index)
+        project_state.span_index = SpanIndex(ast_index)
+        project_state.statement_spans = statement_spans
+        project_state.shards = None
+        project_state.ast_enabled = True
+        project_state.indexer = BackgroundIndexer(project_state, stale_files)
+        project_state.indexer.start()
+
+    logger.info(f"Imported AST index from {path}: {len(ast_index)} definitions, "
+                f"{len(stale_files)} files to re-index")
+    return {
+        "success": True,
+        "path": str(path),
+        "commit": header.get("commit"),
+        "local_commit": commit,
+        "imported_files": imported_files,
+        "imported_definitions": len(ast_index),
+        "reindexed_files": len(stale_files)
+    }
@@ -0,0 +1,972 @@
+"""
+Lexical (ctags-style) symbol extraction for JavaScript and TypeScript files.
+
+No parser or external dependency is used: the source is split into tokens by
+a single scanner that understands strings, template literals, comments and
+regular expression literals, brackets are matched, and declarations are
+recognized from token patterns. Top-level functions, classes (with their
+methods), variables, TypeScript interfaces, type aliases and enums, imports,
+``require`` calls and exports are indexed as definitions shaped like the
+Python ones, so the same lookups work on both.
+"""
+import logging
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JS_EXTENSIONS = {".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".mts", ".cts"}
+_TS_EXTENSIONS = {".ts", ".tsx", ".mts", ".cts"}
+
+# Files larger than this are assumed to be bundles or generated code
+MAX_SCRIPT_SIZE = 1024 * 1024
+
+_TOKEN_RE = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<id>[A-Za-z_$\u0080-\uffff][\w$\u0080-\uffff]*)
+  | (?P<num>\.?\d[\w.]*)
+  | (?P<str>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<punct>=>|\.\.\.|\?\.|\?\?=?|[=!]==?|[<>]=?|&&=?|\|\|=?|\+\+|--|\*\*=?|[-+*/%&|^]=?|[{}()\[\];,.:?~@#`=!])
+""", re.VERBOSE | re.DOTALL)
+
+_REGEX_RE = re.compile(r"/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*")
+_TEMPLATE_RE = re.compile(r"(?:[^`\\$]|\\.|\$(?!\{))*", re.DOTALL)
+
+# A '/' after one of these tokens starts a regular expression, not a division
+_REGEX_PRECEDERS = {"(", ",", "=", ":", "[", "!", "&", "|", "?", "{", "}", ";", "+", "-", "*", "%",
+                    "<", ">", "~", "^", "=>", "==", "===", "!=", "!==", "&&", "||", "??",
+                    "return", "typeof", "instanceof", "in", "of", "new", "delete", "void", "throw",
+                    "case", "do", "else", "yield", "await"}
+
+_KEYWORDS = {"break", "case", "catch", "class", "const", "continue", "debugger", "default", "delete",
+             "do", "else", "export", "extends", "finally", "for", "function", "if", "import", "in",
+             "instanceof", "let", "new", "return", "super", "switch", "this", "throw", "try",
+             "typeof", "var", "void", "while", "with", "yield", "async", "await", "of", "static",
+             "true", "false", "null", "undefined", "interface", "type", "enum", "implements",
+             "declare", "abstract", "readonly", "public", "private", "protected", "namespace",
+             "module", "from", "as", "get", "set", "keyof", "is", "infer", "satisfies", "override"}
+
+_MEMBER_MODIFIERS = {"static", "public", "private", "protected", "readonly", "abstract", "async",
+                     "override", "declare", "get", "set", "accessor"}
+
+# Tokens after which a line break does not end a statement
+_CONTINUATION_TOKENS = {"=", "=>", ",", ".", "?.", "+", "-", "*", "/", "%", "?", ":", "&&", "||", "??",
+                        "|", "&", "<", ">", "==", "===", "!=", "!==", "<=", ">=", "(", "[", "{",
+                        "extends", "new", "return", "typeof", "keyof", "await", "as", "satisfies"}
+
+_OPENERS = {"(": ")", "[": "]", "{": "}"}
+
+
+@lru_cache(maxsize=1024)
+def _package_root(directory: str) -> Optional[str]:
+    """Get the nearest directory with a package.json or tsconfig.json."""
+    path = Path(directory)
+    if (path / "package.json").exists() or (path / "tsconfig.json").exists():
+        return directory
+    if path.parent == path:
+        return None
+    return _package_root(str(path.parent))
+
+
+def clear_script_module_cache():
+    """Forget the cached package roots (package.json/tsconfig.json files may have been added or removed)."""
+    _package_root.cache_clear()
+
+
+def script_module_name(file_path: Path) -> str:
+    """Get the dotted module name of a script, relative to its package root, e.g. 'src.utils.format'."""
+    file_path = Path(file_path)
+    root = _package_root(str(file_path.parent))
+    if root is None:
+        return file_path.stem
+    parts = list(file_path.relative_to(root).with_suffix("").parts)
+    return ".".join(parts)
+
+
+class _Tokens:
+    """Token values, kinds and lines of a script, with matching bracket positions."""
+
+    def __init__(self, text: str):
+        self.values: List[str] = []
+        self.kinds: List[str] = []
+        self.lines: List[int] = []
+        # Doc comment ("/** ... */") ending right before each token, by token position
+        self.docs: Dict[int, str] = {}
+        self._tokenize(text)
+
+        self.match = [-1] * len(self.values)
+        stack = []
+        for position, value in enumerate(self.values):
+            if self.kinds[position] != "punct":
+                continue
+            if value in _OPENERS:
+                stack.append(position)
+            elif value in (")", "]", "}"):
+                while stack and _OPENERS[self.values[stack[-1]]] != value:
+                    stack.pop()
+                if stack:
+                    opener = stack.pop()
+                    self.match[opener] = position
+                    self.match[position] = opener
+
+    def _add(self, kind: str, value: str, line: int):
+        self.values.append(value)
+        self.kinds.append(kind)
+        self.lines.append(line)
+
+    def _tokenize(self, text: str):
+        position = 0
+        line = 1
+        length = len(text)
+        # Brace stack entries are True for "${" of template literals
+        braces: List[bool] = []
+        doc: Optional[Tuple[str, int]] = None
+
+        while position < length:
+            resume_template = False
+            match = _TOKEN_RE.match(text, position)
+            if match is None:
+                position += 1
+                continue
+            kind = match.lastgroup
+            value = match.group()
+
+            if kind == "space":
+                line += value.count("\n")
+                position = match.end()
+                continue
+            if kind == "comment":
+                if value.startswith("/**"):
+                    doc = (value, line + value.count("\n"))
+                line += value.count("\n")
+                position = match.end()
+                continue
+
+            if kind == "punct" and value.startswith("/"):
+                previous = self.values[-1] if self.values else None
+                if previous is None or (previous in _REGEX_PRECEDERS and self.kinds[-1] in ("punct", "id")):
+                    regex = _REGEX_RE.match(text, position)
+                    if regex is not None:
+                        self._add("regex", regex.group(), line)
+                        position = regex.end()
+                        continue
+
+            if kind == "punct" and value == "`":
+                position, line = self._template(text, match.end(), line, braces)
+                self._add("str", "`", line)
+                continue
+            if kind == "punct" and value == "{":
+                braces.append(False)
+            elif kind == "punct" and value == "}" and braces:
+                resume_template = braces.pop()
+
+            if resume_template:
+                position, line = self._template(text, match.end(), line, braces)
+                continue
+
+            if doc is not None and doc[1] >= line - 1:
+                self.docs[len(self.values)] = doc[0]
+            doc = None
+            self._add(kind, value, line)
+            position = match.end()
+
+    def _template(self, text: str, position: int, line: int, braces: List[bool]) -> Tuple[int, int]:
+        """Skip the text of a template literal up to its end or to the next "${"."""
+        chunk = _TEMPLATE_RE.match(text, position)
+        line += chunk.group().count("\n")
+        position = chunk.end()
+        if text.startswith("${", position):
+            braces.append(True)
+            return position + 2, line
+        return position + 1, line
+
+
+def _clean_doc(comment: Optional[str]) -> Optional[str]:
+    """'/** Text.\n * More. */' -> 'Text.\nMore.'"""
+    if not comment:
+        return None
+    lines = [line.strip().lstrip("*").strip() for line in comment[3:-2].splitlines()]
+    text = "\n".join(lines).strip()
+    return text or None
+
+
+class JSAnalyzer:
+    """Extracts definitions and name references from a JavaScript or TypeScript file."""
+
+    def __init__(self):
+        # (name, line, kind) references found by the last analyze_file call
+        self.references: List[Tuple[str, int, str]] = []
+
+    def analyze_file(self, file_path: Path) -> List[Dict[str, Any]]:
+        """Analyze a single script and extract its definitions."""
+        self.references = []
+        try:
+            if file_path.stat().st_size > MAX_SCRIPT_SIZE:
+                return []
+            with open(file_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"Could not read {file_path}: {e}")
+            return []
+
+        try:
+            tokens = _Tokens(text)
+            extractor = _Extractor(tokens, file_path)
+            definitions = extractor.extract()
+            self.references = extractor.references()
+            return definitions
+        except Exception as e:
+            logger.error(f"Error analyzing {file_path}: {e}")
+            return []
+
+
+class _Extractor:
+    """Recognizes declarations in the token list of one script."""
+
+    def __init__(self, tokens: _Tokens, file_path: Path):
+        self.tokens = tokens
+        self.values = tokens.values
+        self.file = str(file_path)
+        self.module = script_module_name(file_path)
+        self.language = "typescript" if file_path.suffix in _TS_EXTENSIONS else "javascript"
+        self.imports: List[Dict[str, Any]] = []
+        self.functions: List[Dict[str, Any]] = []
+        self.classes: List[Dict[str, Any]] = []
+        self.variables: List[Dict[str, Any]] = []
+        self.exported_names: set = set()
+
+    # Token helpers
+
+    def _value(self, position: int) -> Optional[str]:
+        return self.values[position] if 0 <= position < len(self.values) else None
+
+    def _is_name(self, position: int) -> bool:
+        return 0 <= position < len(self.values) and self.tokens.kinds[position] == "id"
+
+    def _skip_group(self, position: int) -> int:
+        """Position after the bracket group opened at ``position`` (or the next position)."""
+        closing = self.tokens.match[position] if self.values[position] in _OPENERS else -1
+        return closing + 1 if closing > position else position + 1
+
+    def _skip_angle(self, position: int) -> int:
+        """Position after a '<...>' type parameter list starting at ``position``."""
+        depth = 0
+        while position < len(self.values):
+            value = self.values[position]
+            if value == "<":
+                depth += 1
+            elif value == ">":
+                depth -= 1
+                if depth == 0:
+                    return position + 1
+            elif value in _OPENERS:
+                position = self._skip_group(position)
+                continue
+            elif value in (";", "{") or (value == "=>" and depth <= 1):
+                return position
+            position += 1
+        return position
+
+    def _statement_end(self, position: int, limit: Optional[int] = None) -> int:
+        """
+        Position of the last token of the statement containing ``position``.
+
+        A statement ends at a ';' or ',' at its own bracket depth, before a
+        closing bracket, or at a line break that cannot continue it.
+        """
+        limit = len(self.values) if limit is None else limit
+        last = position
+        while position < limit:
+            value = self.values[position]
+            if value in (";", ","):
+                return position
+            if value in (")", "]", "}"):
+                return last
+            if (position > last and self.tokens.lines[position] > self.tokens.lines[last]
+                    and self.values[last] not in _CONTINUATION_TOKENS
+                    and value not in _CONTINUATION_TOKENS and value != "?."):
+                return last
+            if value in _OPENERS:
+                closing = self.tokens.match[position]
+                if closing < 0:
+                    return position
+                last = closing
+                position = closing + 1
+                continue
+            last = position
+            position += 1
+        return last
+
+    def _string_value(self, position: int) -> Optional[str]:
+        if self.tokens.kinds[position] == "str" and self.values[position] != "`":
+            return self.values[position][1:-1]
+        return None
+
+    def _line(self, position: int) -> int:
+        return self.tokens.lines[min(position, len(self.values) - 1)]
+
+    # Declarations
+
+    def extract(self) -> List[Dict[str, Any]]:
+        """Walk the top-level statements of the script."""
+        self._walk(0, len(self.values))
+        for definition in self.functions + self.classes + self.variables:
+            if definition["name"] in self.exported_names:
+                definition["exported"] = True
+        return self.imports + self.functions + self.classes + self.variables
+
+    def _walk(self, position: int, end: int):
+        while position < end:
+            value = self.values[position]
+            if self.tokens.kinds[position] != "id" or (position > 0 and self.values[position - 1] in (".", "?.")):
+                position = self._skip_group(position) if value in _OPENERS else position + 1
+                continue
+            position = self._statement(position, end)
+
+    def _statement(self, position: int, end: int) -> int:
+        """Recognize a declaration starting at ``position``; return the position to continue from."""
+        start = position
+        exported = False
+        default = False
+        value = self.values[position]
+
+        if value == "import" and self._value(position + 1) not in ("(", ".", "?."):
+            return self._import(position)
+        if value == "export":
+            exported = True
+            position += 1
+            nxt = self._value(position)
+            if nxt == "default":
+                default = True
+                position += 1
+            elif nxt in ("{", "*"):
+                return self._export_list(position)
+            elif nxt == "=":
+                return position + 1
+            elif nxt == "import":
+                return self._import(position)
+
+        while self._value(position) in ("declare", "abstract"):
+            position += 1
+        value = self._value(position)
+
+        if value == "async" and self._value(position + 1) == "function":
+            return self._function(position + 1, start, exported, default, is_async=True)
+        if value == "function":
+            return self._function(position, start, exported, default)
+        if value == "class":
+            return self._class(position, start, exported, default)
+        if value in ("interface", "enum") and self._is_name(position + 1):
+            return self._type_body(position, start, exported, value)
+        if value == "type" and self._is_name(position + 1) and self._value(position + 2) in ("=", "<"):
+            return self._type_alias(position, start, exported)
+        if value in ("const", "let", "var"):
+            if value == "const" and self._value(position + 1) == "enum":
+                return self._type_body(position + 1, start, exported, "enum")
+            return self._variable(position, start, exported)
+        if value in ("exports", "module") and not exported:
+            return self._commonjs_export(position, start)
+        if value in ("namespace", "module") and self._is_name(position + 1):
+            brace = position + 2
+            while brace < end and self.values[brace] not in ("{", ";"):
+                brace += 1
+            return self._skip_group(brace) if self._value(brace) == "{" else brace + 1
+        if default:
+            self.exported_names.add("default")
+            return self._statement_end(position) + 1
+        return start + 1
+
+    def _doc(self, start: int) -> Optional[str]:
+        return _clean_doc(self.tokens.docs.get(start))
+
+    def _parameters(self, open_paren: int) -> List[str]:
+        """Names of the parameters in the '(...)' group opened at ``open_paren``."""
+        close = self.tokens.match[open_paren]
+        if close < 0:
+            return []
+        names = []
+        expecting = True
+        position = open_paren + 1
+        while position < close:
+            value = self.values[position]
+            if value == ",":
+                expecting = True
+            elif expecting and value in ("public", "private", "protected", "readonly", "override", "..."):
+                pass
+            elif expecting:
+                if self._is_name(position) and value != "this":
+                    names.append(value)
+                elif value in ("{", "["):
+                    names.append(value + "...}" if value == "{" else "[...]")
+                expecting = False
+            if value in _OPENERS:
+                position = self._skip_group(position)
+                continue
+            position += 1
+        return names
+
+    def _return_type(self, close_paren: int) -> Tuple[Optional[str], int]:
+        """Annotation after a parameter list, and the position after it."""
+        position = close_paren + 1
+        if self._value(position) != ":":
+            return None, position
+        position += 1
+        start = position
+        while position < len(self.values) and self.values[position] not in ("{", ";", "=>"):
+            if self.values[position] in _OPENERS:
+                position = self._skip_group(position)
+                continue
+            if self.values[position] == "<":
+                position = self._skip_angle(position)
+                continue
+            if position > start and self.tokens.lines[position] > self.tokens.lines[position - 1] \
+                    and self.values[position - 1] not in _CONTINUATION_TOKENS:
+                break
+            position += 1
+        return " ".join(self.values[start:position]) or None, position
+
+    def _function_definition(self, name: str, start: int, open_paren: int, is_async: bool,
+                             exported: bool, parent: Optional[str] = None,
+                             decorators: Optional[List[str]] = None) -> Tuple[Dict[str, Any], int]:
+        """Build a function definition from its parameter list; return it and the position after it."""
+        close = self.tokens.match[open_paren]
+        args = self._parameters(open_paren)
+        returns, position = self._return_type(close if close > 0 else open_paren)
+        if self._value(position) == "=>":
+            position += 1
+        if self._value(position) == "{":
+            end = self.tokens.match[position]
+            end = end if end > 0 else position
+        else:
+            end = self._statement_end(position)
+        qualified_name = f"{parent}.{name}" if parent else f"{self.module}.{name}"
+        definition = {
+            "name": name,
+            "qualified_name": qualified_name,
+            "parent": parent,
+            "scope": "class" if parent else "module",
+            "type": "function",
+            "file": self.file,
+            "line_start": self._line(start),
+            "line_end": self._line(end),
+            "args": args,
+            "decorators": decorators or [],
+            "is_async": is_async,
+            "returns": returns,
+            "docstring": self._doc(start),
+            "signature": f"{'async ' if is_async else ''}{name}({', '.join(args)})"
+                         + (f": {returns}" if returns else ""),
+            "language": self.language
+        }
+        if exported:
+            definition["exported"] = True
+        return definition, end + 1
+
+    def _function(self, position: int, start: int, exported: bool, default: bool,
+                  is_async: bool = False) -> int:
+        position += 1
+        if self._value(position) == "*":
+            position += 1
+        name = "default"
+        if self._is_name(position):
+            name = self.values[position]
+            position += 1
+        if self._value(position) == "<":
+            position = self._skip_angle(position)
+        if self._value(position) != "(":
+            return position
+        definition, after = self._function_definition(name, start, position, is_async, exported or default)
+        self.functions.append(definition)
+        if default:
+            self.exported_names.add("default")
+        return after
+
+    def _class(self, position: int, start: int, exported: bool, default: bool) -> int:
+        position += 1
+        name = "default"
+        if self._is_name(position) and self.values[position] not in ("extends", "implements"):
+            name = self.values[position]
+            position += 1
+        if self._value(position) == "<":
+            position = self._skip_angle(position)
+
+        inheritance = []
+        while position < len(self.values) and self.values[position] != "{":
+            if self.values[position] in ("extends", "implements"):
+                position += 1
+                while self._is_name(position):
+                    base = self.values[position]
+                    position += 1
+                    while self._value(position) == "." and self._is_name(position + 1):
+                        base += "." + self.values[position + 1]
+                        position += 2
+                    inheritance.append(base)
+                    if self._value(position) == "<":
+                        position = self._skip_angle(position)
+                    if self._value(position) == "(":
+                        position = self._skip_group(position)
+                    if self._value(position) != ",":
+                        break
+                    position += 1
+                continue
+            if self.values[position] in _OPENERS:
+                position = self._skip_group(position)
+                continue
+            position += 1
+
+        if self._value(position) != "{":
+            return position
+        body_end = self.tokens.match[position]
+        body_end = body_end if body_end > 0 else len(self.values) - 1
+        qualified_name = f"{self.module}.{name}"
+        methods = self._class_members(position + 1, body_end, qualified_name)
+        definition = {
+            "name": name,
+            "qualified_name": qualified_name,
+            "parent": None,
+            "scope": "module",
+            "type": "class",
+            "kind": "class",
+            "file": self.file,
+            "line_start": self._line(start),
+            "line_end": self._line(body_end),
+            "methods": [{"name": method["name"], "line": method["line_start"],
+                         "is_async": method["is_async"], "args": method["args"]} for method in methods],
+            "inheritance": inheritance,
+            "decorators": [],
+            "docstring": self._doc(start),
+            "language": self.language
+        }
+        if exported or default:
+            definition["exported"] = True
+        if default:
+            self.exported_names.add("default")
+        self.classes.append(definition)
+        self.functions.extend(methods)
+        return body_end + 1
+
+    def _class_members(self, position: int, end: int, class_name: str) -> List[Dict[str, Any]]:
+        """Methods (including arrow function properties) of a class body."""
+        methods = []
+        while position < end:
+            start = position
+            decorators = []
+            while self._value(position) == "@":
+                decorator_start = position + 1
+                position += 1
+                while self._is_name(position) or self._value(position) == ".":
+                    position += 1
+                decorators.append("".join(self.values[decorator_start:position]))
+                if self._value(position) == "(":
+                    position = self._skip_group(position)
+            if self._value(position) == ";":
+                position += 1
+                continue
+
+            is_async = False
+            while (self._value(position) in _MEMBER_MODIFIERS
+                   and self._value(position + 1) not in ("(", "=", ":", ";", "?", "!", "<", "}")):
+                is_async = is_async or self.values[position] == "async"
+                position += 1
+            if self._value(position) == "*":
+                position += 1
+
+            if position >= end:
+                break
+            value = self.values[position]
+            if value == "#" and self._is_name(position + 1):
+                name = "#" + self.values[position + 1]
+                position += 2
+            elif value == "[":
+                name = "[computed]"
+                position = self._skip_group(position)
+            elif self._is_name(position) or self.tokens.kinds[position] in ("str", "num"):
+                name = self._string_value(position) if self.tokens.kinds[position] == "str" else value
+                position += 1
+            else:
+                position = self._skip_group(position) if value in _OPENERS else position + 1
+                continue
+
+            while self._value(position) in ("?", "!"):
+                position += 1
+            if self._value(position) == "<":
+                position = self._skip_angle(position)
+
+            if self._value(position) == "(":
+                definition, position = self._function_definition(name, start, position, is_async, False,
+                                                                 class_name, decorators)
+                methods.append(definition)
+                continue
+
+            # Property: an arrow function or function expression value is a method
+            property_end = self._statement_end(position, end)
+            if self._value(position) == ":":
+                assignment = position
+                while assignment < property_end and self.values[assignment] != "=":
+                    assignment = self._skip_group(assignment) if self.values[assignment] in _OPENERS \
+                        else assignment + 1
+                position = assignment
+            if self._value(position) == "=":
+                function_start = position + 1
+                arrow_async = self._value(function_start) == "async"
+                if arrow_async:
+                    function_start += 1
+                open_paren = self._arrow_parameters(function_start)
+                if open_paren is not None:
+                    definition, _ = self._function_definition(name, start, open_paren, arrow_async, False,
+                                                              class_name, decorators)
+                    definition["line_end"] = max(definition["line_end"], self._line(property_end))
+                    methods.append(definition)
+            position = property_end + 1
+        return methods
+
+    def _arrow_parameters(self, position: int) -> Optional[int]:
+        """Position of the '(' of a function or arrow function expression at ``position``, if any."""
+        if self._value(position) == "function":
+            position += 1
+            if self._value(position) == "*":
+                position += 1
+            if self._is_name(position):
+                position += 1
+            return position if self._value(position) == "(" else None
+        if self._value(position) == "<":
+            position = self._skip_angle(position)
+        if self._value(position) == "(":
+            close = self.tokens.match[position]
+            if close < 0:
+                return None
+            after = close + 1
+            if self._value(after) == ":":
+                _, after = self._return_type(close)
+            return position if self._value(after) == "=>" else None
+        if self._is_name(position) and self._value(position + 1) == "=>":
+            # Single unparenthesized parameter: index it like "(x) =>"
+            return position - 1 if self._value(position - 1) == "(" else position
+        return None
+
+    def _type_body(self, position: int, start: int, exported: bool, kind: str) -> int:
+        name = self.values[position + 1]
+        brace = position + 2
+        while brace < len(self.values) and self.values[brace] != "{":
+            brace = self._skip_angle(brace) if self.values[brace] == "<" else brace + 1
+        end = self.tokens.match[brace] if brace < len(self.values) else -1
+        end = end if end > 0 else brace
+        inheritance = []
+        if kind == "interface":
+            extends = position + 2
+            while extends < brace:
+                if self.values[extends] in ("extends", ",") and self._is_name(extends + 1):
+                    inheritance.append(self.values[extends + 1])
+                extends += 1
+        definition = {
+            "name": name,
+            "qualified_name": f"{self.module}.{name}",
+            "parent": None,
+            "scope": "module",
+            "type": "class",
+            "kind": kind,
+            "file": self.file,
+            "line_start": self._line(start),
+            "line_end": self._line(end),
+            "methods": [],
+            "inheritance": inheritance,
+            "decorators": [],
+            "docstring": self._doc(start),
+            "language": self.language
+        }
+        if exported:
+            definition["exported"] = True
+        self.classes.append(definition)
+        return end + 1
+
+    def _type_alias(self, position: int, start: int, exported: bool) -> int:
+        end = self._statement_end(position + 2)
+        self.variables.append(self._variable_definition(self.values[position + 1], start, end,
+                                                        "type", exported, is_constant=True))
+        return end + 1
+
+    def _variable_definition(self, name: str, start: int, end: int, value_type: str,
+                             exported: bool, is_constant: bool) -> Dict[str, Any]:
+        definition = {
+            "name": name,
+            "type": "variable",
+            "file": self.file,
+            "line": self._line(start),
+            "line_end": self._line(end),
+            "value_type": value_type,
+            "is_constant": is_constant,
+            "language": self.language
+        }
+        if exported:
+            definition["exported"] = True
+        return definition
+
+    def _variable(self, position: int, start: int, exported: bool) -> int:
+        """const/let/var declarations: functions, classes, require() imports or variables."""
+        is_constant = self.values[position] == "const"
+        position += 1
+        first_declarator = position
+        while position < len(self.values):
+            declarator = position
+            if self._value(position) in ("{", "["):
+                pattern_end = self.tokens.match[position]
+                if pattern_end < 0:
+                    return position + 1
+                names = [self.values[p] for p in range(position + 1, pattern_end)
+                         if self._is_name(p) and self._value(p + 1) in (",", "}", "]", "=", None)
+                         and self._value(p - 1) in ("{", "[", ",", ":", "...")]
+                position = pattern_end + 1
+            elif self._is_name(position):
+                names = [self.values[position]]
+                position += 1
+            else:
+                return position
+
+            if self._value(position) == ":":
+                position += 1
+                while position < len(self.values) and self.values[position] not in ("=", ",", ";"):
+                    if self.values[position] in _OPENERS:
+                        position = self._skip_group(position)
+                    elif self.values[position] == "<":
+                        position = self._skip_angle(position)
+                    else:
+                        position += 1
+            end = self._statement_end(position)
+            declaration_start = start if declarator == first_declarator else declarator
+
+            if self._value(position) == "=":
+                self._initializer(names, declarator, position + 1, declaration_start, end, exported, is_constant)
+            else:
+                for name in names:
+                    self.variables.append(self._variable_definition(name, declaration_start, end, "unknown",
+                                                                    exported, is_constant))
+            position = end + 1
+            if self._value(end) != ",":
+                return position
+
+        return position
+
+    def _initializer(self, names: List[str], declarator: int, position: int, start: int, end: int,
+                     exported: bool, is_constant: bool):
+        value = self._value(position)
+        if value == "require" and self._value(position + 1) == "(" and position + 2 < len(self.values):
+            module = self._string_value(position + 2)
+            if module is not None:
+                destructured = self.values[declarator] in ("{", "[")
+                for name in names:
+                    original = "default"
+                    if destructured:
+                        # "{ original: name }" renames a property of the module
+                        original = name
+                        for p in range(declarator + 1, self.tokens.match[declarator]):
+                            if self.values[p] == name and self._value(p - 1) == ":":
+                                original = self.values[p - 2]
+                    self._add_import(name, module, original, name if original != name else None,
+                                     self._line(declarator), "require")
+                return
+
+        if len(names) == 1:
+            is_async = value == "async"
+            function_start = position + 1 if is_async else position
+            open_paren = self._arrow_parameters(function_start)
+            if open_paren is not None:
+                definition, _ = self._function_definition(names[0], start, open_paren, is_async, exported)
+                definition["line_end"] = max(definition["line_end"], self._line(end))
+                self.functions.append(definition)
+                return
+            if value == "class":
+                self._class(position, start, exported, False)
+                self.classes[-1]["name"] = names[0]
+                self.classes[-1]["qualified_name"] = f"{self.module}.{names[0]}"
+                return
+
+        value_type = {"[": "list", "{": "dict", "new": "instance"}.get(value)
+        if value_type is None:
+            kind = self.tokens.kinds[position] if position < len(self.values) else None
+            value_type = {"str": "str", "num": "number", "regex": "regex"}.get(kind, "expression")
+        for name in names:
+            self.variables.append(self._variable_definition(name, start, end, value_type, exported, is_constant))
+
+    def _commonjs_export(self, position: int, start: int) -> int:
+        """exports.name = ... / module.exports.name = ... / module.exports = { a, b }."""
+        if self.values[position] == "module":
+            if self._value(position + 1) != "." or self._value(position + 2) != "exports":
+                return start + 1
+            position += 2
+        if self._value(position + 1) == "=" and self._value(position + 2) == "{":
+            # module.exports = { a, b: c, d() {} }: shorthand and renamed properties are exported names
+            close = self.tokens.match[position + 2]
+            for p in range(position + 3, close if close > 0 else position + 3):
+                if (self._is_name(p) and self._value(p - 1) in ("{", ",", ":")
+                        and self._value(p + 1) in (",", "}")):
+                    self.exported_names.add(self.values[p])
+            return self._skip_group(position + 2)
+        if self._value(position + 1) != "." or not self._is_name(position + 2) or self._value(position + 3) != "=":
+            return start + 1
+
+        name = self.values[position + 2]
+        value = position + 4
+        end = self._statement_end(value)
+        is_async = self._value(value) == "async"
+        open_paren = self._arrow_parameters(value + 1 if is_async else value)
+        if open_paren is not None:
+            definition, _ = self._function_definition(name, start, open_paren, is_async, True)
+            definition["line_end"] = max(definition["line_end"], self._line(end))
+            self.functions.append(definition)
+        elif self._is_name(value) and (end == value or (end == value + 1 and self.values[end] == ";")):
+            # exports.name = localName
+            self.exported_names.add(self.values[value])
+        else:
+            self.variables.append(self._variable_definition(name, start, end, "expression", True, False))
+        return end + 1
+
+    # Imports and exports
+
+    def _add_import(self, name: str, module: str, from_name: Optional[str], alias: Optional[str],
+                    line: int, import_type: str):
+        self.imports.append({
+            "name": name,
+            "original_name": from_name or name,
+            "type": "import",
+            "file": self.file,
+            "line": line,
+            "import_type": import_type,
+            "module": module,
+            "from_name": from_name,
+            "alias": alias,
+            "language": self.language
+        })
+
+    def _bindings(self, open_brace: int) -> List[Tuple[str, Optional[str]]]:
+        """(name, alias) pairs of an '{ a, b as c }' list."""
+        close = self.tokens.match[open_brace]
+        pairs = []
+        position = open_brace + 1
+        while 0 < close and position < close:
+            if self.values[position] == "type" and self._is_name(position + 1) and self._value(position + 1) != "as":
+                position += 1
+            if self._is_name(position) or self.tokens.kinds[position] == "str":
+                name = self._string_value(position) or self.values[position]
+                alias = None
+                if self._value(position + 1) == "as" and position + 2 < close:
+                    alias = self._string_value(position + 2) or self.values[position + 2]
+                    position += 2
+                pairs.append((name, alias))
+            position += 1
+            while position < close and self.values[position] != ",":
+                position += 1
+            position += 1
+        return pairs
+
+    def _import(self, position: int) -> int:
+        line = self._line(position)
+        position += 1
+        if self._value(position) == "type" and self._value(position + 1) not in ("from", ","):
+            position += 1
+
+        # import "module"
+        if position < len(self.values) and self.tokens.kinds[position] == "str":
+            module = self._string_value(position)
+            if module is not None:
+                self._add_import(module, module, None, None, line, "side_effect")
+            return position + 1
+
+        # import name = require("module")
+        if self._is_name(position) and self._value(position + 1) == "=":
+            end = self._statement_end(position)
+            for p in range(position, end + 1):
+                if self.tokens.kinds[p] == "str":
+                    self._add_import(self.values[position], self._string_value(p), "default", None,
+                                     line, "require")
+                    break
+            return end + 1
+
+        default = None
+        namespace = None
+        bindings: List[Tuple[str, Optional[str]]] = []
+        while position < len(self.values) and self.values[position] != "from":
+            value = self.values[position]
+            if value == "{":
+                bindings = self._bindings(position)
+                position = self._skip_group(position)
+                continue
+            if value == "*" and self._value(position + 1) == "as" and self._is_name(position + 2):
+                namespace = self.values[position + 2]
+                position += 3
+                continue
+            if self._is_name(position):
+                default = value
+            elif value == ";" or self.tokens.kinds[position] == "str":
+                return position + 1
+            position += 1
+
+        if self._value(position) != "from" or position + 1 >= len(self.values):
+            return position + 1
+        module = self._string_value(position + 1)
+        if module is None:
+            return position + 2
+        if default:
+            self._add_import(default, module, "default", None, line, "esm")
+        if namespace:
+            self._add_import(namespace, module, "*", namespace, line, "esm")
+        for name, alias in bindings:
+            self._add_import(alias or name, module, name, alias, line, "esm")
+        return position + 2
+
+    def _export_list(self, position: int) -> int:
+        """export { a, b as c } [from "m"] / export * [as ns] from "m"."""
+        line = self._line(position)
+        if self.values[position] == "{":
+            bindings = self._bindings(position)
+            position = self._skip_group(position)
+        else:
+            position += 1
+            namespace = None
+            if self._value(position) == "as":
+                namespace = self._value(position + 1)
+                position += 2
+            bindings = [("*", namespace)]
+
+        if self._value(position) == "from" and position + 1 < len(self.values):
+            module = self._string_value(position + 1)
+            if module is not None:
+                for name, alias in bindings:
+                    self._add_import(alias or name, module, name, alias, line, "reexport")
+                    self.exported_names.add(alias or name)
+            return position + 2
+
+        for name, alias in bindings:
+            self.exported_names.add(name)
+            if alias:
+                self.exported_names.add(alias)
+        return position
+
+    # References
+
+    def references(self) -> List[Tuple[str, int, str]]:
+        """Identifier references, with the same kinds as the Python reference index."""
+        references = []
+        values = self.values
+        kinds = self.tokens.kinds
+        lines = self.tokens.lines
+        import_lines = {definition["line"] for definition in self.imports}
+        for position, value in enumerate(values):
+            if kinds[position] != "id":
+                continue
+            line = lines[position]
+            after_dot = position > 0 and values[position - 1] in (".", "?.")
+            if after_dot:
+                references.append((value, line, "attribute"))
+            elif value in _KEYWORDS:
+                continue
+            elif line in import_lines:
+                references.append((value, line, "import"))
+                continue
+            else:
+                references.append((value, line, "name"))
+            if position + 1 < len(values) and values[position + 1] == "(":
+                references.append((value, line, "call"))
+        return references
@@ -7,6 +7,7 @@ import importlib
 import logging
 from pathlib import Path
 from typing import Dict, List, Any, Optional
+from .symbol_index import get_symbol_index
 
 logger = logging.getLogger(__name__)
 
@@ -269,32 +270,19 @@ class LibraryIndexer:
         library_data = self.indexed_libraries[library_name]
         definitions = library_data.get("definitions", [])
         
-        matches = []
-        query_lower = query.lower()
+        # Substring matching through the library's trigram index
+        symbol_index = get_symbol_index(definitions, cache_key=f"library:{library_name}")
+        ranked = symbol_index.search(
+            query, match_mode="substring",
+            predicate=lambda d: definition_type == "any" or d.get("type") == definition_type
+        )
         
-        for definition in definitions:
-            # Type filter
-            if definition_type != "any" and definition.get("type") != definition_type:
-                continue
-            
-            # Name matching
-            name = definition.get("name", "").lower()
-            if query_lower in name:
-                # Calculate relevance score
-                score = 0
-                if name == query_lower:
-                    score += 100
-                elif name.startswith(query_lower):
-                    score += 50
-                else:
-                    score += 10
-                
-                definition_with_score = definition.copy()
-                definition_with_score["relevance_score"] = score
-                matches.append(definition_with_score)
+        matches = []
+        for score, definition in ranked:
+            definition_with_score = definition.copy()
+            definition_with_score["relevance_score"] = score
+            matches.append(definition_with_score)
         
-        # Sort by relevance
-        matches.sort(key=lambda x: x.get("relevance_score", 0), reverse=True)
         return matches
 
 
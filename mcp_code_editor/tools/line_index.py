@@ -0,0 +1,120 @@
+"""
+Cached line offsets of text files, for reading line ranges without reading whole files.
+"""
+import logging
+import mmap
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, List, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Total number of cached offsets (8 bytes each) before the least recently
+# read files are evicted; the most recent file is always kept
+MAX_CACHED_OFFSETS = 8 * 1024 * 1024
+
+
+def compute_line_offsets(file_path: Path) -> array:
+    """
+    Get the byte offset at which every line of a file starts.
+
+    The returned array has one more item than the file has lines: the last
+    one is the file size, so line ``n`` (1-indexed) spans the bytes
+    ``offsets[n - 1]:offsets[n]``. A final newline does not start a new line.
+    """
+    with open(file_path, 'rb') as f:
+        # Binary line iteration, len and accumulate all run in C
+        return array('Q', accumulate(map(len, f), initial=0))
+
+
+class LineIndex:
+    """
+    LRU cache of the line offsets of recently read files.
+
+    Entries are validated against the file's (mtime, size) on every lookup
+    and recomputed when the file changed, so a range read after the first one
+    costs a stat plus the bytes of the range.
+    """
+
+    def __init__(self, max_offsets: int = MAX_CACHED_OFFSETS):
+        self.max_offsets = max_offsets
+        self.entries: "OrderedDict[str, Tuple[Tuple[int, int], array]]" = OrderedDict()
+        self.cached_offsets = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def offsets(self, file_path: Path) -> array:
+        """Get the line offsets of a file, computing them if missing or stale."""
+        key = str(file_path)
+        stat = file_path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        offsets = compute_line_offsets(file_path)
+        with self._lock:
+            self.misses += 1
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.cached_offsets -= len(previous[1])
+            self.entries[key] = (signature, offsets)
+            self.cached_offsets += len(offsets)
+            while self.cached_offsets > self.max_offsets and len(self.entries) > 1:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.cached_offsets -= len(evicted)
+        return offsets
+
+    def invalidate(self, file_path):
+        """Drop the cached offsets of a modified or deleted file."""
+        with self._lock:
+            entry = self.entries.pop(str(Path(file_path)), None)
+            if entry is not None:
+                self.cached_offsets -= len(entry[1])
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self.entries.clear()
+            self.cached_offsets = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size statistics."""
+        with self._lock:
+            return {
+                "files": len(self.entries),
+                "offsets": self.cached_offsets,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+# Shared by every range read of the server
+line_index = LineIndex()
+
+
+def read_line_range(file_path: Path, offsets: array, start: int, end: int) -> List[str]:
+    """
+    Read lines ``start`` to ``end`` (1-indexed, inclusive) of a file through a memory-mapped view.
+
+    Returns:
+        The decoded lines without their line endings
+    """
+    first_byte = offsets[start - 1]
+    last_byte = offsets[end]
+    if last_byte <= first_byte:
+        return []
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            # The file may have shrunk since its offsets were validated
+            data = view[first_byte:min(last_byte, len(view))]
+    text = data.decode('utf-8')
+    if text.endswith('\n'):
+        text = text[:-1]
+    return [line.rstrip('\r') for line in text.split('\n')]
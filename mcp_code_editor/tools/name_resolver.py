@@ -0,0 +1,385 @@
+"""
+Scope-aware resolution of references to a definition, ranked by confidence.
+
+The reference index matches by plain name, so modifying a method called
+``get`` or ``run`` matches every ``x.get`` in the project. NameResolver
+decides how plausibly each of those references binds to the edited
+definition, using the import aliases of the referencing module, its local
+scopes (parameters and assignments shadow module names) and the receiver of
+attribute accesses (``self`` in a related class, an imported module or
+class, or an untyped object).
+"""
+import ast
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Set, Tuple
+
+from ..core.file_cache import file_cache
+from .ast_analyzer import module_name_for_path
+from .class_hierarchy import get_class_hierarchy
+from .import_graph import resolve_import_module
+
+logger = logging.getLogger(__name__)
+
+# References below this confidence are not reported as affected callers
+MIN_REFERENCE_CONFIDENCE = 0.5
+
+# Re-export chains followed when an import goes through a package __init__
+_MAX_REEXPORT_HOPS = 5
+
+# Reference index kinds handled by the resolver
+_RESOLVED_KINDS = ("call", "name", "attribute", "import")
+
+
+def _dotted_name(node: ast.AST) -> Optional[str]:
+    """'a.b.c' for Name/Attribute chains, None for any other expression."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def _function_locals(node: ast.AST) -> Set[str]:
+    """Names bound in a function's own scope: parameters, assignments, imports and nested definitions."""
+    args = node.args
+    names = {arg.arg for arg in args.posonlyargs + args.args + args.kwonlyargs}
+    if args.vararg:
+        names.add(args.vararg.arg)
+    if args.kwarg:
+        names.add(args.kwarg.arg)
+
+    declared_outer = set()
+    stack = list(node.body)
+    while stack:
+        child = stack.pop()
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(child.name)
+            continue
+        if isinstance(child, (ast.Global, ast.Nonlocal)):
+            declared_outer.update(child.names)
+        elif isinstance(child, ast.Name) and isinstance(child.ctx, (ast.Store, ast.Del)):
+            names.add(child.id)
+        elif isinstance(child, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split(".")[0] for alias in child.names)
+        stack.extend(ast.iter_child_nodes(child))
+    return names - declared_outer
+
+
+class _FileScope:
+    """
+    Import bindings, module-level definitions and occurrences of some names in one file.
+
+    Occurrences are keyed by (line, kind, name) like the reference index, with
+    kind one of "call", "name", "attribute" or "import", and hold
+    (receiver, shadowed by a local, enclosing class qualified name, bound module).
+    """
+
+    def __init__(self, tree: ast.Module, names: Set[str], module_name: str, is_package: bool):
+        self.names = names
+        self.module_name = module_name
+        self.is_package = is_package
+        # local name -> ("module", module, None) | ("from", module, original) | ("star", module, None)
+        self.bindings: Dict[str, Tuple[str, str, Optional[str]]] = {}
+        self.definitions: Set[str] = set()
+        self.occurrences: Dict[Tuple[int, str, str], List[Tuple[Optional[str], bool, Optional[str], Optional[str]]]] = {}
+
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                self.definitions.add(node.name)
+            elif isinstance(node, ast.Assign):
+                self.definitions.update(target.id for target in node.targets if isinstance(target, ast.Name))
+
+        self._visit(tree, module_name, None, frozenset())
+
+    def _add(self, line: int, kind: str, name: str, receiver: Optional[str] = None, shadowed: bool = False,
+             enclosing_class: Optional[str] = None, module: Optional[str] = None):
+        self.occurrences.setdefault((line, kind, name), []).append((receiver, shadowed, enclosing_class, module))
+
+    def _visit(self, node: ast.AST, path: str, enclosing_class: Optional[str], local_names: frozenset):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                for outer in child.decorator_list + child.args.defaults + child.args.kw_defaults:
+                    if outer is not None:
+                        self._visit_expression(outer, enclosing_class, local_names)
+                self._visit(child, f"{path}.{child.name}", enclosing_class,
+                            local_names | frozenset(_function_locals(child)))
+            elif isinstance(child, ast.ClassDef):
+                for outer in child.decorator_list + child.bases:
+                    self._visit_expression(outer, enclosing_class, local_names)
+                qualified_name = f"{path}.{child.name}"
+                self._visit(child, qualified_name, qualified_name, local_names)
+            else:
+                self._visit_node(child, enclosing_class, local_names)
+                self._visit(child, path, enclosing_class, local_names)
+
+    def _visit_expression(self, node: ast.AST, enclosing_class: Optional[str], local_names: frozenset):
+        for child in ast.walk(node):
+            self._visit_node(child, enclosing_class, local_names)
+
+    def _visit_node(self, node: ast.AST, enclosing_class: Optional[str], local_names: frozenset):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    self.bindings[alias.asname] = ("module", alias.name, None)
+                else:
+                    root = alias.name.split(".")[0]
+                    self.bindings[root] = ("module", root, None)
+
+        elif isinstance(node, ast.ImportFrom):
+            record = {"import_type": "from", "module": node.module or "", "level": node.level}
+            module = resolve_import_module(record, self.module_name, self.is_package)
+            for alias in node.names:
+                if alias.name == "*":
+                    if module:
+                        self.bindings.setdefault("*" + module, ("star", module, None))
+                    continue
+                local_name = alias.asname or alias.name
+                if module is not None:
+                    self.bindings[local_name] = ("from", module, alias.name)
+                for name in {alias.name, local_name} & self.names:
+                    self._add(node.lineno, "import", name, module=module)
+
+        elif isinstance(node, ast.Call):
+            func = node.func
+            if isinstance(func, ast.Name) and func.id in self.names:
+                self._add(node.lineno, "call", func.id, None, func.id in local_names, enclosing_class)
+            elif isinstance(func, ast.Attribute) and func.attr in self.names:
+                self._add(node.lineno, "call", func.attr, _dotted_name(func.value) or "", False, enclosing_class)
+
+        elif isinstance(node, ast.Name) and node.id in self.names:
+            self._add(node.lineno, "name", node.id, None, node.id in local_names, enclosing_class)
+
+        elif isinstance(node, ast.Attribute) and node.attr in self.names:
+            self._add(node.lineno, "attribute", node.attr, _dotted_name(node.value) or "", False, enclosing_class)
+
+
+class NameResolver:
+    """
+    Rank how plausibly a reference binds to a given definition.
+
+    Confidence guide: 1.0 bound by an import of the defining module, ~0.95
+    attribute of ``self`` in a related class or of the imported class, 0.6
+    attribute on an untyped object in a module that imports the definition,
+    0.3 or less for unresolved, shadowed or unrelated references.
+    """
+
+    def __init__(self, ast_index: List[Dict[str, Any]], import_graph: Any = None,
+                 names: Iterable[str] = (), generation: Optional[int] = None):
+        self.ast_index = ast_index
+        self.import_graph = import_graph
+        self.generation = generation
+        self.names = set(names)
+        self._module_files: Dict[str, str] = {}
+        self._imports_by_file: Dict[str, List[Dict[str, Any]]] = {}
+        for definition in ast_index:
+            file_path = definition.get("file")
+            if file_path not in self._imports_by_file:
+                self._imports_by_file[file_path] = []
+                self._module_files[module_name_for_path(Path(file_path))] = file_path
+            if definition.get("type") == "import":
+                self._imports_by_file[file_path].append(definition)
+        self._scopes: Dict[str, Optional[_FileScope]] = {}
+        self._targets: Dict[int, Dict[str, Any]] = {}
+
+    def add_names(self, names: Iterable[str]):
+        """Track more names (e.g. import aliases); cached file scopes are rebuilt."""
+        new_names = set(names) - self.names
+        if new_names:
+            self.names |= new_names
+            self._scopes.clear()
+
+    def alias_references(self, definition: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """Get (file, alias) pairs of ``from module import name as alias`` imports of a definition."""
+        name = definition.get("name")
+        return [(file_path, record["alias"])
+                for file_path, records in self._imports_by_file.items()
+                for record in records
+                if record.get("from_name") == name and record.get("alias") and record["alias"] != name]
+
+    def _target(self, definition: Dict[str, Any]) -> Dict[str, Any]:
+        """Precomputed facts about the definition being resolved."""
+        target = self._targets.get(id(definition))
+        if target is not None:
+            return target
+
+        file_path = definition.get("file", "")
+        scope = definition.get("scope", "module")
+        target = {
+            "file": file_path,
+            "module": module_name_for_path(Path(file_path)),
+            "name": definition.get("name"),
+            "scope": scope,
+            "is_method": scope == "class",
+            "class_name": None,
+            "related_classes": set(),
+            "importers": None,
+            "transitive_importers": None
+        }
+        if target["is_method"] and definition.get("parent"):
+            class_qualified_name = definition["parent"]
+            target["class_name"] = class_qualified_name.rsplit(".", 1)[-1]
+            hierarchy = get_class_hierarchy(self.ast_index, generation=self.generation)
+            target["related_classes"] = {class_qualified_name} | {
+                name for name, _ in hierarchy.all_subclasses(class_qualified_name)}
+        graph = self.import_graph
+        if graph is not None and graph.module_name(file_path) is not None:
+            target["importers"] = graph.importers(file_path)
+            target["transitive_importers"] = graph.transitive_importers(file_path)
+
+        self._targets[id(definition)] = target
+        return target
+
+    def _scope(self, file_path: str) -> Optional[_FileScope]:
+        """Parse a file once and collect the scope facts of the tracked names."""
+        if file_path not in self._scopes:
+            if not file_path.endswith(".py"):
+                # Scripts are indexed lexically and cannot reference Python definitions
+                self._scopes[file_path] = None
+                return None
+            try:
+                tree = ast.parse(file_cache.read_text(file_path), filename=file_path)
+                path = Path(file_path)
+                self._scopes[file_path] = _FileScope(tree, self.names, module_name_for_path(path),
+                                                     path.stem == "__init__")
+            except (OSError, UnicodeDecodeError, SyntaxError, ValueError) as e:
+                logger.warning(f"Could not resolve names in {file_path}: {e}")
+                self._scopes[file_path] = None
+        return self._scopes[file_path]
+
+    def _exports(self, module: str, name: str, target: Dict[str, Any], hops: int = 0) -> bool:
+        """Check if ``module.name`` is the target, directly or through re-exports."""
+        if module == target["module"]:
+            return name == target["name"] or (target["is_method"] and name == target["class_name"])
+        if hops >= _MAX_REEXPORT_HOPS:
+            return False
+        file_path = self._module_files.get(module)
+        if file_path is None:
+            return False
+        path = Path(file_path)
+        for record in self._imports_by_file.get(file_path, ()):
+            if record.get("import_type") != "from" or record.get("name") != name:
+                continue
+            source = resolve_import_module(record, module, path.stem == "__init__")
+            if source and self._exports(source, record.get("from_name"), target, hops + 1):
+                return True
+        return False
+
+    def _module_is_target(self, dotted: str, target: Dict[str, Any]) -> bool:
+        """Check if a dotted receiver names the target's module (or its class, for methods)."""
+        if not target["is_method"]:
+            return dotted == target["module"]
+        return dotted == f"{target['module']}.{target['class_name']}"
+
+    def _resolve_receiver(self, receiver: str, scope: _FileScope, target: Dict[str, Any],
+                          enclosing_class: Optional[str], ref_file: str) -> Tuple[float, str]:
+        """Score an attribute access ``receiver.name``."""
+        if receiver in ("self", "cls"):
+            if target["is_method"] and enclosing_class in target["related_classes"]:
+                return 0.95, f"{receiver} attribute in a related class"
+            if target["is_method"]:
+                return 0.2, f"{receiver} attribute of an unrelated class"
+            return 0.05, f"{receiver} attribute, not a module-level definition"
+
+        root, _, rest = receiver.partition(".")
+        binding = scope.bindings.get(root)
+        if binding is not None:
+            kind, module, original = binding
+            if kind == "module":
+                dotted = f"{module}.{rest}" if rest else module
+                if self._module_is_target(dotted, target):
+                    return 1.0, "attribute of the imported defining module"
+                return 0.1, f"attribute of unrelated module {dotted}"
+            if kind == "from":
+                if not rest and self._exports(module, original, target):
+                    return 0.95, "attribute of the imported class"
+                dotted = ".".join(part for part in (module, original, rest) if part)
+                if self._module_is_target(dotted, target):
+                    return 1.0, "attribute of the imported defining module"
+                if target["is_method"]:
+                    return 0.3, f"attribute of unrelated import {dotted}"
+                return 0.1, f"attribute of unrelated import {dotted}"
+
+        if not target["is_method"]:
+            return 0.1, "attribute of an object, not a module-level definition"
+        if target["importers"] is None:
+            return 0.5, "attribute on an untyped object"
+        if ref_file in target["importers"]:
+            return 0.6, "attribute on an untyped object in a module that imports the definition"
+        return 0.4, "attribute on an untyped object"
+
+    def _resolve_name(self, name: str, shadowed: bool, scope: _FileScope,
+                      target: Dict[str, Any]) -> Tuple[float, str]:
+        """Score a bare name (or a call by bare name)."""
+        if shadowed:
+            return 0.05, "shadowed by a local variable or parameter"
+        binding = scope.bindings.get(name)
+        if binding is not None:
+            kind, module, original = binding
+            if kind == "from" and self._exports(module, original, target):
+                return 1.0, "bound by an import of the definition"
+            return 0.05, f"bound to {module}.{original}" if original else f"bound to module {module}"
+        if name in scope.definitions:
+            return 0.05, "shadowed by a definition in the same module"
+        if target["is_method"]:
+            return 0.05, "methods are not reachable by bare name"
+        for kind, module, _ in scope.bindings.values():
+            if kind == "star" and (module == target["module"] or self._exports(module, name, target)):
+                return 0.8, "star import of the defining module"
+        return 0.3, "unresolved name"
+
+    def resolve(self, definition: Dict[str, Any], ref_file: str, line: int, kind: str,
+                name: Optional[str] = None) -> Optional[Tuple[float, str]]:
+        """
+        Score how plausibly a reference binds to a definition.
+
+        Args:
+            definition: Definition being modified (AST index entry)
+            ref_file: File containing the reference
+            line: Line of the reference
+            kind: Reference index kind ("call", "name", "attribute", "import")
+            name: Name used at the reference (an import alias), defaults to the definition name
+
+        Returns:
+            (confidence, reason), or None if the reference cannot be resolved
+            (unknown kind, unreadable file or stale line)
+        """
+        if kind not in _RESOLVED_KINDS:
+            return None
+        target = self._target(definition)
+        name = name or target["name"]
+
+        if target["scope"] == "function":
+            return 0.0, "nested definition, not visible outside its module"
+
+        # Files that never import the defining module can only reach methods through untyped objects
+        transitive_importers = target["transitive_importers"]
+        if transitive_importers is not None and ref_file not in transitive_importers:
+            if target["is_method"]:
+                return 0.2, "module does not import the definition"
+            return 0.05, "module does not import the definition"
+
+        scope = self._scope(ref_file)
+        if scope is None:
+            return None
+        occurrences = scope.occurrences.get((line, kind, name))
+        if not occurrences:
+            return None
+
+        best = None
+        for receiver, shadowed, enclosing_class, module in occurrences:
+            if kind == "import":
+                if module is not None and self._exports(module, target["name"], target):
+                    result = (1.0, "imported from the defining module")
+                else:
+                    result = (0.05, f"imported from another module ({module})")
+            elif receiver is not None:
+                result = self._resolve_receiver(receiver, scope, target, enclosing_class, ref_file)
+            else:
+                result = self._resolve_name(name, shadowed, scope, target)
+            if best is None or result[0] > best[0]:
+                best = result
+        return best
@@ -2,12 +2,23 @@
 Project management tools for code editor functionality.
 """
 import os
+import re
 import time
 import logging
 import fnmatch
+import threading
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+from .reference_index import ReferenceIndex
+from .import_graph import ImportGraph
+from .call_graph import CallGraph
+from .fingerprint_index import FingerprintIndex
+from .token_index import TokenIndex, collect_text_files, required_tokens
+from .span_index import SpanIndex
+from .background_indexer import BackgroundIndexer
+from .shard_index import ShardManager
+from .js_indexer import JS_EXTENSIONS
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +36,24 @@ class ProjectState:
         self.setup_complete: bool = False
         self.ast_index: List[Dict[str, Any]] = []
         self.ast_enabled: bool = False
+        self.reference_index: Optional[ReferenceIndex] = None
+        self.import_graph: Optional[ImportGraph] = None
+        self.call_graph: Optional[CallGraph] = None
+        self.fingerprint_index: Optional[FingerprintIndex] = None
+        # Identifier words of every project text file (independent of the AST index)
+        self.token_index: Optional[TokenIndex] = None
+        # Line spans of the function and class definitions of every file
+        self.span_index: Optional[SpanIndex] = None
+        # Top-level statement spans per file, for incremental re-parsing
+        self.statement_spans: Dict[str, List[Tuple[int, int]]] = {}
+        # Background AST indexing (None when the index was built synchronously)
+        self.indexer: Optional[BackgroundIndexer] = None
+        # Lazily loaded index shards (None unless setup used sharded=True)
+        self.shards: Optional[ShardManager] = None
+        # Guards the AST index and the auxiliary indexes while they are updated
+        self.index_lock = threading.RLock()
+        # Incremented on every index update; keys the structures derived from the AST index
+        self.index_generation: int = 0
         self.file_timestamps: Dict[str, float] = {}
         # Indexed libraries storage
         self.indexed_libraries: Dict[str, Dict[str, Any]] = {}
@@ -459,55 +488,143 @@ def setup_code_editor_with_ast(path: str, analyze_ast: bool = True) -> Dict[str,
         return result
 
 
-def search_definitions(query: str, ast_index: List[Dict[str, Any]], 
-                      definition_type: str = "any", 
-                      context_file: str = None) -> List[Dict[str, Any]]:
+def search_project_text(project_state: ProjectState, query: str, regex: bool = False,
+                        whole_word: bool = False, case_sensitive: bool = True,
+                        file_extensions: Optional[List[str]] = None,
+                        max_results: int = 100) -> Dict[str, Any]:
     """
-    Search for definitions in the AST index.
+    Search the text of every project file, grep style.
+    
+    Literal searches only read the files that the token index lists for
+    every whole word of the query; regex searches read every file.
     
+    Args:
+        project_state: The current project state
+        query: Text (or regular expression) to search for
+        regex: Whether the query is a regular expression
+        whole_word: Only match the query between word boundaries
+        case_sensitive: Whether the search is case-sensitive
+        file_extensions: Optional list of file extensions to search (e.g., [".py", ".md"])
+        max_results: Maximum number of matching lines returned
+        
+    Returns:
+        Dictionary with the matching lines and the number of files scanned
+    """
+    if not project_state.setup_complete:
+        raise ValueError("Project not setup. Please run setup_code_editor first.")
+    if not query:
+        raise ValueError("The search query is empty.")
+    
+    pattern = query if regex else re.escape(query)
+    if whole_word:
+        pattern = rf"\b(?:{pattern})\b"
+    compiled = re.compile(pattern, re.MULTILINE | (0 if case_sensitive else re.IGNORECASE))
+    
+    files = collect_text_files(project_state.project_root, project_state.file_tree)
+    if file_extensions:
+        extensions = {ext.lower() for ext in file_extensions}
+        files = [path for path in files if path.suffix.lower() in extensions]
+    
+    candidates = None
+    if project_state.token_index is not None and not regex:
+        candidates = project_state.token_index.candidate_files(required_tokens(query, whole_word),
+                                                               case_sensitive)
+    
+    matches = []
+    scanned = 0
+    truncated = False
+    for path in files:
+        if candidates is not None and str(path) not in candidates:
+            continue
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            continue
+        if b"\0" in data[:8192]:
+            continue
+        scanned += 1
+        
+        text = data.decode("utf-8", errors="replace")
+        line_number, line_start, last_line = 1, 0, 0
+        for match in compiled.finditer(text):
+            line_number += text.count("\n", line_start, match.start())
+            line_start = text.rfind("\n", 0, match.start()) + 1
+            if line_number == last_line:
+                continue
+            last_line = line_number
+            line_end = text.find("\n", match.start())
+            matches.append({
+                "file": str(path),
+                "line": line_number,
+                "text": text[line_start:line_end if line_end != -1 else len(text)].strip()[:200]
+            })
+            if len(matches) >= max_results:
+                truncated = True
+                break
+        if truncated:
+            break
+    
+    return {
+        "success": True,
+        "query": query,
+        "matches": matches,
+        "total_matches": len(matches),
+        "truncated": truncated,
+        "files_scanned": scanned,
+        "files_total": len(files),
+        "prefiltered": candidates is not None
+    }
+
+
+def search_definitions(query: str, ast_index: List[Dict[str, Any]],
+                      definition_type: str = "any",
+                      context_file: str = None,
+                      match_mode: str = "prefix",
+                      limit: Optional[int] = None,
+                      generation: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Search for definitions in the AST index.
+
     Args:
         query: Name to search for
         ast_index: The AST index to search in
         definition_type: Type filter ("function", "class", "import", "variable", "any")
         context_file: Optional file context for prioritizing results
-        
+        match_mode: "exact" (whole name), "prefix" (exact or starts with), "substring", or "fuzzy"
+                    (substring plus camelCase/snake_case segment matching)
+        limit: Optional maximum number of results to return
+        generation: Index generation of the project state owning ``ast_index``
+
     Returns:
         List of matching definitions
     """
+    from .symbol_index import get_symbol_index
+
+    symbol_index = get_symbol_index(ast_index, generation=generation)
+
+    def _type_filter(definition: Dict[str, Any]) -> bool:
+        return definition_type == "any" or definition["type"] == definition_type
+
+    def _bonus(definition: Dict[str, Any]) -> int:
+        score = 0
+        # Context file match gets bonus
+        if context_file and definition["file"].endswith(context_file):
+            score += 50
+        # Function/class definitions get higher priority than imports
+        if definition["type"] in ["function", "class"]:
+            score += 20
+        return score
+
+    ranked = symbol_index.search(query, limit=limit, match_mode=match_mode,
+                                 predicate=_type_filter, bonus=_bonus, max_bonus=70)
+
     matches = []
-    
-    for definition in ast_index:
-        # Type filter
-        if definition_type != "any" and definition["type"] != definition_type:
-            continue
-        
-        # Name matching (exact match or starts with)
-        name = definition["name"].lower()
-        query_lower = query.lower()
-        
-        if name == query_lower or name.startswith(query_lower):
-            # Calculate relevance score
-            score = 0
-            
-            # Exact match gets highest score
-            if name == query_lower:
-                score += 100
-            
-            # Context file match gets bonus
-            if context_file and definition["file"].endswith(context_file):
-                score += 50
-            
-            # Function/class definitions get higher priority than imports
-            if definition["type"] in ["function", "class"]:
-                score += 20
-            
-            definition_with_score = definition.copy()
-            definition_with_score["relevance_score"] = score
-            matches.append(definition_with_score)
-    
-    # Sort by relevance score (highest first)
-    matches.sort(key=lambda x: x.get("relevance_score", 0), reverse=True)
-    
+    for score, definition in ranked:
+        definition_with_score = definition.copy()
+        definition_with_score["relevance_score"] = score
+        matches.append(definition_with_score)
+
     return matches
 
 
@@ -532,25 +649,140 @@ def get_file_definitions(file_path: str, ast_index: List[Dict[str, Any]]) -> Lis
     return definitions
 
 
-def update_file_ast_index(file_path: str, ast_index: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def update_file_ast_index(file_path: str, ast_index: List[Dict[str, Any]],
+                          reference_index: Optional[ReferenceIndex] = None,
+                          call_graph: Optional[CallGraph] = None,
+                          spans: Optional[Dict[str, List[Tuple[int, int]]]] = None,
+                          fingerprint_index: Optional[FingerprintIndex] = None) -> List[Dict[str, Any]]:
     """
     Update AST index for a single file that has been modified.
     
     Args:
         file_path: Path to the modified file
         ast_index: Current AST index
+        reference_index: Optional reference index to update for the same file
+        call_graph: Optional call graph to update for the same file
+        spans: Optional top-level statement spans to update for the same file
+        fingerprint_index: Optional function fingerprints to update for the same file
         
     Returns:
         Updated AST index
     """
     try:
         from .ast_analyzer import update_ast_for_file
-        return update_ast_for_file(Path(file_path), ast_index)
+        return update_ast_for_file(Path(file_path), ast_index, reference_index, call_graph, spans,
+                                   fingerprint_index)
     except Exception as e:
         logger.error(f"Failed to update AST for {file_path}: {e}")
         return ast_index
 
 
+def refresh_file_index(project_state: ProjectState, file_path: str, structural: bool = True,
+                       changed_ranges: Optional[List[Tuple[int, int, int]]] = None) -> Dict[str, Any]:
+    """
+    Bring the project indexes up to date after a file was created, modified or deleted.
+    
+    Only the given file is re-analyzed. Non-structural edits (no definition
+    changes) keep the definition list, shift its line numbers by the line
+    delta of each edited block and only refresh the file's references.
+    When the changed line ranges are known, only the top-level statements
+    they touch are re-parsed.
+    
+    Args:
+        project_state: Project state holding the indexes
+        file_path: Path to the changed file
+        structural: Whether definitions of the file may have changed
+        changed_ranges: Optional (old start line, old end line, new line count)
+                        of every edited block, as reported by apply_diff
+        
+    Returns:
+        Dictionary with the number of removed and added definitions
+    """
+    path = Path(file_path).resolve()
+    file_str = str(path)
+    
+    # Creating or deleting an __init__.py changes the module names of a whole directory
+    from .ast_analyzer import clear_module_name_cache
+    clear_module_name_cache()
+    
+    with project_state.index_lock:
+        # The shard of the file must be loaded before the file is re-indexed
+        if project_state.shards is not None:
+            project_state.shards.ensure_files([file_str])
+        
+        reference_index = project_state.reference_index
+        call_graph = project_state.call_graph
+        fingerprint_index = project_state.fingerprint_index
+        indexer = project_state.indexer
+        project_state.index_generation += 1
+        
+        # A file still queued for background indexing is indexed here in full,
+        # and so are scripts (their lexical index has no incremental update)
+        if (indexer is not None and indexer.is_pending(file_str)) or path.suffix in JS_EXTENSIONS:
+            structural = True
+        
+        if not structural and path.exists():
+            if changed_ranges:
+                try:
+                    from .ast_analyzer import shift_lines_for_ranges
+                    shift_lines_for_ranges(path, project_state.ast_index, changed_ranges,
+                                           project_state.statement_spans)
+                except Exception as e:
+                    logger.error(f"Failed to shift line numbers for {file_path}: {e}")
+            file_definitions = [d for d in project_state.ast_index if d.get("file") == file_str]
+            try:
+                from .ast_analyzer import update_references_for_file
+                # Also refreshes the structure hashes of the edited definitions
+                update_references_for_file(path, reference_index, call_graph, fingerprint_index,
+                                           file_definitions)
+            except Exception as e:
+                logger.error(f"Failed to update references for {file_path}: {e}")
+            if project_state.span_index is not None:
+                project_state.span_index.update_file(file_str, file_definitions)
+            return {"removed_definitions": 0, "new_definitions": 0}
+        
+        removed = sum(1 for d in project_state.ast_index if d.get("file") == file_str)
+        
+        updated_index = None
+        if changed_ranges and path.exists():
+            try:
+                from .ast_analyzer import update_ast_for_ranges
+                updated_index = update_ast_for_ranges(path, project_state.ast_index, changed_ranges,
+                                                      project_state.statement_spans,
+                                                      reference_index, call_graph, fingerprint_index)
+            except Exception as e:
+                logger.error(f"Incremental AST update failed for {file_path}: {e}")
+        
+        if updated_index is None:
+            updated_index = update_file_ast_index(file_str, project_state.ast_index,
+                                                  reference_index, call_graph,
+                                                  project_state.statement_spans, fingerprint_index)
+        project_state.ast_index = updated_index
+        file_definitions = [d for d in project_state.ast_index if d.get("file") == file_str]
+        added = len(file_definitions)
+        
+        if project_state.span_index is not None:
+            project_state.span_index.update_file(file_str, file_definitions)
+        
+        import_graph = project_state.import_graph
+        if import_graph is not None:
+            if path.suffix == ".py" and path.exists():
+                import_graph.update_file(file_str, [d for d in file_definitions if d["type"] == "import"])
+            else:
+                import_graph.remove_file(file_str)
+        
+        if indexer is not None:
+            indexer.mark_indexed(file_str)
+    
+    return {"removed_definitions": removed, "new_definitions": added}
+
+
+def refresh_token_index(project_state: ProjectState, file_path: str):
+    """Re-read the words of a created, modified or deleted file into the token index."""
+    if project_state.token_index is not None:
+        project_state.token_index.update_file(str(Path(file_path).resolve()))
+
+
 def has_structural_changes(diff_blocks: List[Dict[str, Any]]) -> bool:
     """
     Determine if diff blocks contain structural changes that affect AST.
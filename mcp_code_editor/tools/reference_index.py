@@ -0,0 +1,126 @@
+"""
+Reverse reference index: referenced name -> places that mention it.
+"""
+import logging
+from typing import Dict, List, Any, Optional, Set, Tuple, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Reference kinds recorded by ASTAnalyzer
+REFERENCE_KINDS = ("call", "import", "module_import", "name", "attribute")
+
+
+class ReferenceIndex:
+    """
+    Posting lists of (file id, line, kind) for every referenced name.
+
+    Filled by build_ast_index in the same pass that extracts definitions, so
+    usage and caller lookups are dictionary accesses instead of re-reading and
+    re-parsing every indexed file.
+
+    Each posting list is split into per-file segments, and every file keeps
+    the set of names it references. Re-indexing or removing a file only
+    touches the segments of that file, so edits never need a global rebuild.
+    """
+
+    def __init__(self):
+        self.files: List[str] = []
+        self.file_ids: Dict[str, int] = {}
+        # name -> file id -> [(line, kind)]
+        self.postings: Dict[str, Dict[int, List[Tuple[int, str]]]] = {}
+        # file id -> names referenced by the file
+        self.file_names: Dict[int, Set[str]] = {}
+
+    def file_id(self, file_path: str) -> int:
+        """Get the id of a file, registering it if needed."""
+        file_id = self.file_ids.get(file_path)
+        if file_id is None:
+            file_id = len(self.files)
+            self.files.append(file_path)
+            self.file_ids[file_path] = file_id
+        return file_id
+
+    def add_file(self, file_path: str, references: Iterable[Tuple[str, int, str]]):
+        """
+        Add the (name, line, kind) references found in a file.
+
+        Any references previously indexed for the file are replaced.
+        """
+        file_id = self.file_id(file_path)
+        if file_id in self.file_names:
+            self._drop_segments(file_id)
+
+        names = set()
+        for name, line, kind in references:
+            self.postings.setdefault(name, {}).setdefault(file_id, []).append((line, kind))
+            names.add(name)
+        self.file_names[file_id] = names
+
+    def update_file(self, file_path: str, references: Iterable[Tuple[str, int, str]]):
+        """Replace the references of a modified file."""
+        self.add_file(file_path, references)
+
+    def remove_file(self, file_path: str) -> bool:
+        """
+        Remove all references of a file.
+
+        Returns:
+            True if the file was indexed
+        """
+        file_id = self.file_ids.get(file_path)
+        if file_id is None or file_id not in self.file_names:
+            return False
+        self._drop_segments(file_id)
+        return True
+
+    def _drop_segments(self, file_id: int):
+        """Drop the posting segments of a file, in time proportional to the file."""
+        for name in self.file_names.pop(file_id):
+            segments = self.postings.get(name)
+            if segments is None:
+                continue
+            segments.pop(file_id, None)
+            if not segments:
+                del self.postings[name]
+
+    def has_file(self, file_path: str) -> bool:
+        """Check if a file is currently indexed."""
+        file_id = self.file_ids.get(file_path)
+        return file_id is not None and file_id in self.file_names
+
+    def file_references(self, file_path: str) -> List[Tuple[str, int, str]]:
+        """Get the (name, line, kind) references of a file."""
+        file_id = self.file_ids.get(file_path)
+        if file_id is None or file_id not in self.file_names:
+            return []
+        return [(name, line, kind)
+                for name in self.file_names[file_id]
+                for line, kind in self.postings[name][file_id]]
+
+    def lookup(self, name: str, kinds: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Get all references to a name.
+
+        Args:
+            name: Referenced name (function, class, attribute or module name)
+            kinds: Optional set of reference kinds to keep
+
+        Returns:
+            List of {"file", "line", "kind"} dictionaries grouped by file
+        """
+        references = []
+        for file_id, segment in self.postings.get(name, {}).items():
+            file_path = self.files[file_id]
+            for line, kind in segment:
+                if kinds is None or kind in kinds:
+                    references.append({"file": file_path, "line": line, "kind": kind})
+        return references
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get index size statistics."""
+        return {
+            "files": len(self.file_names),
+            "names": len(self.postings),
+            "references": sum(len(segment) for segments in self.postings.values()
+                              for segment in segments.values())
+        }
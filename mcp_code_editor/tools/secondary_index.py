@@ -0,0 +1,181 @@
+"""
+Secondary indexes over the AST index for structured definition queries.
+"""
+import logging
+from typing import Dict, List, Any, Optional, Set
+
+from .class_hierarchy import get_class_hierarchy
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_decorator(name: str) -> str:
+    """'@mcp.tool()' -> 'mcp.tool'."""
+    name = name.strip().lstrip("@")
+    return name.split("(", 1)[0].strip()
+
+
+def _normalize_annotation(annotation: str) -> str:
+    """Drop whitespace so 'Dict[str, Any]' and 'Dict[str,Any]' compare equal."""
+    return "".join(annotation.split())
+
+
+class SecondaryIndex:
+    """
+    Position sets of an AST index keyed by decorator, base class, async-ness,
+    argument name, return annotation and definition type.
+
+    Dotted decorator and base names are indexed both in full ("mcp.tool")
+    and by their last segment ("tool"), so either form can be queried.
+    Queries intersect the sets smallest first, so their cost depends on the
+    size of the matching sets rather than on the size of the index.
+    """
+
+    def __init__(self, ast_index: List[Dict[str, Any]], generation: Optional[int] = None):
+        self.definitions = ast_index
+        self.generation = generation
+        self.by_type: Dict[str, Set[int]] = {}
+        self.by_decorator: Dict[str, Set[int]] = {}
+        self.by_base: Dict[str, Set[int]] = {}
+        self.by_argument: Dict[str, Set[int]] = {}
+        self.by_return: Dict[str, Set[int]] = {}
+        self.by_qualified_name: Dict[str, int] = {}
+        self.async_functions: Set[int] = set()
+        self.classes_with_async_methods: Set[int] = set()
+
+        for position, definition in enumerate(ast_index):
+            definition_type = definition.get("type")
+            self.by_type.setdefault(definition_type, set()).add(position)
+            if definition_type not in ("function", "class"):
+                continue
+
+            if definition.get("qualified_name"):
+                self.by_qualified_name[definition["qualified_name"]] = position
+            for decorator in definition.get("decorators", []):
+                self._add_dotted(self.by_decorator, _normalize_decorator(decorator), position)
+
+            if definition_type == "function":
+                if definition.get("is_async"):
+                    self.async_functions.add(position)
+                for argument in definition.get("args", []):
+                    self.by_argument.setdefault(argument, set()).add(position)
+                if definition.get("returns"):
+                    self.by_return.setdefault(_normalize_annotation(definition["returns"]), set()).add(position)
+            else:
+                for base in definition.get("inheritance", []):
+                    self._add_dotted(self.by_base, base, position)
+                if any(method.get("is_async") for method in definition.get("methods", [])):
+                    self.classes_with_async_methods.add(position)
+
+    @staticmethod
+    def _add_dotted(index: Dict[str, Set[int]], name: str, position: int):
+        index.setdefault(name, set()).add(position)
+        short_name = name.rsplit(".", 1)[-1]
+        if short_name != name:
+            index.setdefault(short_name, set()).add(position)
+
+    def _subclass_positions(self, base: str) -> Set[int]:
+        """Positions of the direct and indirect subclasses of a class."""
+        hierarchy = get_class_hierarchy(self.definitions, generation=self.generation)
+        positions = set()
+        roots = hierarchy.find(base) or [base]
+        for root in roots:
+            for qualified_name, _ in hierarchy.all_subclasses(root):
+                position = self.by_qualified_name.get(qualified_name)
+                if position is not None:
+                    positions.add(position)
+        return positions
+
+    def query(self, definition_type: Optional[str] = None, decorator: Optional[str] = None,
+              base_class: Optional[str] = None, is_async: Optional[bool] = None,
+              argument: Optional[str] = None, returns: Optional[str] = None,
+              has_async_method: Optional[bool] = None,
+              indirect_subclasses: bool = False) -> List[Dict[str, Any]]:
+        """
+        Find the definitions matching every given criterion.
+
+        Args:
+            definition_type: "function", "class", "import" or "variable"
+            decorator: Decorator name, e.g. "mcp.tool" or "tool"
+            base_class: Base class name (classes only)
+            is_async: Async (True) or sync (False) functions only
+            argument: Name of a function argument
+            returns: Return annotation, e.g. "Dict[str, Any]"
+            has_async_method: Classes with (True) or without (False) async methods
+            indirect_subclasses: With base_class, also match indirect subclasses
+
+        Returns:
+            Matching definitions in index order
+        """
+        sets: List[Set[int]] = []
+        # Negative criteria are applied last, as differences
+        excluded: List[Set[int]] = []
+
+        if definition_type:
+            sets.append(self.by_type.get(definition_type, set()))
+        if decorator:
+            sets.append(self.by_decorator.get(_normalize_decorator(decorator), set()))
+        if base_class:
+            sets.append(self._subclass_positions(base_class) if indirect_subclasses
+                        else self.by_base.get(base_class, set()))
+        if argument:
+            sets.append(self.by_argument.get(argument, set()))
+        if returns:
+            sets.append(self.by_return.get(_normalize_annotation(returns), set()))
+        if is_async is not None:
+            if is_async:
+                sets.append(self.async_functions)
+            else:
+                sets.append(self.by_type.get("function", set()))
+                excluded.append(self.async_functions)
+        if has_async_method is not None:
+            if has_async_method:
+                sets.append(self.classes_with_async_methods)
+            else:
+                sets.append(self.by_type.get("class", set()))
+                excluded.append(self.classes_with_async_methods)
+
+        if not sets:
+            return []
+
+        sets.sort(key=len)
+        result = set(sets[0])
+        for other in sets[1:]:
+            if not result:
+                break
+            result &= other
+        for other in excluded:
+            result -= other
+
+        return [self.definitions[position] for position in sorted(result)]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get index size statistics."""
+        return {
+            "decorators": len(self.by_decorator),
+            "base_classes": len(self.by_base),
+            "argument_names": len(self.by_argument),
+            "return_annotations": len(self.by_return),
+            "async_functions": len(self.async_functions)
+        }
+
+
+_secondary_cache: Dict[str, Any] = {}
+
+
+def get_secondary_index(ast_index: List[Dict[str, Any]], cache_key: str = "project",
+                        generation: Optional[int] = None) -> SecondaryIndex:
+    """
+    Get the secondary indexes for an AST index, rebuilding them if the index changed.
+
+    ``generation`` is the index generation of the project state owning the
+    index; without it, only a change of the list length is detected.
+    """
+    version = (generation, len(ast_index))
+    cached = _secondary_cache.get(cache_key)
+    if cached and cached[0] is ast_index and cached[1] == version:
+        return cached[2]
+
+    index = SecondaryIndex(ast_index, generation)
+    _secondary_cache[cache_key] = (ast_index, version, index)
+    return index
@@ -0,0 +1,328 @@
+"""
+Project index partitioned into shards by top-level package or directory.
+
+Each shard is persisted on its own under .mcp-code-editor/shards/ using the
+file records of the portable index export, behind a small manifest (file
+stats, defined names, referenced names and imported top-level modules).
+At setup only the manifests are read; a shard is loaded into the project
+indexes the first time a query touches one of its files, looks up a name it
+defines or references, or needs the modules that import it.
+"""
+import gzip
+import json
+import logging
+import os
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Set
+
+from .ast_analyzer import ASTAnalyzer, module_name_for_path
+from .index_export import INDEX_FORMAT, INDEX_FORMAT_VERSION, INDEX_EXPORT_DIR, file_record, load_file_record
+
+logger = logging.getLogger(__name__)
+
+# Shard of the source files placed directly in the project root
+ROOT_SHARD = "_root"
+
+# Rounds of base class lookups when loading the shards of a class hierarchy
+_MAX_HIERARCHY_ROUNDS = 5
+
+
+def shard_name(project_root: Path, file_path: Path) -> Optional[str]:
+    """Get the shard of a file: its top-level directory, or ROOT_SHARD (None if outside the project)."""
+    try:
+        parts = file_path.relative_to(project_root).parts
+    except ValueError:
+        return None
+    return parts[0] if len(parts) > 1 else ROOT_SHARD
+
+
+def _file_stat(file_path: Path) -> Optional[List[int]]:
+    """Get [size, mtime_ns] of a file, used to validate persisted records."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class Shard:
+    """The source files of one top-level package or directory and its persisted manifest."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.files: Dict[str, Path] = {}
+        self.loaded = False
+        # Manifest of the persisted shard (None until the shard has been built once)
+        self.file_stats: Dict[str, List[int]] = {}
+        self.names: Optional[List[str]] = None
+        self.references: Optional[Set[str]] = None
+        self.imports: Optional[Set[str]] = None
+        # Whether files were added, removed or modified since the shard was persisted
+        self.stale = True
+
+    @property
+    def built(self) -> bool:
+        """Whether a persisted index of the shard exists."""
+        return self.names is not None
+
+    @property
+    def current(self) -> bool:
+        """Whether the manifest can be trusted to answer name and import lookups."""
+        return self.built and not self.stale
+
+
+class ShardManager:
+    """
+    Lazily loads the shards of a project into its ProjectState indexes.
+
+    Persisted records are reused for files whose size and modification time
+    did not change; other files are re-analyzed and the shard is written
+    back. Shards never built before, or whose files changed since they were
+    persisted, are treated as possibly matching every query, so they are
+    (re)built the first time they are needed.
+    """
+
+    def __init__(self, project_state: Any, files: Iterable[Path]):
+        self.project_state = project_state
+        self.project_root: Path = project_state.project_root
+        self.directory = self.project_root / INDEX_EXPORT_DIR / "shards"
+        self.shards: Dict[str, Shard] = {}
+
+        for file_path in files:
+            name = shard_name(self.project_root, file_path)
+            if name is not None:
+                self.shards.setdefault(name, Shard(name)).files[str(file_path)] = file_path
+
+        for shard in self.shards.values():
+            self._read_manifest(shard)
+
+    def _shard_path(self, shard: Shard) -> Path:
+        return self.directory / f"{shard.name}.jsonl.gz"
+
+    def _read_manifest(self, shard: Shard):
+        """Read the header line of a persisted shard, if any."""
+        path = self._shard_path(shard)
+        if not path.exists():
+            return
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                header = json.loads(f.readline() or "{}")
+        except (OSError, EOFError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable shard {path}: {e}")
+            return
+        if (header.get("format") != INDEX_FORMAT or header.get("version") != INDEX_FORMAT_VERSION
+                or header.get("shard") != shard.name):
+            return
+        shard.file_stats = header.get("files", {})
+        shard.names = header.get("names", [])
+        shard.references = set(header.get("references", []))
+        shard.imports = set(header.get("imports", []))
+        shard.stale = (len(shard.file_stats) != len(shard.files) or any(
+            shard.file_stats.get(file_path.relative_to(self.project_root).as_posix()) != _file_stat(file_path)
+            for file_path in shard.files.values()))
+
+    def shard_for(self, path: str) -> Optional[Shard]:
+        """Get the shard containing a file."""
+        name = shard_name(self.project_root, Path(path).resolve())
+        return self.shards.get(name) if name else None
+
+    def load(self, names: Iterable[str]) -> List[str]:
+        """
+        Load shards into the project indexes.
+
+        Returns:
+            Names of the shards that were not loaded before
+        """
+        loaded = []
+        for name in names:
+            shard = self.shards.get(name)
+            if shard is not None and not shard.loaded:
+                self._load_shard(shard)
+                loaded.append(name)
+        return loaded
+
+    def ensure_files(self, paths: Iterable[str]) -> List[str]:
+        """Load the shards containing the given files."""
+        return self.load({shard.name for shard in map(self.shard_for, paths) if shard is not None})
+
+    def ensure_all(self) -> List[str]:
+        """Load every shard."""
+        return self.load(list(self.shards))
+
+    def ensure_defining(self, identifier: str, match_mode: str = "prefix") -> List[str]:
+        """
+        Load the shards that may define a name.
+
+        Prefix and exact lookups use the manifests; substring and fuzzy
+        lookups can match anything, so they load every shard.
+        """
+        if match_mode not in ("prefix", "exact"):
+            return self.ensure_all()
+
+        query = identifier.split(".")[-1].lower()
+        wanted = []
+        for shard in self.shards.values():
+            if shard.loaded:
+                continue
+            if not shard.current:
+                wanted.append(shard.name)
+                continue
+            position = bisect_left(shard.names, query)
+            if position < len(shard.names) and (
+                    shard.names[position] == query
+                    or (match_mode == "prefix" and shard.names[position].startswith(query))):
+                wanted.append(shard.name)
+        return self.load(wanted)
+
+    def ensure_referencing(self, name: str) -> List[str]:
+        """Load the shards whose files reference a name."""
+        name = name.split(".")[-1]
+        return self.load([shard.name for shard in self.shards.values()
+                          if not shard.loaded and (not shard.current or name in shard.references)])
+
+    def ensure_importers(self, paths: Iterable[str]) -> List[str]:
+        """Load the shards that import the top-level package (or root module) of the given files."""
+        modules = {module_name_for_path(Path(path).resolve()).split(".")[0] for path in paths}
+        return self.load([shard.name for shard in self.shards.values()
+                          if not shard.loaded and (not shard.current or shard.imports & modules)])
+
+    def ensure_class_hierarchy(self, class_name: str) -> List[str]:
+        """Load the shards needed to resolve the ancestors and subclasses of a class."""
+        name = class_name.split(".")[-1]
+        loaded: List[str] = []
+        ancestors = {name}
+        descendants = {name}
+        up, down = {name}, {name}
+        for _ in range(_MAX_HIERARCHY_ROUNDS):
+            for base in up:
+                loaded += self.ensure_defining(base, "exact")
+            for parent in down:
+                loaded += self.ensure_referencing(parent)
+            classes = [d for d in self.project_state.ast_index if d.get("type") == "class"]
+            up = {base.split(".")[-1] for d in classes if d["name"] in ancestors
+                  for base in d.get("inheritance", [])} - ancestors
+            down = {d["name"] for d in classes
+                    if any(base.split(".")[-1] in descendants for base in d.get("inheritance", []))} - descendants
+            if not up and not down:
+                break
+            ancestors |= up
+            descendants |= down
+        return loaded
+
+    def _load_shard(self, shard: Shard):
+        """Add a shard to the project indexes, re-analyzing files changed since it was persisted."""
+        state = self.project_state
+        records: Dict[str, Dict[str, Any]] = {}
+        if shard.built:
+            try:
+                with gzip.open(self._shard_path(shard), 'rt', encoding='utf-8') as f:
+                    f.readline()
+                    for line in f:
+                        record = json.loads(line)
+                        records[record["path"]] = record
+            except (OSError, EOFError, ValueError) as e:
+                logger.warning(f"Rebuilding unreadable shard {shard.name}: {e}")
+                records = {}
+
+        analyzer = ASTAnalyzer()
+        reanalyzed = 0
+        with state.index_lock:
+            if shard.loaded:
+                return
+            state.index_generation += 1
+            for file_str, file_path in shard.files.items():
+                relative = file_path.relative_to(self.project_root).as_posix()
+                record = records.get(relative)
+                if record is not None and shard.file_stats.get(relative) == _file_stat(file_path):
+                    definitions = load_file_record(record, file_str, state.ast_index, state.reference_index,
+                                                   state.call_graph, state.statement_spans,
+                                                   state.fingerprint_index)
+                else:
+                    definitions = analyzer.analyze_file(file_path)
+                    state.ast_index.extend(definitions)
+                    state.reference_index.add_file(file_str, analyzer.references)
+                    state.call_graph.add_file(file_str, analyzer.calls)
+                    if state.fingerprint_index is not None:
+                        state.fingerprint_index.add_file(file_str, analyzer.fingerprints)
+                    if analyzer.statement_spans:
+                        state.statement_spans[file_str] = analyzer.statement_spans
+                    reanalyzed += 1
+                if state.span_index is not None:
+                    state.span_index.add_file(file_str, definitions)
+                state.import_graph.add_file(file_str, [d for d in definitions if d["type"] == "import"])
+            shard.loaded = True
+
+            if reanalyzed or len(records) != len(shard.files):
+                self._persist(shard)
+
+        logger.info(f"Loaded shard {shard.name}: {len(shard.files)} files, {reanalyzed} re-analyzed")
+
+    def _persist(self, shard: Shard):
+        """Write a loaded shard and its manifest to disk."""
+        state = self.project_state
+        definitions_by_file: Dict[str, List[Dict[str, Any]]] = {}
+        for definition in state.ast_index:
+            if definition.get("file") in shard.files:
+                definitions_by_file.setdefault(definition["file"], []).append(definition)
+
+        file_stats = {}
+        names = set()
+        references = set()
+        imports = set()
+        records = []
+        for file_str, file_path in shard.files.items():
+            stat = _file_stat(file_path)
+            if stat is None:
+                continue
+            record = file_record(state, file_path, definitions_by_file.get(file_str, []))
+            file_stats[record["path"]] = stat
+            for definition in record["definitions"]:
+                names.add(definition["name"].lower())
+                if (definition["type"] == "import" and not definition.get("level")
+                        and definition.get("module") and "language" not in definition):
+                    imports.add(definition["module"].split(".")[0])
+            references.update(name for name, _, _ in record["references"])
+            records.append(record)
+
+        header = {
+            "format": INDEX_FORMAT,
+            "version": INDEX_FORMAT_VERSION,
+            "shard": shard.name,
+            "files": file_stats,
+            "names": sorted(names),
+            "references": sorted(references),
+            "imports": sorted(imports)
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._shard_path(shard)
+        temp_path = path.with_name(path.name + ".tmp")
+        try:
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+                f.write(json.dumps(header) + "\n")
+                for record in records:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not persist shard {shard.name}: {e}")
+            return
+
+        shard.file_stats = file_stats
+        shard.names = header["names"]
+        shard.references = references
+        shard.imports = imports
+        shard.stale = False
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get which shards are loaded."""
+        loaded = sorted(name for name, shard in self.shards.items() if shard.loaded)
+        return {
+            "ready": True,
+            "sharded": True,
+            "total_shards": len(self.shards),
+            "loaded_shards": loaded,
+            "unbuilt_shards": sum(1 for shard in self.shards.values() if not shard.built),
+            "indexed_files": sum(len(self.shards[name].files) for name in loaded),
+            "total_files": sum(len(shard.files) for shard in self.shards.values()),
+            "definitions": len(self.project_state.ast_index)
+        }
@@ -0,0 +1,117 @@
+"""
+Per-file line spans of definitions, for "which definition contains line X" lookups.
+"""
+import bisect
+import logging
+from typing import Dict, List, Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Definition types with a line span
+SPAN_TYPES = ("function", "class")
+
+
+class FileSpans:
+    """
+    Sorted span array of the function and class definitions of one file.
+
+    Spans are sorted by start line (outer definitions first on ties) and each
+    one keeps the position of its innermost enclosing span, so the
+    definitions containing a line are found with a bisection followed by a
+    walk up the (short) chain of enclosing definitions.
+    """
+
+    def __init__(self, definitions: Iterable[Dict[str, Any]]):
+        self.definitions = sorted(
+            (d for d in definitions if d.get("type") in SPAN_TYPES and d.get("line_start")),
+            key=lambda d: (d["line_start"], -d.get("line_end", d["line_start"])))
+        self.starts = [d["line_start"] for d in self.definitions]
+        self.ends = [d.get("line_end", d["line_start"]) for d in self.definitions]
+        self.parents: List[int] = []
+
+        open_spans: List[int] = []
+        for position, start in enumerate(self.starts):
+            while open_spans and self.ends[open_spans[-1]] < start:
+                open_spans.pop()
+            self.parents.append(open_spans[-1] if open_spans else -1)
+            open_spans.append(position)
+
+    def _containing(self, line: int) -> Iterable[int]:
+        """Positions of the spans containing a line, innermost first."""
+        position = bisect.bisect_right(self.starts, line) - 1
+        while position >= 0:
+            if self.ends[position] >= line:
+                yield position
+            position = self.parents[position]
+
+    def enclosing(self, line: int) -> Optional[Dict[str, Any]]:
+        """Get the innermost definition containing a line, or None at module level."""
+        for position in self._containing(line):
+            return self.definitions[position]
+        return None
+
+    def enclosing_chain(self, line: int) -> List[Dict[str, Any]]:
+        """Get every definition containing a line, innermost first."""
+        return [self.definitions[position] for position in self._containing(line)]
+
+    def overlapping(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """
+        Get the definitions overlapping a line range, in source order.
+
+        A definition overlaps the range if it starts inside it or contains
+        its first line.
+        """
+        positions = set(self._containing(start))
+        positions.update(range(bisect.bisect_left(self.starts, start), bisect.bisect_right(self.starts, end)))
+        return [self.definitions[position] for position in sorted(positions)]
+
+
+class SpanIndex:
+    """
+    FileSpans of every indexed file.
+
+    Maintained alongside the AST index: files are added as they are indexed
+    and replaced whenever their definitions change or their lines shift.
+    """
+
+    def __init__(self, ast_index: Optional[List[Dict[str, Any]]] = None):
+        self.files: Dict[str, FileSpans] = {}
+        if ast_index:
+            definitions_by_file: Dict[str, List[Dict[str, Any]]] = {}
+            for definition in ast_index:
+                if definition.get("type") in SPAN_TYPES and definition.get("file"):
+                    definitions_by_file.setdefault(definition["file"], []).append(definition)
+            for file_path, definitions in definitions_by_file.items():
+                self.files[file_path] = FileSpans(definitions)
+
+    def add_file(self, file_path: str, definitions: Iterable[Dict[str, Any]]):
+        """Add (or replace) the spans of a file from its definitions."""
+        spans = FileSpans(definitions)
+        if spans.definitions:
+            self.files[file_path] = spans
+        else:
+            self.files.pop(file_path, None)
+
+    def update_file(self, file_path: str, definitions: Iterable[Dict[str, Any]]):
+        """Replace the spans of a modified file."""
+        self.add_file(file_path, definitions)
+
+    def remove_file(self, file_path: str):
+        """Remove the spans of a file."""
+        self.files.pop(file_path, None)
+
+    def file_spans(self, file_path: str) -> Optional[FileSpans]:
+        """Get the spans of a file, or None if it has no indexed definitions."""
+        return self.files.get(file_path)
+
+    def enclosing(self, file_path: str, line: int) -> Optional[Dict[str, Any]]:
+        """Get the innermost definition of a file containing a line."""
+        spans = self.files.get(file_path)
+        return spans.enclosing(line) if spans else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size statistics."""
+        return {
+            "files": len(self.files),
+            "spans": sum(len(spans.definitions) for spans in self.files.values())
+        }
@@ -0,0 +1,276 @@
+"""
+In-memory symbol search structures for AST and library definitions.
+"""
+import bisect
+import heapq
+import logging
+import re
+from typing import Dict, List, Any, Optional, Callable, Iterable, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Splits camelCase, PascalCase, snake_case and digit runs into segments
+_SEGMENT_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+# Relevance scores for the different ways a name can match a query
+SCORE_EXACT = 100
+SCORE_PREFIX = 50
+SCORE_SEGMENT_START = 30
+SCORE_INITIALS = 25
+SCORE_SEGMENT_HUMPS = 20
+SCORE_SUBSTRING = 10
+
+
+def split_segments(name: str) -> List[str]:
+    """Split an identifier into lowercase camelCase/snake_case segments."""
+    return [segment.lower() for segment in _SEGMENT_RE.findall(name)]
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Get the set of trigrams of a lowercase string."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SymbolIndex:
+    """
+    Search index over the ``name`` field of a list of definitions.
+
+    Distinct lowercase names are indexed by trigram, so substring queries only
+    verify names that contain every trigram of the query instead of scanning
+    the whole definition list. Names are also split into camelCase/snake_case
+    segments, which allows "segment start", initials ("gcd") and hump-style
+    ("getDef") matches.
+    """
+
+    def __init__(self, definitions: List[Dict[str, Any]]):
+        self.definitions = definitions
+        self._names: List[str] = []
+        self._segments: List[List[str]] = []
+        self._name_ids: Dict[str, int] = {}
+        self._entries: List[List[int]] = []
+        self._trigram_postings: Dict[str, List[int]] = {}
+        self._initials: Dict[str, List[int]] = {}
+        self._sorted_names: List[str] = []
+        self._sorted_ids: List[int] = []
+        self._qualified: Dict[str, List[int]] = {}
+        self._build()
+
+    def _build(self):
+        """Build the name tables and trigram postings."""
+        for position, definition in enumerate(self.definitions):
+            raw_name = definition.get("name") or ""
+            name = raw_name.lower()
+            name_id = self._name_ids.get(name)
+
+            if name_id is None:
+                name_id = len(self._names)
+                self._name_ids[name] = name_id
+                self._names.append(name)
+                self._entries.append([])
+
+                segments = split_segments(raw_name) or [name]
+                self._segments.append(segments)
+
+                for trigram in _trigrams(name):
+                    self._trigram_postings.setdefault(trigram, []).append(name_id)
+
+                if len(segments) > 1:
+                    initials = "".join(segment[0] for segment in segments)
+                    self._initials.setdefault(initials, []).append(name_id)
+
+            self._entries[name_id].append(position)
+
+            # Every dotted suffix of the qualified name ("pkg.mod.Foo.bar",
+            # "mod.Foo.bar", "Foo.bar") resolves with a single dict lookup
+            qualified_name = definition.get("qualified_name")
+            if qualified_name:
+                parts = qualified_name.lower().split(".")
+                for start in range(len(parts) - 1):
+                    self._qualified.setdefault(".".join(parts[start:]), []).append(position)
+
+        # Sorted distinct names answer prefix queries with two binary searches
+        self._sorted_ids = sorted(range(len(self._names)), key=self._names.__getitem__)
+        self._sorted_names = [self._names[name_id] for name_id in self._sorted_ids]
+
+        logger.debug(f"Symbol index built: {len(self._names)} distinct names, "
+                     f"{len(self._trigram_postings)} trigrams")
+
+    def _prefix_range(self, prefix: str) -> Iterable[int]:
+        """Get ids of names starting with ``prefix`` in O(log n + matches)."""
+        low = bisect.bisect_left(self._sorted_names, prefix)
+        high = bisect.bisect_left(self._sorted_names, prefix + "\U0010ffff", low)
+        return self._sorted_ids[low:high]
+
+    def _substring_candidates(self, text: str) -> Iterable[int]:
+        """Get ids of names that may contain ``text``."""
+        if len(text) < 3:
+            return range(len(self._names))
+
+        postings = []
+        for trigram in _trigrams(text):
+            posting = self._trigram_postings.get(trigram)
+            if not posting:
+                return []
+            postings.append(posting)
+
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+    def _segment_start_match(self, query: str, name_id: int) -> bool:
+        """Check if ``query`` starts at a segment boundary of the name."""
+        name = self._names[name_id]
+        position = 0
+        for segment in self._segments[name_id]:
+            position = name.find(segment, position)
+            if position < 0:
+                return False
+            if name.startswith(query, position):
+                return True
+            position += len(segment)
+        return False
+
+    def _humps_match(self, query_segments: List[str], name_id: int) -> bool:
+        """Check if each query segment is a prefix of successive name segments."""
+        name_segments = self._segments[name_id]
+        index = 0
+        for query_segment in query_segments:
+            while index < len(name_segments) and not name_segments[index].startswith(query_segment):
+                index += 1
+            if index == len(name_segments):
+                return False
+            index += 1
+        return True
+
+    def _score_names(self, query: str, match_mode: str) -> Dict[int, int]:
+        """Find matching distinct names and score each one."""
+        query_lower = query.lower()
+        scores: Dict[int, int] = {}
+
+        if match_mode == "exact":
+            name_id = self._name_ids.get(query_lower)
+            return {name_id: SCORE_EXACT} if name_id is not None else {}
+
+        if match_mode == "prefix":
+            # Only exact matches get a name score here, like the original
+            # exact-or-prefix search_definitions ranking
+            for name_id in self._prefix_range(query_lower):
+                scores[name_id] = SCORE_EXACT if self._names[name_id] == query_lower else 0
+            return scores
+
+        for name_id in self._substring_candidates(query_lower):
+            name = self._names[name_id]
+            if query_lower not in name:
+                continue
+            if name == query_lower:
+                scores[name_id] = SCORE_EXACT
+            elif name.startswith(query_lower):
+                scores[name_id] = SCORE_PREFIX
+            elif self._segment_start_match(query_lower, name_id):
+                scores[name_id] = SCORE_SEGMENT_START
+            else:
+                scores[name_id] = SCORE_SUBSTRING
+
+        if match_mode != "fuzzy":
+            return scores
+
+        # Initials: "gcd" -> get_code_definition / getCodeDefinition
+        for name_id in self._initials.get(query_lower, []):
+            scores[name_id] = max(scores.get(name_id, 0), SCORE_INITIALS)
+
+        # Humps: "getDef" / "get_def" -> get_definition_by_name
+        query_segments = split_segments(query)
+        if len(query_segments) > 1:
+            longest = max(query_segments, key=len)
+            for name_id in self._substring_candidates(longest):
+                if name_id not in scores and self._humps_match(query_segments, name_id):
+                    scores[name_id] = SCORE_SEGMENT_HUMPS
+
+        return scores
+
+    def search(self, query: str, limit: Optional[int] = None, match_mode: str = "substring",
+               predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+               bonus: Optional[Callable[[Dict[str, Any]], int]] = None,
+               max_bonus: int = 0) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Search definitions by name.
+
+        Dotted queries ("Foo.bar", "module.Foo.bar") are exact lookups on the
+        qualified name of the definitions and ignore ``match_mode``; when no
+        qualified name matches, they are matched against the names like any
+        other query (e.g. "os.path" imports).
+
+        Args:
+            query: Name, name fragment or dotted qualified name to search for
+            limit: Maximum number of results (None for all)
+            match_mode: "exact" (whole name, case-insensitive), "prefix" (exact
+                        or prefix), "substring" or "fuzzy"
+                        (substring plus camelCase/snake_case segment matching)
+            predicate: Optional filter applied to candidate definitions
+            bonus: Optional extra score for a candidate definition
+            max_bonus: Upper bound of ``bonus``, used to stop early once the
+                       remaining names cannot reach the current top ``limit``
+
+        Returns:
+            List of (score, definition) tuples, best first
+        """
+        if not query:
+            return []
+
+        # Group entry positions by name score so the best groups are expanded first
+        positions_by_score: Dict[int, List[List[int]]] = {}
+        qualified = self._qualified.get(query.lower()) if "." in query.strip(".") else None
+        if qualified:
+            positions_by_score[SCORE_EXACT] = [qualified]
+        else:
+            for name_id, name_score in self._score_names(query, match_mode).items():
+                positions_by_score.setdefault(name_score, []).append(self._entries[name_id])
+
+        heap: List[Tuple[int, int, int]] = []
+        ranked: List[Tuple[int, int, int]] = []
+        for name_score in sorted(positions_by_score, reverse=True):
+            if limit is not None and len(heap) >= limit and heap[0][0] > name_score + max_bonus:
+                break
+
+            for positions in positions_by_score[name_score]:
+                for position in positions:
+                    definition = self.definitions[position]
+                    if predicate and not predicate(definition):
+                        continue
+                    score = name_score + (bonus(definition) if bonus else 0)
+                    # Negative position keeps index order between equal scores
+                    item = (score, -position, position)
+                    if limit is None:
+                        ranked.append(item)
+                    elif len(heap) < limit:
+                        heapq.heappush(heap, item)
+                    elif item > heap[0]:
+                        heapq.heapreplace(heap, item)
+
+        results = ranked if limit is None else heap
+        results.sort(reverse=True)
+        return [(score, self.definitions[position]) for score, _, position in results]
+
+
+# One cached index per slot ("project", "library:<name>", ...). An index is
+# rebuilt when the definitions list it was built from is replaced, when the
+# index generation of the project state changes (edits and indexing update
+# the list in place) or, for lists without a generation, when it is resized.
+_index_cache: Dict[str, Tuple[List[Dict[str, Any]], Tuple[Optional[int], int], SymbolIndex]] = {}
+
+
+def get_symbol_index(definitions: List[Dict[str, Any]], cache_key: str = "project",
+                     generation: Optional[int] = None) -> SymbolIndex:
+    """Get the symbol index for a definitions list, building it if needed."""
+    version = (generation, len(definitions))
+    cached = _index_cache.get(cache_key)
+    if cached and cached[0] is definitions and cached[1] == version:
+        return cached[2]
+
+    index = SymbolIndex(definitions)
+    _index_cache[cache_key] = (definitions, version, index)
+    return index
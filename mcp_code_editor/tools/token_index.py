@@ -0,0 +1,226 @@
+"""
+Identifier token index: which project files mention each identifier-like word.
+"""
+import bisect
+import logging
+import re
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Identifier-like words: a letter or underscore followed by word characters,
+# never starting inside a longer word (so "0xff" yields no token)
+TOKEN_RE = re.compile(r"\b[^\W\d]\w*")
+
+# Larger files are assumed to be data or generated code and are not indexed
+MAX_TEXT_FILE_SIZE = 2 * 1024 * 1024
+
+# Bytes inspected to tell binary files apart
+_BINARY_PROBE_SIZE = 8192
+
+
+def read_file_tokens(file_path: Path) -> Optional[Set[str]]:
+    """
+    Get the identifier-like words of a text file.
+
+    Returns:
+        The set of words, or None for unreadable, binary or oversized files
+    """
+    try:
+        if file_path.stat().st_size > MAX_TEXT_FILE_SIZE:
+            return None
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        logger.warning(f"Could not read {file_path} for the token index: {e}")
+        return None
+    if b"\0" in data[:_BINARY_PROBE_SIZE]:
+        return None
+    return set(TOKEN_RE.findall(data.decode("utf-8", errors="replace")))
+
+
+def required_tokens(query: str, whole_word: bool = False) -> List[str]:
+    """
+    Get the words every literal match of ``query`` must contain as whole tokens.
+
+    Words touching the ends of the query may be part of a longer word in the
+    text, so they are only required when matching whole words.
+    """
+    tokens = []
+    for match in TOKEN_RE.finditer(query):
+        start, end = match.span()
+        if whole_word or (start > 0 and end < len(query)):
+            tokens.append(match.group())
+    return tokens
+
+
+def collect_text_files(project_root: Path, file_tree: Dict[str, Any]) -> List[Path]:
+    """Get the paths of the project files small enough to be token-indexed, in tree order."""
+    files = []
+
+    def _process_tree_node(node: Dict[str, Any], current_path: Path):
+        if node.get("type") == "file":
+            if node.get("size", 0) <= MAX_TEXT_FILE_SIZE:
+                files.append(current_path)
+
+        elif node.get("type") == "directory":
+            for name, child in node.get("children", {}).items():
+                _process_tree_node(child, current_path / name)
+
+    _process_tree_node(file_tree, project_root)
+    return files
+
+
+class TokenIndex:
+    """
+    Inverted index from identifier-like words to the files containing them.
+
+    Every project text file (Python or not) is scanned once with TOKEN_RE.
+    Postings are sorted ``array('I')`` of file ids, and every file keeps the
+    sorted ids of its words so re-indexing or removing it only touches its
+    own postings. Usage, caller and text searches use it as a prefilter to
+    skip files that cannot contain a match.
+
+    The index can be built in a daemon thread; until it is ready,
+    ``candidate_files`` returns None and callers scan every file.
+    """
+
+    def __init__(self):
+        self.files: List[str] = []
+        self.file_ids: Dict[str, int] = {}
+        self.tokens: List[str] = []
+        self.token_ids: Dict[str, int] = {}
+        # token id -> sorted ids of the files containing it
+        self.postings: List[array] = []
+        # file id -> sorted ids of its tokens
+        self.file_tokens: Dict[int, array] = {}
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self.ready = False
+        self.build_seconds: Optional[float] = None
+
+    def _file_id(self, file_path: str) -> int:
+        file_id = self.file_ids.get(file_path)
+        if file_id is None:
+            file_id = len(self.files)
+            self.files.append(file_path)
+            self.file_ids[file_path] = file_id
+        return file_id
+
+    def _token_id(self, token: str) -> int:
+        token_id = self.token_ids.get(token)
+        if token_id is None:
+            token_id = len(self.tokens)
+            self.tokens.append(token)
+            self.token_ids[token] = token_id
+            self.postings.append(array('I'))
+        return token_id
+
+    def add_file(self, file_path: str, tokens: Iterable[str]):
+        """Add (or replace) the words of a file."""
+        with self._lock:
+            file_id = self._file_id(file_path)
+            self._drop_postings(file_id)
+            token_ids = array('I', sorted(self._token_id(token) for token in tokens))
+            for token_id in token_ids:
+                posting = self.postings[token_id]
+                if not posting or posting[-1] < file_id:
+                    posting.append(file_id)
+                else:
+                    posting.insert(bisect.bisect_left(posting, file_id), file_id)
+            self.file_tokens[file_id] = token_ids
+
+    def update_file(self, file_path: str):
+        """Re-read a created or modified file (dropping it if it no longer exists or is not text)."""
+        path = Path(file_path)
+        tokens = read_file_tokens(path) if path.is_file() else None
+        if tokens is None:
+            self.remove_file(file_path)
+        else:
+            self.add_file(file_path, tokens)
+
+    def remove_file(self, file_path: str):
+        """Remove all words of a file."""
+        with self._lock:
+            file_id = self.file_ids.get(file_path)
+            if file_id is not None:
+                self._drop_postings(file_id)
+
+    def _drop_postings(self, file_id: int):
+        for token_id in self.file_tokens.pop(file_id, ()):
+            posting = self.postings[token_id]
+            position = bisect.bisect_left(posting, file_id)
+            if position < len(posting) and posting[position] == file_id:
+                del posting[position]
+
+    def build(self, files: Iterable[Path]):
+        """Index every given file."""
+        started = time.time()
+        for file_path in files:
+            if self._stopped:
+                return
+            tokens = read_file_tokens(file_path)
+            if tokens is not None:
+                self.add_file(str(file_path), tokens)
+        self.ready = True
+        self.build_seconds = time.time() - started
+        logger.info(f"Token index complete: {len(self.file_tokens)} files, "
+                    f"{len(self.tokens)} tokens in {self.build_seconds:.2f}s")
+
+    def start(self, files: List[Path]):
+        """Build the index in a background thread."""
+        self._thread = threading.Thread(target=self.build, args=(files,), name="token-indexer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop a background build after the file being processed."""
+        self._stopped = True
+
+    def _token_files(self, token: str, case_sensitive: bool) -> Set[int]:
+        if case_sensitive:
+            token_id = self.token_ids.get(token)
+            return set(self.postings[token_id]) if token_id is not None else set()
+        lowered = token.lower()
+        file_ids: Set[int] = set()
+        for other, token_id in self.token_ids.items():
+            if other.lower() == lowered:
+                file_ids.update(self.postings[token_id])
+        return file_ids
+
+    def candidate_files(self, tokens: Iterable[str], case_sensitive: bool = True) -> Optional[Set[str]]:
+        """
+        Get the files containing every given word.
+
+        Returns:
+            Paths of the candidate files, or None if the index is not ready
+            (or no word was given), meaning every file is a candidate
+        """
+        tokens = list(dict.fromkeys(tokens))
+        if not self.ready or not tokens:
+            return None
+        with self._lock:
+            file_ids = None
+            # Rarest words first keeps the running intersection small
+            for token in sorted(tokens, key=lambda t: len(self.postings[self.token_ids[t]])
+                                if t in self.token_ids else 0):
+                matching = self._token_files(token, case_sensitive)
+                file_ids = matching if file_ids is None else file_ids & matching
+                if not file_ids:
+                    break
+            return {self.files[file_id] for file_id in file_ids}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size statistics."""
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "files": len(self.file_tokens),
+                "tokens": len(self.tokens),
+                "postings": sum(len(posting) for posting in self.postings),
+                "build_seconds": round(self.build_seconds, 2) if self.build_seconds is not None else None
+            }
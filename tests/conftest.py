@@ -0,0 +1,52 @@
+"""
+Shared helpers for the test suite.
+"""
+import asyncio
+
+import pytest
+
+
+class DummyContext:
+    """Minimal stand-in for the FastMCP Context passed to the tools."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def info(self, message):
+        self.messages.append(("info", message))
+
+    async def warning(self, message):
+        self.messages.append(("warning", message))
+
+    async def error(self, message):
+        self.messages.append(("error", message))
+
+
+@pytest.fixture
+def ctx():
+    return DummyContext()
+
+
+@pytest.fixture
+def run():
+    """Run a tool coroutine to completion."""
+    return asyncio.run
+
+
+@pytest.fixture
+def project_setup(monkeypatch, ctx):
+    """Write files under a directory and index them with setup_code_editor_tool (foreground)."""
+    from mcp_code_editor import server
+
+    monkeypatch.setattr(server.mcp, "project_state", server.ProjectState(), raising=False)
+
+    def _setup(root, files):
+        for relative, content in files.items():
+            path = root / relative
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+        result = asyncio.run(server.setup_code_editor_tool(str(root), background=False, ctx=ctx))
+        assert result["success"], result
+        return server.mcp.project_state
+
+    return _setup
@@ -0,0 +1,163 @@
+"""
+Queries served while the background indexer is still writing the indexes.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from mcp_code_editor import server
+from mcp_code_editor.tools.background_indexer import BackgroundIndexer
+from mcp_code_editor.tools.call_graph import CallGraph
+from mcp_code_editor.tools.fingerprint_index import FingerprintIndex
+from mcp_code_editor.tools.import_graph import ImportGraph
+from mcp_code_editor.tools.project_tools import ProjectState
+from mcp_code_editor.tools.reference_index import ReferenceIndex
+from mcp_code_editor.tools.span_index import SpanIndex
+
+
+def _write_project(root, files):
+    package = root / "pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "core.py").write_text("class Base:\n    pass\n\n\ndef target(value):\n    return value\n")
+    for number in range(files):
+        body = "\n".join(f"def use_{number}_{i}(x):\n    return target(x) + {i}\n" for i in range(5))
+        (package / f"mod_{number}.py").write_text(f"from pkg.core import target\n\n{body}")
+    return sorted(package.glob("*.py"))
+
+
+def _background_state(root, files):
+    state = ProjectState()
+    state.project_root = root
+    state.setup_complete = True
+    state.ast_enabled = True
+    state.reference_index = ReferenceIndex()
+    state.call_graph = CallGraph()
+    state.fingerprint_index = FingerprintIndex()
+    state.import_graph = ImportGraph()
+    state.span_index = SpanIndex()
+    state.indexer = BackgroundIndexer(state, files)
+    return state
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    files = _write_project(tmp_path, files=20)
+    state = _background_state(tmp_path, files)
+    monkeypatch.setattr(server.mcp, "project_state", state, raising=False)
+    state.indexer.start()
+    assert state.indexer.wait_for([str(path) for path in files], timeout=30)
+    return state, str(tmp_path / "pkg" / "core.py")
+
+
+def _waits_for_index_lock(state, make_call):
+    """Run a tool while another thread holds the index lock; return (blocked, result)."""
+    held = threading.Event()
+    release = threading.Event()
+
+    def _hold_lock():
+        with state.index_lock:
+            held.set()
+            release.wait()
+
+    holder = threading.Thread(target=_hold_lock)
+    holder.start()
+    held.wait()
+
+    outcome = {}
+    runner = threading.Thread(target=lambda: outcome.setdefault("result", asyncio.run(make_call())))
+    runner.start()
+    runner.join(0.3)
+    blocked = runner.is_alive()
+
+    release.set()
+    runner.join()
+    holder.join()
+    return blocked, outcome["result"]
+
+
+def test_reference_lookup_under_index_lock_while_files_are_added():
+    index = ReferenceIndex()
+    lock = threading.RLock()
+    references = [("target", line, "call") for line in range(5)]
+    for number in range(2000):
+        index.add_file(f"/f{number}.py", references)
+
+    stop = threading.Event()
+
+    def _writer():
+        number = 2000
+        while not stop.is_set():
+            with lock:
+                index.add_file(f"/f{number}.py", references)
+            number += 1
+
+    writer = threading.Thread(target=_writer)
+    writer.start()
+    try:
+        for _ in range(50):
+            with lock:
+                assert len(index.lookup("target")) >= 2000 * 5
+    finally:
+        stop.set()
+        writer.join()
+
+
+@pytest.mark.parametrize("make_call", [
+    lambda core, ctx: server.get_code_definition("target", include_usage=True, ctx=ctx),
+    lambda core, ctx: server.get_module_imports_tool(core, ctx=ctx),
+    lambda core, ctx: server.get_class_hierarchy_tool("Base", ctx=ctx),
+    lambda core, ctx: server.query_definitions_tool(argument="x", ctx=ctx),
+    lambda core, ctx: server.read_file_with_lines_tool(core, 1, 2, ctx=ctx),
+    lambda core, ctx: server.read_files_tool([{"path": core}], ctx=ctx),
+    lambda core, ctx: server.read_definition_tool("target", ctx=ctx),
+], ids=["get_code_definition", "get_module_imports", "get_class_hierarchy", "query_definitions",
+        "read_file_with_lines", "read_files", "read_definition"])
+def test_index_queries_wait_for_index_writers(project, ctx, make_call):
+    state, core = project
+    blocked, result = _waits_for_index_lock(state, lambda: make_call(core, ctx))
+    assert blocked
+    assert result["success"], result
+
+
+def test_apply_diff_analysis_waits_for_index_writers(project, ctx):
+    state, core = project
+    blocks = [{"start_line": 6, "search_content": "    return value", "replace_content": "    return value + 1"}]
+    blocked, result = _waits_for_index_lock(state, lambda: server.apply_diff_tool(core, blocks, ctx=ctx))
+    assert blocked
+    assert result["success"], result
+
+
+def test_queries_during_background_indexing(tmp_path, ctx, run, monkeypatch):
+    files = _write_project(tmp_path, files=100)
+    state = _background_state(tmp_path, files)
+    monkeypatch.setattr(server.mcp, "project_state", state, raising=False)
+    state.indexer.start()
+
+    results = []
+    while not state.indexer.ready:
+        results.append(run(server.get_code_definition("target", include_usage=True, ctx=ctx)))
+    results.append(run(server.get_code_definition("target", include_usage=True, ctx=ctx)))
+
+    failures = [result for result in results if not result.get("success")]
+    assert not failures, failures[0]
+    assert results[-1]["total_usages"] > 0
+
+
+def test_stopped_indexer_does_not_write_into_the_indexes(tmp_path):
+    files = _write_project(tmp_path, files=3)
+    state = _background_state(tmp_path, files)
+
+    # The indexer analyzes its first file, then waits for the index lock
+    with state.index_lock:
+        state.indexer.start()
+        time.sleep(0.2)
+        state.indexer.stop()
+    state.indexer.join(timeout=10)
+
+    assert not state.indexer._thread.is_alive()
+
+    assert state.ast_index == []
+    assert state.index_generation == 0
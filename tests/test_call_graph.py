@@ -0,0 +1,43 @@
+"""
+CallGraph edges, per-file ownership and memoized reverse reachability.
+"""
+from mcp_code_editor.tools.call_graph import CallGraph
+
+
+def test_direct_dependents_and_chains():
+    graph = CallGraph()
+    graph.add_file("/a.py", {"a.load": ("load", {"read"}), "a.main": ("main", {"load"})})
+    graph.add_file("/b.py", {"b.cli": ("cli", {"main"})})
+
+    assert graph.direct_dependents("read") == {"load"}
+    assert graph.reverse_reachable("read", 3) == {"load": (1, "read"), "main": (2, "load"), "cli": (3, "main")}
+    assert graph.dependency_chains("read", 3) == [["read", "load", "main"]]
+    assert graph.get_stats() == {"files": 2, "callers": 3, "edges": 3}
+
+
+def test_update_file_invalidates_cached_reachability():
+    graph = CallGraph()
+    graph.add_file("/a.py", {"a.load": ("load", {"read"})})
+    assert graph.reverse_reachable("read", 2) == {"load": (1, "read")}
+
+    graph.add_file("/b.py", {"b.main": ("main", {"load"})})
+    assert graph.reverse_reachable("read", 2) == {"load": (1, "read"), "main": (2, "load")}
+
+    graph.update_file("/a.py", {"a.load": ("load", {"parse"})})
+    assert graph.reverse_reachable("read", 2) == {}
+    assert graph.direct_dependents("parse") == {"load"}
+
+
+def test_same_qualified_name_in_two_files():
+    graph = CallGraph()
+    graph.add_file("/x/conftest.py", {"conftest.setup": ("setup", {"connect"})})
+    graph.add_file("/y/conftest.py", {"conftest.setup": ("setup", {"connect", "seed"})})
+
+    graph.remove_file("/x/conftest.py")
+    assert graph.direct_dependents("connect") == {"setup"}
+    assert graph.direct_dependents("seed") == {"setup"}
+    assert graph.file_calls("/y/conftest.py") == {"conftest.setup": ("setup", {"connect", "seed"})}
+
+    graph.remove_file("/y/conftest.py")
+    assert graph.direct_dependents("connect") == set()
+    assert graph.get_stats() == {"files": 0, "callers": 0, "edges": 0}
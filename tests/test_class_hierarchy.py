@@ -0,0 +1,38 @@
+"""
+ClassHierarchy base resolution and subclass/ancestor queries.
+"""
+from mcp_code_editor.tools.class_hierarchy import ClassHierarchy
+
+FILES = {
+    "shop/__init__.py": "from .base import Model\n",
+    "shop/base.py": "class Model:\n    pass\n\n\nclass Error(Exception):\n    pass\n",
+    "shop/orders.py": "from .base import Model\n\n\nclass Order(Model):\n    pass\n",
+    "shop/special.py": "import shop.orders as orders\n\n\nclass Rush(orders.Order):\n    pass\n",
+    "app.py": "from shop import Model\n\n\nclass Customer(Model):\n    class Meta:\n        pass\n\n    class Admin(Meta):\n        pass\n",
+}
+
+
+def _hierarchy(tmp_path, project_setup):
+    return ClassHierarchy(project_setup(tmp_path, FILES).ast_index)
+
+
+def test_bases_are_resolved_through_imports_and_reexports(tmp_path, project_setup):
+    hierarchy = _hierarchy(tmp_path, project_setup)
+
+    assert hierarchy.bases["shop.orders.Order"] == ["shop.base.Model"]
+    assert hierarchy.bases["shop.special.Rush"] == ["shop.orders.Order"]
+    assert hierarchy.bases["app.Customer"] == ["shop.base.Model"]
+    assert hierarchy.bases["app.Customer.Admin"] == ["app.Customer.Meta"]
+    # Classes outside the project keep their name
+    assert hierarchy.bases["shop.base.Error"] == ["Exception"]
+
+
+def test_subclass_and_ancestor_queries(tmp_path, project_setup):
+    hierarchy = _hierarchy(tmp_path, project_setup)
+
+    assert sorted(hierarchy.direct_subclasses("shop.base.Model")) == ["app.Customer", "shop.orders.Order"]
+    assert sorted(hierarchy.all_subclasses("shop.base.Model")) == [
+        ("app.Customer", 1), ("shop.orders.Order", 1), ("shop.special.Rush", 2)]
+    assert hierarchy.ancestors("shop.special.Rush") == [("shop.orders.Order", 1), ("shop.base.Model", 2)]
+    assert hierarchy.all_subclasses("Exception") == [("shop.base.Error", 1)]
+    assert hierarchy.find("Order") == ["shop.orders.Order"]
@@ -0,0 +1,23 @@
+"""
+get_code_definition on an indexed project.
+"""
+from mcp_code_editor import server
+
+
+FILES = {
+    "shop/__init__.py": "",
+    "shop/models.py": "class Order:\n    def save(self):\n        return 1\n",
+    "shop/cart.py": "from shop.models import Order\n\n\ndef checkout():\n    Order().save()\n",
+}
+
+
+def test_dotted_query_reports_usages_of_the_resolved_definition(tmp_path, ctx, run, project_setup):
+    project_setup(tmp_path, FILES)
+
+    dotted = run(server.get_code_definition("Order.save", include_usage=True, ctx=ctx))
+    plain = run(server.get_code_definition("save", include_usage=True, ctx=ctx))
+
+    assert dotted["success"] and dotted["found"]
+    assert [d["qualified_name"] for d in dotted["definitions"]] == ["shop.models.Order.save"]
+    assert dotted["total_usages"] == plain["total_usages"] > 0
+    assert {u["file"] for u in dotted["usage_locations"]} == {str((tmp_path / "shop" / "cart.py").resolve())}
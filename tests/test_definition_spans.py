@@ -0,0 +1,73 @@
+"""
+Definition and docstring byte spans read on demand from the file.
+"""
+from mcp_code_editor.tools.ast_analyzer import (get_definition_docstring, get_definition_source,
+                                                shift_lines_for_ranges)
+from mcp_code_editor.tools.diff_tools import apply_diff
+from mcp_code_editor.tools.project_tools import update_file_ast_index
+
+SOURCE = '''# -*- coding: utf-8 -*-
+"""Module."""
+
+
+class Café:
+    """
+    A café.
+
+    Serves coffee.
+    """
+
+    async def brew(self, cups=1):
+        \'\'\'Brew some cups.\'\'\'
+        return cups
+
+
+def plain():
+    return None
+'''
+
+
+def _definitions(path):
+    return {d["name"]: d for d in update_file_ast_index(str(path), []) if d["type"] in ("function", "class")}
+
+
+def test_spans_are_stored_instead_of_docstring_text(tmp_path):
+    path = tmp_path / "cafe.py"
+    path.write_text(SOURCE, encoding="utf-8")
+    definitions = _definitions(path)
+
+    assert "docstring" not in definitions["Café"]
+    assert get_definition_docstring(definitions["Café"]) == "A café.\n\nServes coffee."
+    assert get_definition_docstring(definitions["brew"]) == "Brew some cups."
+    assert get_definition_docstring(definitions["plain"]) is None
+    assert get_definition_source(definitions["brew"]) == (
+        "async def brew(self, cups=1):\n        '''Brew some cups.'''\n        return cups")
+    assert get_definition_source(definitions["plain"]) == "def plain():\n    return None"
+
+
+def test_spans_survive_line_shifts_and_edits_inside_the_definition(tmp_path):
+    path = tmp_path / "cafe.py"
+    path.write_text(SOURCE, encoding="utf-8")
+    index = update_file_ast_index(str(path), [])
+
+    result = apply_diff(str(path), [
+        {"start_line": 2, "search_content": '"""Module."""', "replace_content": '"""Module."""\nimport os'},
+        {"start_line": 14, "search_content": "        return cups",
+         "replace_content": "        cups += 1\n        return cups"},
+    ])
+    assert result["success"], result
+    shift_lines_for_ranges(path, index, result["applied_ranges"])
+    definitions = {d["name"]: d for d in index if d["type"] in ("function", "class")}
+
+    assert get_definition_docstring(definitions["Café"]) == "A café.\n\nServes coffee."
+    assert get_definition_source(definitions["brew"]).endswith("cups += 1\n        return cups")
+    assert get_definition_source(definitions["plain"]) == "def plain():\n    return None"
+
+
+def test_spans_are_recomputed_after_an_external_edit(tmp_path):
+    path = tmp_path / "cafe.py"
+    path.write_text(SOURCE, encoding="utf-8")
+    definitions = _definitions(path)
+
+    path.write_text(SOURCE.replace("Brew some cups.", "Brew a lot of cups, slowly."), encoding="utf-8")
+    assert get_definition_docstring(definitions["brew"]) == "Brew a lot of cups, slowly."
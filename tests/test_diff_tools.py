@@ -0,0 +1,35 @@
+"""
+apply_diff block matching and the original line ranges it reports.
+"""
+from mcp_code_editor.tools.diff_tools import apply_diff
+
+SOURCE = "a = 1\nb = 2\nc = 3\nd = 4\ne = 5\nf = 6\n"
+
+
+def test_applied_ranges_are_original_line_numbers(tmp_path):
+    path = tmp_path / "values.py"
+    path.write_text(SOURCE)
+
+    # The second block's hint is below the first one's, but it matches above it
+    result = apply_diff(str(path), [
+        {"start_line": 1, "search_content": "f = 6", "replace_content": "f = 60"},
+        {"start_line": 3, "search_content": "a = 1", "replace_content": "a = 1\na2 = 1\na3 = 1"},
+    ])
+
+    assert result["success"], result
+    assert result["applied_ranges"] == [(1, 1, 3), (6, 6, 1)]
+    assert path.read_text() == "a = 1\na2 = 1\na3 = 1\nb = 2\nc = 3\nd = 4\ne = 5\nf = 60\n"
+
+
+def test_overlapping_blocks_are_rejected(tmp_path):
+    path = tmp_path / "values.py"
+    path.write_text(SOURCE)
+
+    result = apply_diff(str(path), [
+        {"start_line": 2, "search_content": "b = 2", "replace_content": "b = 20"},
+        {"start_line": 2, "search_content": "b = 2\nc = 3", "replace_content": "bc = 23"},
+    ])
+
+    assert not result["success"]
+    assert "overlap" in result["message"]
+    assert path.read_text() == SOURCE
@@ -0,0 +1,84 @@
+"""
+Stat-validated file content cache.
+"""
+import os
+
+import pytest
+
+from mcp_code_editor.core.file_cache import FileCache
+
+
+def test_reads_are_served_from_memory_until_the_file_changes(tmp_path):
+    path = tmp_path / "app.py"
+    path.write_text("x = 1\n")
+    cache = FileCache()
+
+    assert cache.read_text(path) == "x = 1\n"
+    assert cache.read_text(str(path)) == "x = 1\n"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Same size written outside the server: the mtime still tells the change apart
+    path.write_text("x = 2\n")
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+    assert cache.read_text(path) == "x = 2\n"
+    assert cache.misses == 2
+
+    # A replaced file has a new inode
+    replacement = tmp_path / "app.py.new"
+    replacement.write_text("x = 3\n")
+    os.replace(replacement, path)
+    assert cache.read_text(path) == "x = 3\n"
+    assert cache.misses == 3
+
+
+def test_write_text_keeps_the_written_content(tmp_path):
+    path = tmp_path / "app.py"
+    cache = FileCache()
+
+    cache.write_text(path, "def main():\n    pass\n")
+    assert cache.read_text(path) == "def main():\n    pass\n"
+    assert (cache.hits, cache.misses) == (1, 0)
+
+    # Line endings are translated on reads, so the written text is not cached
+    cache.write_text(path, "a\r\nb\r\n")
+    assert cache.get_stats()["files"] == 0
+    assert cache.read_text(path) == open(path, 'r', encoding='utf-8').read() == "a\nb\n"
+
+
+def test_eviction_and_large_files(tmp_path):
+    paths = []
+    for number in range(3):
+        path = tmp_path / f"file_{number}.txt"
+        path.write_text(str(number) * 10)
+        paths.append(path)
+    large = tmp_path / "large.txt"
+    large.write_text("y" * 50)
+
+    cache = FileCache(max_bytes=25, max_file_size=40)
+    cache.read_text(paths[0])
+    cache.read_text(paths[1])
+    cache.read_text(paths[0])
+    cache.read_text(paths[2])
+    assert list(cache.entries) == [str(paths[0]), str(paths[2])]
+    assert cache.get_stats()["bytes"] == 20
+
+    assert cache.read_text(large) == "y" * 50
+    assert str(large) not in cache.entries
+    assert cache.get_stats()["bytes"] == 20
+
+    cache.invalidate(paths[0])
+    assert cache.get_stats() == {"files": 1, "bytes": 10, "hits": 1, "misses": 4}
+    cache.clear()
+    assert cache.get_stats()["files"] == cache.get_stats()["bytes"] == 0
+
+
+def test_missing_and_undecodable_files(tmp_path):
+    cache = FileCache()
+    binary = tmp_path / "data.bin"
+    binary.write_bytes(b"\xff\xfe\x00")
+
+    with pytest.raises(OSError):
+        cache.read_text(tmp_path / "missing.py")
+    with pytest.raises(UnicodeDecodeError):
+        cache.read_text(binary)
+    assert cache.get_stats()["files"] == 0
@@ -0,0 +1,65 @@
+"""
+Winnowing fingerprints and similar/duplicate function lookups.
+"""
+import random
+
+import pytest
+
+from mcp_code_editor.tools.fingerprint_index import KGRAM_SIZE, WINNOW_WINDOW, winnow
+
+TOTAL = '''
+def total(items, tax):
+    result = 0
+    for item in items:
+        if item.price > 0 and not item.free:
+            result += item.price * item.quantity
+        else:
+            result -= item.discount
+    return round(result * (1 + tax), 2)
+'''
+
+SUM_PRICES = TOTAL.replace("total", "sum_prices").replace("items", "products").replace("item", "product")
+
+UNRELATED = '''
+def parse(text):
+    words = text.split()
+    return {word: len(word) for word in words if word.isalpha()}
+'''
+
+
+def test_winnow_guarantees_shared_fingerprints_for_long_shared_runs():
+    rng = random.Random(3)
+    shared = [f"t{rng.randint(0, 99)}" for _ in range(KGRAM_SIZE + WINNOW_WINDOW - 1)]
+    first = [f"a{i}" for i in range(20)] + shared + [f"b{i}" for i in range(20)]
+    second = [f"c{i}" for i in range(7)] + shared
+
+    assert winnow(first) & winnow(second)
+    assert winnow(first) == winnow(list(first))
+    assert winnow(shared[:KGRAM_SIZE - 1]) == set()
+
+
+@pytest.fixture
+def state(tmp_path, project_setup):
+    return project_setup(tmp_path, {"a.py": TOTAL, "b.py": SUM_PRICES, "c.py": UNRELATED})
+
+
+def test_similar_functions_ignore_identifier_names(state, tmp_path):
+    index = state.fingerprint_index
+    [total] = index.find_functions("total")
+
+    similar = index.similar_to(total, threshold=0.5)
+    assert [key for key, _ in similar] == [(str((tmp_path / "b.py").resolve()), "b.sum_prices")]
+    assert similar[0][1] > 0.9
+
+
+def test_duplicates_and_file_removal(state, tmp_path):
+    index = state.fingerprint_index
+    a, b = (str((tmp_path / name).resolve()) for name in ("a.py", "b.py"))
+
+    assert [(first, second) for first, second, _ in index.duplicates(min_tokens=10)] == [
+        ((a, "a.total"), (b, "b.sum_prices"))]
+
+    index.remove_file(b)
+    assert index.duplicates(min_tokens=10) == []
+    assert index.find_functions("sum_prices") == []
+    assert index.get_stats()["functions"] == 2
@@ -0,0 +1,61 @@
+"""
+ImportGraph edges, transitive importers and usage narrowing.
+"""
+import pytest
+
+FILES = {
+    "pkg/__init__.py": "from .models import Order\n",
+    "pkg/models.py": "class Order:\n    def save(self):\n        pass\n",
+    "pkg/tools.py": "from . import models\n",
+    "app.py": "from pkg import Order\n\nOrder()\n",
+    "other.py": "import os\n\nos.getcwd()\n",
+}
+
+
+@pytest.fixture
+def project(tmp_path, project_setup):
+    state = project_setup(tmp_path, FILES)
+    return state, {name: str((tmp_path / name).resolve()) for name in FILES}
+
+
+def test_importers_and_importees(project):
+    state, paths = project
+    graph = state.import_graph
+
+    assert graph.module_name(paths["pkg/models.py"]) == "pkg.models"
+    assert graph.importers(paths["pkg/models.py"]) == {paths["pkg/__init__.py"], paths["pkg/tools.py"]}
+    assert graph.importees(paths["app.py"]) == {paths["pkg/__init__.py"]}
+    assert graph.external_imports(paths["other.py"]) == {"os"}
+
+
+def test_transitive_importers_follow_package_reexports(project):
+    state, paths = project
+    graph = state.import_graph
+
+    assert graph.transitive_importers(paths["pkg/models.py"]) == {
+        paths["pkg/__init__.py"], paths["pkg/tools.py"], paths["app.py"]}
+    assert graph.transitive_importers(paths["pkg/models.py"], max_depth=1) == graph.importers(paths["pkg/models.py"])
+    assert graph.transitive_importees(paths["app.py"]) == {paths["pkg/__init__.py"], paths["pkg/models.py"]}
+
+
+def test_visible_files(project):
+    state, paths = project
+    graph = state.import_graph
+    order = [d for d in state.ast_index if d.get("qualified_name") == "pkg.models.Order"]
+    save = [d for d in state.ast_index if d.get("qualified_name") == "pkg.models.Order.save"]
+
+    assert graph.visible_files(order) == {paths["pkg/models.py"], paths["pkg/__init__.py"],
+                                          paths["pkg/tools.py"], paths["app.py"]}
+    # Methods can be reached through objects from any file
+    assert graph.visible_files(save) is None
+
+
+def test_remove_and_update_file(project):
+    state, paths = project
+    graph = state.import_graph
+
+    graph.remove_file(paths["pkg/tools.py"])
+    assert graph.importers(paths["pkg/models.py"]) == {paths["pkg/__init__.py"]}
+
+    graph.update_file(paths["app.py"], [])
+    assert graph.transitive_importers(paths["pkg/models.py"]) == {paths["pkg/__init__.py"]}
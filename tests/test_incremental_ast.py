@@ -0,0 +1,98 @@
+"""
+Incremental AST updates (line shifting and range re-parsing) compared with a fresh parse.
+"""
+import pytest
+
+from mcp_code_editor.tools.ast_analyzer import LineDeltaMap, shift_lines_for_ranges, update_ast_for_ranges
+from mcp_code_editor.tools.diff_tools import apply_diff
+from mcp_code_editor.tools.project_tools import update_file_ast_index
+
+SOURCE = '''import os
+
+
+def first(value):
+    """Return the value."""
+    return value
+
+
+class Service:
+    @property
+    def name(self):
+        return "service"
+
+    def run(self):
+        first(1)
+        return os.getcwd()
+
+
+LIMIT = 10
+'''
+
+LOCATION_KEYS = ("name", "type", "line", "line_start", "line_end", "decorator_line")
+
+
+def _locations(definitions):
+    return sorted(tuple(d.get(key) for key in LOCATION_KEYS) for d in definitions)
+
+
+def _index(path):
+    spans = {}
+    definitions = update_file_ast_index(str(path), [], spans=spans)
+    return definitions, spans
+
+
+@pytest.fixture
+def module(tmp_path):
+    path = tmp_path / "module.py"
+    path.write_text(SOURCE)
+    return path
+
+
+def test_line_delta_map():
+    line_map = LineDeltaMap([(5, 5, 3), (10, 12, 1)])
+    assert [line_map.map(line) for line in (4, 5, 6, 10, 11, 12, 13)] == [4, 7, 8, 12, 13, 12, 13]
+
+
+def test_line_delta_map_end_lines_skip_added_comments():
+    lines = ["def f():", "    return 1", "    # trailing", ""]
+    line_map = LineDeltaMap([(2, 2, 3)], lines)
+    assert line_map.map(2) == 4
+    assert line_map.map_end(2) == 2
+
+
+BLOCKS = {
+    "trailing_comment": [{"start_line": 16, "search_content": "        return os.getcwd()",
+                          "replace_content": "        return os.getcwd()\n        # cwd of the process"}],
+    "body_grows": [{"start_line": 6, "search_content": "    return value",
+                    "replace_content": "    value = value\n    return value"}],
+    "comment_before_class": [{"start_line": 9, "search_content": "class Service:",
+                              "replace_content": "# Services\n\nclass Service:"}],
+    "lines_removed": [{"start_line": 14, "search_content": "    def run(self):\n        first(1)\n",
+                       "replace_content": "    def run(self):\n"}],
+}
+
+
+@pytest.mark.parametrize("blocks", BLOCKS.values(), ids=BLOCKS.keys())
+def test_shift_lines_matches_fresh_parse(module, blocks):
+    definitions, spans = _index(module)
+    result = apply_diff(str(module), blocks)
+    assert result["success"], result
+
+    shift_lines_for_ranges(module, definitions, result["applied_ranges"], spans)
+
+    fresh_definitions, fresh_spans = _index(module)
+    assert _locations(definitions) == _locations(fresh_definitions)
+    assert spans == fresh_spans
+
+
+@pytest.mark.parametrize("blocks", BLOCKS.values(), ids=BLOCKS.keys())
+def test_update_ast_for_ranges_matches_fresh_parse(module, blocks):
+    definitions, spans = _index(module)
+    result = apply_diff(str(module), blocks)
+    assert result["success"], result
+
+    updated = update_ast_for_ranges(module, definitions, result["applied_ranges"], spans)
+
+    fresh_definitions, fresh_spans = _index(module)
+    assert _locations(updated) == _locations(fresh_definitions)
+    assert spans == fresh_spans
@@ -0,0 +1,102 @@
+"""
+Index export/import round trips.
+"""
+import time
+
+import pytest
+
+from mcp_code_editor import server
+from mcp_code_editor.tools.index_export import export_index, import_index
+
+FILES = {
+    "shop/__init__.py": "",
+    "shop/models.py": (
+        "class Order:\n"
+        "    \"\"\"An order.\"\"\"\n"
+        "\n"
+        "    def save(self):\n"
+        "        return validate(self)\n"
+        "\n"
+        "\n"
+        "def validate(order):\n"
+        "    return order is not None\n"
+    ),
+    "shop/cart.py": "from shop.models import Order\n\n\ndef checkout():\n    Order().save()\n",
+}
+
+KEYS = ("file", "name", "qualified_name", "type", "line", "line_start", "line_end")
+
+
+def _snapshot(state):
+    definitions = sorted(tuple(d.get(key) for key in KEYS) for d in state.ast_index)
+    files = sorted({d["file"] for d in state.ast_index})
+    references = {f: sorted(tuple(r) for r in state.reference_index.file_references(f)) for f in files}
+    calls = {f: {caller: (name, sorted(callees)) for caller, (name, callees) in state.call_graph.file_calls(f).items()}
+             for f in files}
+    return definitions, references, calls, {f: [tuple(s) for s in state.statement_spans.get(f, [])] for f in files}
+
+
+def _wait_ready(state, timeout=30):
+    deadline = time.time() + timeout
+    while not state.indexer.ready:
+        assert time.time() < deadline, "background indexing did not finish"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def exported(tmp_path, project_setup):
+    state = project_setup(tmp_path, FILES)
+    path = tmp_path / "index.jsonl.gz"
+    result = export_index(state, str(path))
+    assert result["success"], result
+    assert result["files"] == 3
+    return tmp_path, path, _snapshot(state)
+
+
+def test_round_trip_restores_the_indexes(exported, ctx, run):
+    root, path, expected = exported
+    run(server.setup_code_editor_tool(str(root), background=False, analyze_ast=False, ctx=ctx))
+    state = server.mcp.project_state
+
+    result = import_index(state, str(path))
+    _wait_ready(state)
+
+    assert result["success"], result
+    assert (result["imported_files"], result["reindexed_files"]) == (3, 0)
+    assert _snapshot(state) == expected
+
+
+def test_changed_files_are_reindexed(exported, ctx, run):
+    root, path, _ = exported
+    cart = root / "shop" / "cart.py"
+    cart.write_text(cart.read_text() + "\n\ndef empty():\n    pass\n")
+    run(server.setup_code_editor_tool(str(root), background=False, ctx=ctx))
+    fresh = _snapshot(server.mcp.project_state)
+
+    run(server.setup_code_editor_tool(str(root), background=False, analyze_ast=False, ctx=ctx))
+    state = server.mcp.project_state
+    result = import_index(state, str(path))
+    _wait_ready(state)
+
+    assert (result["imported_files"], result["reindexed_files"]) == (2, 1)
+    assert _snapshot(state) == fresh
+
+
+def test_import_replaces_a_running_indexer(tmp_path, ctx, run, project_setup):
+    files = dict(FILES)
+    for number in range(200):
+        files[f"shop/mod_{number}.py"] = "".join(f"def f{i}():\n    return {i}\n\n" for i in range(20))
+    state = project_setup(tmp_path, files)
+    path = tmp_path / "index.jsonl.gz"
+    assert export_index(state, str(path))["success"]
+    expected = _snapshot(state)
+
+    run(server.setup_code_editor_tool(str(tmp_path), background=True, ctx=ctx))
+    state = server.mcp.project_state
+    previous = state.indexer
+    result = import_index(state, str(path))
+    _wait_ready(state)
+
+    assert result["success"], result
+    assert not previous._thread.is_alive()
+    assert _snapshot(state) == expected
@@ -0,0 +1,59 @@
+"""
+Caches derived from the AST index follow the index generation of the project state.
+"""
+from mcp_code_editor.tools.background_indexer import BackgroundIndexer
+from mcp_code_editor.tools.class_hierarchy import get_class_hierarchy
+from mcp_code_editor.tools.project_tools import ProjectState, refresh_file_index, search_definitions
+from mcp_code_editor.tools.symbol_index import get_symbol_index
+
+
+def _definitions():
+    return [
+        {"name": "Base", "qualified_name": "m.Base", "type": "class", "file": "/m.py", "inheritance": []},
+        {"name": "Child", "qualified_name": "m.Child", "type": "class", "file": "/m.py", "inheritance": ["Base"]},
+    ]
+
+
+def test_symbol_index_is_reused_within_a_generation():
+    definitions = _definitions()
+    index = get_symbol_index(definitions, cache_key="test", generation=1)
+    assert get_symbol_index(definitions, cache_key="test", generation=1) is index
+    assert get_symbol_index(definitions, cache_key="test", generation=2) is not index
+    assert get_symbol_index(list(definitions), cache_key="test", generation=2) is not index
+
+
+def test_in_place_change_with_same_count_is_seen_after_a_new_generation():
+    definitions = _definitions()
+    assert search_definitions("Child", definitions, generation=1)
+
+    definitions[1] = dict(definitions[1], name="Renamed", qualified_name="m.Renamed")
+    assert [d["name"] for d in search_definitions("Renamed", definitions, generation=2)] == ["Renamed"]
+    assert search_definitions("Child", definitions, generation=2) == []
+
+
+def test_class_hierarchy_follows_the_generation():
+    definitions = _definitions()
+    hierarchy = get_class_hierarchy(definitions, cache_key="test", generation=1)
+    assert get_class_hierarchy(definitions, cache_key="test", generation=1) is hierarchy
+    assert hierarchy.subclasses["m.Base"] == ["m.Child"]
+
+    definitions[1] = dict(definitions[1], inheritance=[])
+    rebuilt = get_class_hierarchy(definitions, cache_key="test", generation=2)
+    assert rebuilt is not hierarchy
+    assert "m.Base" not in rebuilt.subclasses
+
+
+def test_index_updates_bump_the_generation(tmp_path):
+    module = tmp_path / "m.py"
+    module.write_text("class Base:\n    pass\n")
+    state = ProjectState()
+    state.project_root = tmp_path
+
+    state.indexer = BackgroundIndexer(state, [module])
+    state.indexer.start()
+    assert state.indexer.wait_for([str(module)], timeout=10)
+    indexed = state.index_generation
+    assert indexed > 0
+
+    refresh_file_index(state, str(module))
+    assert state.index_generation > indexed
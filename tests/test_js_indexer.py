@@ -0,0 +1,103 @@
+"""
+Lexical JavaScript/TypeScript symbol extraction.
+"""
+import pytest
+
+from mcp_code_editor.tools.ast_analyzer import clear_module_name_cache
+from mcp_code_editor.tools.js_indexer import JSAnalyzer, script_module_name
+
+SOURCE = '''import { Money } from "./money";
+const fs = require("fs");
+
+/** An order. */
+export class Order extends Base implements Saveable {
+  private total: Money;
+
+  constructor(total: Money) {
+    super();
+    this.total = total;
+  }
+
+  async save(): Promise<void> {
+    const pattern = /\\/orders\\/[0-9]+/g;
+    const label = `order ${this.total} {`;
+    await persist(this);
+  }
+}
+
+export interface Saveable {
+  save(): Promise<void>;
+}
+
+export type OrderId = string;
+
+export enum Status { Open, Closed }
+
+export function createOrder(total: Money): Order {
+  return new Order(total);
+}
+
+export const DEFAULT_LIMIT = 10;
+
+const handler = async (event) => {
+  return createOrder(event.total);
+};
+'''
+
+
+@pytest.fixture
+def analyzed(tmp_path):
+    (tmp_path / "package.json").write_text("{}")
+    (tmp_path / "src").mkdir()
+    path = tmp_path / "src" / "orders.ts"
+    path.write_text(SOURCE)
+    analyzer = JSAnalyzer()
+    definitions = {d.get("qualified_name") or d["name"]: d for d in analyzer.analyze_file(path)}
+    return definitions, analyzer.references
+
+
+def test_classes_and_methods(analyzed):
+    definitions, _ = analyzed
+    order = definitions["src.orders.Order"]
+
+    assert (order["line_start"], order["line_end"]) == (5, 18)
+    assert order["inheritance"] == ["Base", "Saveable"]
+    assert order["docstring"] == "An order."
+    assert [m["name"] for m in order["methods"]] == ["constructor", "save"]
+    # Regular expression and template literals do not unbalance the braces
+    save = definitions["src.orders.Order.save"]
+    assert (save["line_start"], save["line_end"], save["is_async"]) == (13, 17, True)
+    assert save["parent"] == "src.orders.Order"
+
+
+def test_functions_types_and_variables(analyzed):
+    definitions, _ = analyzed
+
+    assert definitions["src.orders.createOrder"]["args"] == ["total"]
+    assert definitions["src.orders.createOrder"]["exported"]
+    assert definitions["src.orders.handler"]["is_async"]
+    assert definitions["src.orders.Saveable"]["kind"] == "interface"
+    assert definitions["src.orders.Status"]["kind"] == "enum"
+    assert definitions["OrderId"]["value_type"] == "type"
+    assert definitions["DEFAULT_LIMIT"]["is_constant"]
+
+
+def test_imports_and_references(analyzed):
+    definitions, references = analyzed
+
+    assert (definitions["Money"]["module"], definitions["Money"]["import_type"]) == ("./money", "esm")
+    assert (definitions["fs"]["module"], definitions["fs"]["import_type"]) == ("fs", "require")
+    assert ("createOrder", 35, "call") in references
+    assert ("persist", 16, "call") in references
+    assert ("total", 10, "attribute") in references
+
+
+def test_module_names_follow_the_package_root(tmp_path):
+    (tmp_path / "lib").mkdir()
+    script = tmp_path / "lib" / "util.js"
+    script.write_text("export const x = 1;\n")
+    assert script_module_name(script) == "util"
+
+    (tmp_path / "package.json").write_text("{}")
+    clear_module_name_cache()
+    assert script_module_name(script) == "lib.util"
@@ -0,0 +1,97 @@
+"""
+Cached line offsets and memory-mapped line range reads.
+"""
+from pathlib import Path
+
+from mcp_code_editor.tools.file_operations import read_file_with_lines
+from mcp_code_editor.tools.line_index import LineIndex, compute_line_offsets, read_line_range
+
+
+def _readlines_range(path, start_line, end_line):
+    """Whole-file read the line index replaces."""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    return len(lines), [line.rstrip('\r\n') for line in lines[start_line - 1:end_line]]
+
+
+def test_compute_line_offsets(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_bytes(b"one\ntwo\r\n\nfour")
+    assert list(compute_line_offsets(path)) == [0, 4, 9, 10, 14]
+
+    path.write_bytes(b"one\ntwo\n")
+    assert list(compute_line_offsets(path)) == [0, 4, 8]
+
+    path.write_bytes(b"")
+    assert list(compute_line_offsets(path)) == [0]
+
+
+def test_read_line_range(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_bytes("alpha\r\nbéta\n\ngamma\n".encode("utf-8"))
+    offsets = compute_line_offsets(path)
+
+    assert read_line_range(path, offsets, 1, 4) == ["alpha", "béta", "", "gamma"]
+    assert read_line_range(path, offsets, 2, 2) == ["béta"]
+    assert read_line_range(path, offsets, 3, 3) == [""]
+
+
+def test_offsets_are_cached_until_the_file_changes(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text("a\nb\n")
+    index = LineIndex()
+
+    first = index.offsets(path)
+    assert index.offsets(path) is first
+    assert (index.hits, index.misses) == (1, 1)
+
+    path.write_text("a\nb\nc\n")
+    assert list(index.offsets(path)) == [0, 2, 4, 6]
+    assert index.misses == 2
+
+    index.invalidate(path)
+    index.offsets(path)
+    assert index.misses == 3
+    assert index.get_stats()["offsets"] == 4
+
+
+def test_least_recently_read_files_are_evicted(tmp_path):
+    paths = []
+    for number in range(3):
+        path = tmp_path / f"file_{number}.txt"
+        path.write_text("line\n" * 4)
+        paths.append(path)
+
+    index = LineIndex(max_offsets=10)
+    index.offsets(paths[0])
+    index.offsets(paths[1])
+    index.offsets(paths[0])
+    index.offsets(paths[2])
+
+    assert list(index.entries) == [str(paths[0]), str(paths[2])]
+    assert index.get_stats()["offsets"] == 10
+
+    # The most recent file is kept even if it alone exceeds the limit
+    small = LineIndex(max_offsets=2)
+    small.offsets(paths[0])
+    assert list(small.entries) == [str(paths[0])]
+
+
+def test_read_file_with_lines_matches_readlines(tmp_path):
+    path = tmp_path / "service.log"
+    path.write_text("".join(f"2024-01-01 INFO request={number} {'x' * (number % 7)}\n"
+                            for number in range(1, 301)))
+
+    for start, end in [(1, 1), (1, 300), (120, 169), (300, 300)]:
+        result = read_file_with_lines(str(path), start, end)
+        total, expected = _readlines_range(path, start, end)
+        assert result["total_lines"] == total
+        assert result["plain_content"] == "\n".join(expected)
+        assert result["content_with_numbers"] == "\n".join(
+            f"{start + i:4d}: {line}" for i, line in enumerate(expected))
+
+    path.write_text("short\nfile\n")
+    result = read_file_with_lines(str(path), 2, 2)
+    assert result["total_lines"] == 2 and result["plain_content"] == "file"
+    assert read_file_with_lines(str(path), 3, 3)["error"] == "ValidationError"
+    assert read_file_with_lines(str(Path("relative.txt")))["error"] == "ValidationError"
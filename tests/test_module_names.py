@@ -0,0 +1,30 @@
+"""
+Module names derived from package directories, and their cache.
+"""
+from mcp_code_editor.tools.ast_analyzer import module_name_for_path
+from mcp_code_editor.tools.project_tools import ProjectState, refresh_file_index
+
+
+def test_module_name_for_path(tmp_path):
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    (tmp_path / "pkg" / "__init__.py").write_text("")
+    (tmp_path / "pkg" / "sub" / "__init__.py").write_text("")
+
+    assert module_name_for_path(tmp_path / "pkg" / "sub" / "mod.py") == "pkg.sub.mod"
+    assert module_name_for_path(tmp_path / "pkg" / "sub" / "__init__.py") == "pkg.sub"
+    assert module_name_for_path(tmp_path / "script.py") == "script"
+
+
+def test_refresh_file_index_sees_a_new_package(tmp_path):
+    (tmp_path / "lib").mkdir()
+    module = tmp_path / "lib" / "mod.py"
+    module.write_text("def f():\n    pass\n")
+    assert module_name_for_path(module) == "mod"
+
+    init = tmp_path / "lib" / "__init__.py"
+    init.write_text("")
+    state = ProjectState()
+    state.project_root = tmp_path
+    refresh_file_index(state, str(init))
+
+    assert module_name_for_path(module) == "lib.mod"
@@ -0,0 +1,73 @@
+"""
+NameResolver confidence scores for references to a definition.
+"""
+import pytest
+
+from mcp_code_editor.tools.name_resolver import NameResolver
+
+FILES = {
+    "shop/__init__.py": "",
+    "shop/models.py": "class Order:\n    def save(self):\n        pass\n\n\ndef helper():\n    pass\n",
+    "use.py": (
+        "from shop.models import Order, helper\n"
+        "\n"
+        "\n"
+        "def f(obj):\n"
+        "    obj.save()\n"
+        "    helper()\n"
+        "\n"
+        "\n"
+        "class Rush(Order):\n"
+        "    def go(self):\n"
+        "        self.save()\n"
+    ),
+    "other.py": "def g(x):\n    x.save()\n",
+    "alias.py": "from shop.models import helper as h\n\n\ndef k(helper):\n    helper()\n    h()\n",
+    "mixed.py": "from shop.models import Order; from other import helper\n",
+}
+
+
+@pytest.fixture
+def project(tmp_path, project_setup):
+    state = project_setup(tmp_path, FILES)
+    definitions = {d.get("qualified_name"): d for d in state.ast_index}
+    resolver = NameResolver(state.ast_index, state.import_graph, ["helper", "save"])
+    return resolver, definitions, lambda name: str((tmp_path / name).resolve())
+
+
+def test_imported_function(project):
+    resolver, definitions, path = project
+    helper = definitions["shop.models.helper"]
+
+    assert resolver.resolve(helper, path("use.py"), 6, "call")[0] == 1.0
+    assert resolver.resolve(helper, path("use.py"), 1, "import")[0] == 1.0
+    # Stale line or unknown kind
+    assert resolver.resolve(helper, path("use.py"), 2, "call") is None
+    assert resolver.resolve(helper, path("use.py"), 6, "unknown") is None
+
+
+def test_methods(project):
+    resolver, definitions, path = project
+    save = definitions["shop.models.Order.save"]
+
+    assert resolver.resolve(save, path("use.py"), 11, "call")[0] == pytest.approx(0.95)
+    assert resolver.resolve(save, path("use.py"), 5, "call")[0] == pytest.approx(0.6)
+    assert resolver.resolve(save, path("other.py"), 2, "call")[0] < 0.3
+
+
+def test_shadowing_and_aliases(project):
+    resolver, definitions, path = project
+    helper = definitions["shop.models.helper"]
+
+    assert resolver.resolve(helper, path("alias.py"), 5, "call")[0] < 0.3
+    assert resolver.alias_references(helper) == [(path("alias.py"), "h")]
+    resolver.add_names(["h"])
+    assert resolver.resolve(helper, path("alias.py"), 6, "call", "h")[0] == 1.0
+
+
+def test_names_on_the_same_line_are_resolved_separately(project):
+    resolver, definitions, path = project
+    resolver.add_names(["Order"])
+
+    assert resolver.resolve(definitions["shop.models.Order"], path("mixed.py"), 1, "import")[0] == 1.0
+    assert resolver.resolve(definitions["shop.models.helper"], path("mixed.py"), 1, "import")[0] < 0.3
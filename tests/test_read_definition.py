@@ -0,0 +1,81 @@
+"""
+read_definition_tool: the source of one definition, by name.
+"""
+from mcp_code_editor import server
+
+
+MODELS = '''import functools
+
+
+class Order:
+    """An order of the shop.
+
+    Holds its lines.
+    """
+
+    @functools.lru_cache()
+    @staticmethod
+    def total(lines,
+              discount=0):
+        """Sum the lines."""
+        return sum(lines) - discount
+
+
+def helper():
+    return Order
+'''
+
+
+def test_definition_parts(tmp_path, ctx, run, project_setup):
+    project_setup(tmp_path, {"shop/__init__.py": "", "shop/models.py": MODELS})
+
+    full = run(server.read_definition_tool("Order.total", ctx=ctx))
+    assert full["success"] and full["qualified_name"] == "shop.models.Order.total"
+    assert full["line_range"] == {"start": 12, "end": 15}
+    assert full["content_with_numbers"].splitlines()[0] == "  12:     def total(lines,"
+    assert full["content_with_numbers"].splitlines()[-1] == "  15:         return sum(lines) - discount"
+
+    decorated = run(server.read_definition_tool("total", include_decorators=True, ctx=ctx))
+    assert decorated["line_range"] == {"start": 10, "end": 15}
+
+    signature = run(server.read_definition_tool("total", part="signature", ctx=ctx))
+    assert signature["line_range"] == {"start": 12, "end": 13}
+
+    docstring = run(server.read_definition_tool("Order", part="docstring", ctx=ctx))
+    assert docstring["docstring"] == "An order of the shop.\n\nHolds its lines."
+    undocumented = run(server.read_definition_tool("helper", part="docstring", ctx=ctx))
+    assert "docstring" not in undocumented
+    assert undocumented["message"] == "Function 'helper' has no docstring"
+
+    assert run(server.read_definition_tool("total", part="body", ctx=ctx))["error"] == "ValidationError"
+    assert run(server.read_definition_tool("missing", ctx=ctx))["error"] == "DefinitionNotFound"
+
+
+def test_definition_moved_outside_the_server_is_located_again(tmp_path, ctx, run, project_setup):
+    project_setup(tmp_path, {"shop/__init__.py": "", "shop/models.py": MODELS})
+    models = tmp_path / "shop" / "models.py"
+
+    models.write_text("import os\nimport sys\n\n" + MODELS)
+    moved = run(server.read_definition_tool("helper", ctx=ctx))
+    assert moved["line_range"] == {"start": 21, "end": 22}
+    assert moved["content_with_numbers"] == "  21: def helper():\n  22:     return Order"
+
+    models.write_text(MODELS.replace("def helper():\n    return Order\n", ""))
+    gone = run(server.read_definition_tool("helper", ctx=ctx))
+    assert gone["error"] == "DefinitionNotFound"
+
+
+def test_exact_name_among_many_prefix_matches(tmp_path, ctx, run, project_setup):
+    helpers = "".join(f"def get_{number}():\n    pass\n\n\n" for number in range(30))
+    project_setup(tmp_path, {"util/__init__.py": "", "util/a.py": helpers,
+                             "util/b.py": "def get():\n    return 1\n\n\nclass order:\n    pass\n\n\nclass Order:\n    pass\n"})
+
+    found = run(server.read_definition_tool("get", ctx=ctx))
+    assert found["success"] and found["qualified_name"] == "util.b.get"
+    assert not found.get("other_matches")
+
+    # Short and qualified names are both matched without case, exact case first
+    assert run(server.read_definition_tool("GET", ctx=ctx))["qualified_name"] == "util.b.get"
+    assert run(server.read_definition_tool("Order", ctx=ctx))["qualified_name"] == "util.b.Order"
+    assert run(server.read_definition_tool("order", ctx=ctx))["qualified_name"] == "util.b.order"
+    assert run(server.read_definition_tool("B.GET", ctx=ctx))["qualified_name"] == "util.b.get"
@@ -0,0 +1,50 @@
+"""
+read_files_tool batches against the single-file read tool.
+"""
+from mcp_code_editor import server
+
+
+FILES = {
+    "shop/__init__.py": "",
+    "shop/models.py": "class Order:\n    def save(self):\n        return 1\n\n\ndef total(orders):\n    return len(orders)\n",
+    "shop/cart.py": "from shop.models import Order\n\n\ndef checkout():\n    Order().save()\n",
+    "notes.txt": "first\nsecond\nthird\n",
+}
+
+
+def test_batch_results_match_single_reads(tmp_path, ctx, run, project_setup):
+    project_setup(tmp_path, FILES)
+    root = tmp_path.resolve()
+    requests = [
+        {"path": str(root / "shop" / "models.py")},
+        {"path": str(root / "shop" / "models.py"), "start_line": 6, "end_line": 7},
+        {"path": str(root / "shop" / "cart.py"), "start_line": 4},
+        {"path": str(root / "notes.txt"), "start_line": 2, "end_line": 3},
+    ]
+
+    batch = run(server.read_files_tool(requests, ctx=ctx))
+
+    assert batch["success"] and (batch["succeeded"], batch["failed"]) == (4, 0)
+    for request, result in zip(requests, batch["results"]):
+        single = run(server.read_file_with_lines_tool(request["path"], request.get("start_line"),
+                                                      request.get("end_line"), ctx=ctx))
+        assert result == single
+    assert "ast_info" in batch["results"][0]
+    assert "ast_info" not in batch["results"][3]
+
+
+def test_failing_items_do_not_fail_the_batch(tmp_path, ctx, run, project_setup):
+    project_setup(tmp_path, FILES)
+    notes = str(tmp_path.resolve() / "notes.txt")
+    missing = str(tmp_path.resolve() / "missing.py")
+
+    batch = run(server.read_files_tool([{"path": notes, "start_line": 9}, {"path": missing}, {},
+                                        {"path": notes, "end_line": 1}], ctx=ctx))
+
+    assert (batch["succeeded"], batch["failed"]) == (1, 3)
+    errors = [result.get("error") for result in batch["results"]]
+    assert errors == ["ValidationError", "FileNotFoundError", "ValidationError", None]
+    assert batch["results"][1]["file_path"] == missing
+    assert batch["results"][3]["content_with_numbers"] == "   1: first"
+
+    assert run(server.read_files_tool([], ctx=ctx))["error"] == "ValidationError"
@@ -0,0 +1,68 @@
+"""
+ReferenceIndex postings and their per-file updates.
+"""
+from mcp_code_editor.tools.reference_index import ReferenceIndex
+
+
+def _lookup(index, name, kinds=None):
+    return sorted((r["file"], r["line"], r["kind"]) for r in index.lookup(name, kinds))
+
+
+def test_lookup_by_name_and_kind():
+    index = ReferenceIndex()
+    index.add_file("/a.py", [("save", 3, "call"), ("save", 1, "import"), ("Order", 3, "name")])
+    index.add_file("/b.py", [("save", 7, "attribute")])
+
+    assert _lookup(index, "save") == [("/a.py", 1, "import"), ("/a.py", 3, "call"), ("/b.py", 7, "attribute")]
+    assert _lookup(index, "save", {"call", "attribute"}) == [("/a.py", 3, "call"), ("/b.py", 7, "attribute")]
+    assert index.lookup("missing") == []
+    assert index.get_stats() == {"files": 2, "names": 2, "references": 4}
+
+
+def test_update_replaces_only_the_file_segments():
+    index = ReferenceIndex()
+    index.add_file("/a.py", [("save", 3, "call"), ("load", 4, "call")])
+    index.add_file("/b.py", [("save", 7, "call")])
+
+    index.update_file("/a.py", [("save", 5, "call")])
+
+    assert _lookup(index, "save") == [("/a.py", 5, "call"), ("/b.py", 7, "call")]
+    assert index.lookup("load") == []
+    assert sorted(index.file_references("/a.py")) == [("save", 5, "call")]
+
+
+def test_remove_file():
+    index = ReferenceIndex()
+    index.add_file("/a.py", [("save", 3, "call")])
+
+    assert index.remove_file("/a.py")
+    assert not index.remove_file("/a.py")
+    assert not index.has_file("/a.py")
+    assert index.lookup("save") == []
+    assert index.file_references("/a.py") == []
+
+    # A removed file keeps its id when it is indexed again
+    index.add_file("/a.py", [("save", 1, "call")])
+    assert index.file_id("/a.py") == 0
+    assert _lookup(index, "save") == [("/a.py", 1, "call")]
+
+
+def test_edits_keep_the_project_reference_index_current(tmp_path, ctx, run, project_setup):
+    from mcp_code_editor import server
+
+    state = project_setup(tmp_path, {
+        "core.py": "def save():\n    pass\n",
+        "use.py": "from core import save\n\n\ndef run():\n    save()\n",
+    })
+    use = str((tmp_path / "use.py").resolve())
+
+    result = run(server.apply_diff_tool(use, [{"start_line": 4, "search_content": "def run():",
+                                               "replace_content": "# Entry point\ndef run():"}], ctx=ctx))
+    assert result["success"], result
+    assert (use, 6, "call") in _lookup(state.reference_index, "save")
+
+    server.create_file_tool(str(tmp_path / "other.py"), "from core import save\nsave()\n")
+    assert (str((tmp_path / "other.py").resolve()), 2, "call") in _lookup(state.reference_index, "save")
+
+    server.delete_file_tool(use)
+    assert all(file != use for file, _, _ in _lookup(state.reference_index, "save"))
@@ -0,0 +1,69 @@
+"""
+SecondaryIndex structured definition queries.
+"""
+import pytest
+
+from mcp_code_editor.tools.secondary_index import SecondaryIndex
+
+SOURCE = '''from typing import Any, Dict
+import mcp
+
+
+class Base:
+    pass
+
+
+class Service(Base):
+    async def start(self):
+        pass
+
+
+class Worker(Service):
+    def run(self, job):
+        pass
+
+
+@mcp.tool()
+async def fetch(url: str) -> Dict[str, Any]:
+    pass
+
+
+@property
+def size(job) -> int:
+    return 0
+'''
+
+
+@pytest.fixture
+def index(tmp_path, project_setup):
+    state = project_setup(tmp_path, {"app.py": SOURCE})
+    return SecondaryIndex(state.ast_index)
+
+
+def _names(definitions):
+    return sorted(d["name"] for d in definitions)
+
+
+def test_decorators_match_in_full_or_by_last_segment(index):
+    assert _names(index.query(decorator="@mcp.tool()")) == ["fetch"]
+    assert _names(index.query(decorator="tool")) == ["fetch"]
+    assert _names(index.query(decorator="property")) == ["size"]
+
+
+def test_function_criteria_are_intersected(index):
+    assert _names(index.query(argument="job")) == ["run", "size"]
+    assert _names(index.query(argument="job", definition_type="function", is_async=False)) == ["run", "size"]
+    assert _names(index.query(is_async=True)) == ["fetch", "start"]
+    assert _names(index.query(returns="Dict[str,Any]")) == ["fetch"]
+    assert index.query(argument="job", is_async=True) == []
+
+
+def test_class_criteria(index):
+    assert _names(index.query(base_class="Base")) == ["Service"]
+    assert _names(index.query(base_class="Base", indirect_subclasses=True)) == ["Service", "Worker"]
+    assert _names(index.query(has_async_method=True)) == ["Service"]
+    assert _names(index.query(has_async_method=False)) == ["Base", "Worker"]
+
+
+def test_no_criteria_matches_nothing(index):
+    assert index.query() == []
@@ -0,0 +1,73 @@
+"""
+Sharded project index: manifests, lazy shard loading and stale shards.
+"""
+import os
+
+import pytest
+
+from mcp_code_editor import server
+from mcp_code_editor.tools.shard_index import ROOT_SHARD, shard_name
+
+FILES = {
+    "shop/__init__.py": "",
+    "shop/models.py": "class Order:\n    def save(self):\n        pass\n",
+    "billing/__init__.py": "",
+    "billing/invoice.py": "from shop.models import Order\n\n\ndef bill():\n    Order().save()\n",
+    "docs/conf.py": "PROJECT = 'demo'\n",
+    "main.py": "print('hello')\n",
+}
+
+
+@pytest.fixture
+def sharded_project(tmp_path, monkeypatch, ctx, run):
+    monkeypatch.setattr(server.mcp, "project_state", server.ProjectState(), raising=False)
+    for relative, content in FILES.items():
+        path = tmp_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    def _setup():
+        result = run(server.setup_code_editor_tool(str(tmp_path), sharded=True, ctx=ctx))
+        assert result["success"], result
+        return server.mcp.project_state
+
+    # The first setup builds and persists every shard the first time it is needed
+    state = _setup()
+    assert state.shards.get_status()["unbuilt_shards"] == 4
+    state.shards.ensure_all()
+    return tmp_path, _setup
+
+
+def test_shard_name(tmp_path):
+    assert shard_name(tmp_path, tmp_path / "shop" / "models.py") == "shop"
+    assert shard_name(tmp_path, tmp_path / "main.py") == ROOT_SHARD
+    assert shard_name(tmp_path, tmp_path.parent / "other.py") is None
+
+
+def test_queries_load_only_the_shards_they_need(sharded_project, ctx, run):
+    root, setup = sharded_project
+    state = setup()
+    assert state.shards.get_status()["unbuilt_shards"] == 0
+    assert state.shards.get_status()["loaded_shards"] == []
+
+    result = run(server.get_code_definition("save", ctx=ctx))
+    assert result["found"]
+    assert state.shards.get_status()["loaded_shards"] == ["shop"]
+
+    result = run(server.get_code_definition("save", include_usage=True, ctx=ctx))
+    assert state.shards.get_status()["loaded_shards"] == ["billing", "shop"]
+    assert any(u["file"].endswith("invoice.py") for u in result["usage_locations"])
+
+
+def test_modified_shard_is_rebuilt(sharded_project, ctx, run):
+    root, setup = sharded_project
+    conf = root / "docs" / "conf.py"
+    conf.write_text("PROJECT = 'demo'\n\n\nclass Order:\n    pass\n")
+    os.utime(conf, ns=(conf.stat().st_atime_ns, conf.stat().st_mtime_ns + 10 ** 9))
+
+    state = setup()
+    result = run(server.get_code_definition("Order", definition_type="class", ctx=ctx))
+
+    assert "docs" in state.shards.get_status()["loaded_shards"]
+    assert sorted(d["file"] for d in result["definitions"]) == sorted(
+        str((root / relative).resolve()) for relative in ("docs/conf.py", "shop/models.py"))
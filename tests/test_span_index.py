@@ -0,0 +1,79 @@
+"""
+Enclosing-definition lookups over the per-file span arrays.
+"""
+from types import SimpleNamespace
+
+from mcp_code_editor.tools.dependency_analyzer import DependencyAnalyzer
+from mcp_code_editor.tools.span_index import FileSpans, SpanIndex
+
+
+def _definition(name, start, end, definition_type="function", file_path="/a.py"):
+    return {"name": name, "type": definition_type, "line_start": start, "line_end": end, "file": file_path}
+
+
+DEFINITIONS = [
+    _definition("Service", 1, 20, "class"),
+    _definition("start", 2, 8),
+    _definition("retry", 4, 6),
+    _definition("stop", 10, 12),
+    _definition("helper", 22, 25),
+    _definition("TIMEOUT", 21, 21, "variable"),
+]
+
+
+def test_enclosing_and_chain():
+    spans = FileSpans(DEFINITIONS)
+
+    assert [d["name"] for d in spans.definitions] == ["Service", "start", "retry", "stop", "helper"]
+    assert spans.enclosing(5)["name"] == "retry"
+    assert spans.enclosing(9)["name"] == "Service"
+    assert spans.enclosing(21) is None
+    assert spans.enclosing(23)["name"] == "helper"
+    assert [d["name"] for d in spans.enclosing_chain(5)] == ["retry", "start", "Service"]
+    assert [d["name"] for d in spans.enclosing_chain(11)] == ["stop", "Service"]
+    assert spans.enclosing_chain(30) == []
+
+
+def test_overlapping_ranges():
+    spans = FileSpans(DEFINITIONS)
+
+    assert [d["name"] for d in spans.overlapping(7, 10)] == ["Service", "start", "stop"]
+    assert [d["name"] for d in spans.overlapping(21, 30)] == ["helper"]
+    assert [d["name"] for d in spans.overlapping(1, 1)] == ["Service"]
+
+
+def test_span_index_files():
+    index = SpanIndex(DEFINITIONS + [_definition("main", 1, 3, file_path="/b.py")])
+    assert index.get_stats() == {"files": 2, "spans": 6}
+    assert index.enclosing("/b.py", 2)["name"] == "main"
+
+    index.update_file("/a.py", [_definition("Service", 1, 5, "class")])
+    assert index.enclosing("/a.py", 4)["name"] == "Service"
+    assert index.enclosing("/a.py", 10) is None
+
+    index.update_file("/b.py", [_definition("LIMIT", 1, 1, "variable", "/b.py")])
+    assert index.file_spans("/b.py") is None
+
+    index.add_file("/c.py", [_definition("run", 3, 9, file_path="/c.py")])
+    index.remove_file("/a.py")
+    assert index.enclosing("/a.py", 4) is None
+    assert index.get_stats() == {"files": 1, "spans": 1}
+
+
+SOURCE = "def first():\n    a = 1\n    return a\n\n\ndef second():\n    return 2\n\n\ndef third():\n    return 3\n"
+
+
+def test_multi_line_block_reaches_the_next_definition(tmp_path):
+    path = tmp_path / "app.py"
+    path.write_text(SOURCE)
+    definitions = [_definition("first", 1, 3, file_path=str(path.resolve())),
+                   _definition("second", 6, 7, file_path=str(path.resolve())),
+                   _definition("third", 10, 11, file_path=str(path.resolve()))]
+    blocks = [{"start_line": 3, "search_content": "    return a\n\n\ndef second():",
+               "replace_content": "    return a\n\n\ndef second_renamed():"}]
+
+    for state in (SimpleNamespace(span_index=SpanIndex(definitions)), None):
+        analyzer = DependencyAnalyzer(definitions, state)
+        assert analyzer._detect_modified_items(SOURCE, blocks, str(path))["functions"] == ["first", "second"]
+        explicit = [dict(blocks[0], end_line=None)]
+        assert analyzer._detect_modified_items(SOURCE, explicit, str(path))["functions"] == ["first", "second"]
@@ -0,0 +1,66 @@
+"""
+Structure hashes of definitions and the changes reported after simulating a diff.
+"""
+import ast
+
+from mcp_code_editor.tools.ast_analyzer import structure_hashes
+from mcp_code_editor.tools.ast_integration import ASTDiffAnalyzer
+from mcp_code_editor.tools.dependency_analyzer import DependencyAnalyzer
+
+
+SOURCE = '''class Service:
+    retries = 3
+
+    def start(self):
+        """Start the service."""
+        return self.connect()
+
+    def stop(self):
+        return None
+
+
+def helper(value):
+    return value * 2
+'''
+
+
+def _hashes(source):
+    return {node.name: digest for node, digest in structure_hashes(ast.parse(source)).items()}
+
+
+def test_hash_ignores_comments_docstrings_and_positions():
+    edited = SOURCE.replace('"""Start the service."""', '"""Start it, reworded."""')
+    edited = edited.replace("return self.connect()", "return self.connect()  # retried by the caller")
+    edited = "\n\n# Header comment\n" + edited.replace("def helper", "\ndef helper")
+
+    assert _hashes(edited) == _hashes(SOURCE)
+
+
+def test_method_body_edit_changes_only_the_method():
+    before = _hashes(SOURCE)
+    after = _hashes(SOURCE.replace("return self.connect()", "return self.connect(timeout=5)"))
+
+    assert {name for name in before if before[name] != after[name]} == {"start"}
+
+    after = _hashes(SOURCE.replace("retries = 3", "retries = 5"))
+    assert {name for name in before if before[name] != after[name]} == {"Service"}
+
+
+def test_diff_impact_reports_only_changed_definitions(tmp_path, project_setup):
+    state = project_setup(tmp_path, {"app/__init__.py": "", "app/service.py": SOURCE})
+    file_path = str(tmp_path / "app" / "service.py")
+    blocks = [
+        {"start_line": 6, "search_content": "        return self.connect()",
+         "replace_content": "        return self.connect(timeout=5)"},
+        {"start_line": 13, "search_content": "    return value * 2",
+         "replace_content": "    # Doubled for the legacy API\n    return value * 2"},
+    ]
+
+    changes = ASTDiffAnalyzer(state.ast_index).analyze_diff_impact(file_path, blocks)["changes_detected"]
+    assert changes["functions_modified"] == ["start"]
+    assert changes["classes_modified"] == []
+    assert changes["functions_added"] == changes["functions_removed"] == []
+
+    analysis = DependencyAnalyzer(state.ast_index, state).analyze_diff_dependencies(file_path, blocks)
+    assert analysis["modified_functions"] == ["start"]
+    assert analysis["modified_classes"] == []
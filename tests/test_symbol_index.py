@@ -0,0 +1,118 @@
+"""
+SymbolIndex match modes and dotted qualified-name lookups.
+"""
+import random
+
+from mcp_code_editor.tools.symbol_index import SymbolIndex, split_segments, SCORE_EXACT, SCORE_PREFIX
+
+
+DEFINITIONS = [
+    {"name": "get_code_definition", "qualified_name": "server.get_code_definition", "type": "function"},
+    {"name": "getDefinitionByName", "qualified_name": "api.getDefinitionByName", "type": "function"},
+    {"name": "Order", "qualified_name": "shop.models.Order", "type": "class"},
+    {"name": "save", "qualified_name": "shop.models.Order.save", "type": "function"},
+    {"name": "save", "qualified_name": "shop.cart.save", "type": "function"},
+    {"name": "saved_orders", "qualified_name": "shop.cart.saved_orders", "type": "variable"},
+    {"name": "os.path", "type": "import"},
+]
+
+
+def _names(results):
+    return [definition["name"] for _, definition in results]
+
+
+def test_split_segments():
+    assert split_segments("getHTTPResponse_code2") == ["get", "http", "response", "code", "2"]
+
+
+def test_prefix_mode():
+    results = SymbolIndex(DEFINITIONS).search("save", match_mode="prefix")
+    assert _names(results) == ["save", "save", "saved_orders"]
+    assert [score for score, _ in results] == [SCORE_EXACT, SCORE_EXACT, 0]
+
+
+def test_substring_mode():
+    index = SymbolIndex(DEFINITIONS)
+    assert _names(index.search("order", match_mode="substring")) == ["Order", "saved_orders"]
+    assert index.search("order", match_mode="substring")[0][0] == SCORE_EXACT
+    assert _names(index.search("ord", match_mode="prefix")) == ["Order"]
+    assert index.search("sav", match_mode="substring")[-1][0] == SCORE_PREFIX
+
+
+def test_fuzzy_mode_initials_and_humps():
+    index = SymbolIndex(DEFINITIONS)
+    assert _names(index.search("gcd", match_mode="fuzzy")) == ["get_code_definition"]
+    assert "getDefinitionByName" in _names(index.search("getDef", match_mode="fuzzy"))
+    assert index.search("gcd", match_mode="substring") == []
+
+
+def test_limit_predicate_and_bonus():
+    index = SymbolIndex(DEFINITIONS)
+    results = index.search("save", limit=1, match_mode="prefix",
+                           predicate=lambda d: d["type"] == "function",
+                           bonus=lambda d: 10 if "cart" in d["qualified_name"] else 0, max_bonus=10)
+    assert [d["qualified_name"] for _, d in results] == ["shop.cart.save"]
+
+
+def test_dotted_query_resolves_qualified_suffixes():
+    index = SymbolIndex(DEFINITIONS)
+    assert [d["qualified_name"] for _, d in index.search("Order.save")] == ["shop.models.Order.save"]
+    assert [d["qualified_name"] for _, d in index.search("shop.models.order.save")] == ["shop.models.Order.save"]
+
+
+def test_dotted_query_falls_back_to_name_matching():
+    index = SymbolIndex(DEFINITIONS)
+    assert _names(index.search("os.path", match_mode="prefix")) == ["os.path"]
+    assert index.search("Missing.save") == []
+
+
+def _generated_definitions(count=500):
+    rng = random.Random(27)
+    stems = ["get", "get_user", "getUser", "Get", "set", "settings", "save", "saved", "sa"]
+    return [{"name": rng.choice(stems) + rng.choice(["", "_id", "Name", "2", "s"]),
+             "qualified_name": f"mod{number}.item", "type": rng.choice(["function", "class"])}
+            for number in range(count)]
+
+
+def test_prefix_results_match_a_linear_scan():
+    definitions = _generated_definitions()
+    index = SymbolIndex(definitions)
+
+    for query in ["get", "GET", "getu", "sa", "save", "x", "settings_id"]:
+        lowered = query.lower()
+        expected = [(SCORE_EXACT if d["name"].lower() == lowered else 0, position)
+                    for position, d in enumerate(definitions) if d["name"].lower().startswith(lowered)]
+        expected.sort(key=lambda item: (-item[0], item[1]))
+        results = index.search(query, match_mode="prefix")
+        assert [(score, definitions.index(d)) for score, d in results] == expected
+
+
+def test_limit_returns_the_top_of_the_full_ranking():
+    definitions = _generated_definitions()
+    index = SymbolIndex(definitions)
+
+    def bonus(definition):
+        return 7 if definition["type"] == "class" else 0
+
+    for match_mode in ["prefix", "substring", "fuzzy"]:
+        for query in ["get", "sa", "name"]:
+            ranked = index.search(query, match_mode=match_mode, bonus=bonus, max_bonus=7)
+            for limit in [1, 5, 40, 1000]:
+                top = index.search(query, limit=limit, match_mode=match_mode, bonus=bonus, max_bonus=7)
+                assert top == ranked[:limit]
+
+
+def test_ties_keep_definition_order():
+    definitions = [{"name": "save", "qualified_name": f"m{number}.save", "type": "function"}
+                   for number in range(10)]
+    index = SymbolIndex(definitions)
+
+    assert [d["qualified_name"] for _, d in index.search("save", limit=3)] == ["m0.save", "m1.save", "m2.save"]
+    assert index.search("save", limit=3) == index.search("save", limit=3)
+    assert [d["qualified_name"] for _, d in index.search("save")] == [f"m{number}.save" for number in range(10)]
+
+
+def test_exact_mode():
+    index = SymbolIndex(DEFINITIONS)
+    assert _names(index.search("SAVE", match_mode="exact")) == ["save", "save"]
+    assert index.search("sav", match_mode="exact") == []
@@ -0,0 +1,82 @@
+"""
+Identifier token extraction and the inverted file index used as a search prefilter.
+"""
+from mcp_code_editor.tools.token_index import TokenIndex, read_file_tokens, required_tokens
+
+
+def test_required_tokens_skip_words_touching_the_query_ends():
+    assert required_tokens("load_config(path") == []
+    assert required_tokens("self.load_config(path)") == ["load_config", "path"]
+    assert required_tokens("self.load_config(path)", whole_word=True) == ["self", "load_config", "path"]
+    assert required_tokens("0xff + 12") == []
+
+
+def test_read_file_tokens(tmp_path):
+    source = tmp_path / "app.py"
+    source.write_text("def load(path):\n    return open(path, 0xff)\n")
+    binary = tmp_path / "image.png"
+    binary.write_bytes(b"\x89PNG\0\0name")
+
+    assert read_file_tokens(source) == {"def", "load", "path", "return", "open"}
+    assert read_file_tokens(binary) is None
+    assert read_file_tokens(tmp_path / "missing.py") is None
+
+
+def test_candidate_files_intersect_postings():
+    index = TokenIndex()
+    index.add_file("/a.py", {"load", "path"})
+    index.add_file("/b.py", {"load", "Config"})
+    index.add_file("/c.txt", {"path"})
+    assert index.candidate_files(["load"]) is None
+
+    index.ready = True
+    assert index.candidate_files(["load"]) == {"/a.py", "/b.py"}
+    assert index.candidate_files(["load", "path"]) == {"/a.py"}
+    assert index.candidate_files(["config"]) == set()
+    assert index.candidate_files(["config"], case_sensitive=False) == {"/b.py"}
+    assert index.candidate_files(["missing", "load"]) == set()
+    assert index.candidate_files([]) is None
+
+
+def test_update_and_remove_touch_only_the_file_postings(tmp_path):
+    first = tmp_path / "first.py"
+    first.write_text("alpha = beta\n")
+    second = tmp_path / "second.py"
+    second.write_text("alpha = gamma\n")
+
+    index = TokenIndex()
+    index.build([first, second])
+    assert index.ready
+    assert index.candidate_files(["alpha"]) == {str(first), str(second)}
+
+    first.write_text("delta = gamma\n")
+    index.update_file(str(first))
+    assert index.candidate_files(["alpha"]) == {str(second)}
+    assert index.candidate_files(["gamma"]) == {str(first), str(second)}
+    assert index.candidate_files(["beta"]) == set()
+
+    second.unlink()
+    index.update_file(str(second))
+    assert index.candidate_files(["alpha"]) == set()
+    assert index.candidate_files(["gamma"]) == {str(first)}
+
+    index.remove_file(str(first))
+    assert index.get_stats()["files"] == 0
+    assert index.get_stats()["postings"] == 0
+
+
+def test_background_build(tmp_path):
+    files = []
+    for number in range(20):
+        path = tmp_path / f"mod_{number}.py"
+        path.write_text(f"def handler_{number}(request):\n    return request\n")
+        files.append(path)
+
+    index = TokenIndex()
+    index.start(files)
+    index._thread.join(timeout=30)
+
+    assert index.ready
+    assert index.candidate_files(["request"]) == {str(path) for path in files}
+    assert index.candidate_files(["handler_7"]) == {str(files[7])}
+    assert index.get_stats()["files"] == 20